@@ -1,11 +1,11 @@
+import json
 import streamlit as st
-import yfinance_data 
+import instrumentation
+import market_data
 import historical_chart 
 import pnl_chart
-import black_scholes
-import visualization
-import binomial
-import monte_carlo
+import pricing_cache
+# The pricing models and plotting libraries are imported in the branch of the selected model, on first use
 
 def sidebar_model_parameter(spot_price, volatility):
     """
@@ -34,16 +34,18 @@ def sidebar_model_parameter(spot_price, volatility):
                           min_value=0.01, max_value=1.0, value=(0.3,0.8), step=0.01)
     time_to_maturity_range = st.slider("Time Range (Years, for chart)",
                            min_value=0.0, max_value=5.0, value=(0.1,1.0), step=0.01)
+    surface_resolution = st.slider("Surface Resolution (points per axis)",
+                           min_value=5, max_value=200, value=10, step=5)
 
     st.markdown("""
     *These ranges define the axes of the 3D chart to visualize how the price changes. Spot price, strike price and risk-free rate are the same as for single point calculation.*
     """)
 
-    return input_spot_price, input_strike_price, input_interest_rate, input_volatility, input_time_to_maturity, volatility_range, time_to_maturity_range,  long_call_strike_price, long_put_strike_price
+    return input_spot_price, input_strike_price, input_interest_rate, input_volatility, input_time_to_maturity, volatility_range, time_to_maturity_range,  long_call_strike_price, long_put_strike_price, surface_resolution
 
 
 def model_visualization_streamlit_integration(model_pricing_call_option, model_pricing_put_option, spot_price, volatility_range, time_to_maturity_range, volatility_value, time_to_maturity_value,
-                                              input_strike_price, title, long_call_strike_price, long_put_strike_price):
+                                              input_strike_price, title, long_call_strike_price, long_put_strike_price, surface_resolution):
     """
     Integrates option pricing model results, payoff diagrams, and 3D surface visualizations into a Streamlit app.
 
@@ -53,12 +55,15 @@ def model_visualization_streamlit_integration(model_pricing_call_option, model_p
     - 3D surface and heatmap visualizations showing option price sensitivity to volatility and time to maturity.
     """
 
+    import visualization
+
     column1, column2 = st.columns(2)
     lower_bound_price, upper_bound_price = pnl_chart.round_pnl_chart_bound(spot_price)
 
     # Column 1 for call option 
     with column1:
-        call_value = round(model_pricing_call_option(volatility_value, time_to_maturity_value), 2)
+        with instrumentation.span("pricing.point"):
+            call_value = round(model_pricing_call_option(volatility_value, time_to_maturity_value), 2)
         with st.container(border=True):
             st.write("**CALL VALUE**")
             center_col, _ = st.columns([1,2])
@@ -72,16 +77,20 @@ def model_visualization_streamlit_integration(model_pricing_call_option, model_p
                 )
         # PnL Payoff diagram
         pnl_plot_long_call = pnl_chart.plot_payoff_diagram(long_call_strike_price, lower_bound_price, upper_bound_price, call_value, option_type='Long Call')
-        st.pyplot(pnl_plot_long_call)
+        with instrumentation.span("figure.render"):
+            st.pyplot(pnl_plot_long_call)
 
         # Integrate 3d surface and heatmap to streamlit 
-        fig_surface, fig_heatmap = visualization.plot_3d_surface_and_heatmap(volatility_range[0], volatility_range[1], time_to_maturity_range[0], time_to_maturity_range[1], model_pricing_call_option, title)
-        st.plotly_chart(fig_surface)
-        st.pyplot(fig_heatmap)
+        fig_surface, fig_heatmap = visualization.plot_3d_surface_and_heatmap(volatility_range[0], volatility_range[1], time_to_maturity_range[0], time_to_maturity_range[1], model_pricing_call_option, title,
+                                                                             resolution=surface_resolution, vectorized=True)
+        with instrumentation.span("figure.render"):
+            st.plotly_chart(fig_surface)
+            st.pyplot(fig_heatmap)
 
     # Column 2 for put option 
     with column2:
-        put_value = round(model_pricing_put_option(volatility_value, time_to_maturity_value), 2)
+        with instrumentation.span("pricing.point"):
+            put_value = round(model_pricing_put_option(volatility_value, time_to_maturity_value), 2)
         with st.container(border=True):
             st.write("**PUT VALUE**")
             center_col, _ =  st.columns([1,2])
@@ -94,13 +103,16 @@ def model_visualization_streamlit_integration(model_pricing_call_option, model_p
                     label_visibility="collapsed"
                                 )
         # PnL Payoff diagram
-        pnl_plot_long_put = pnl_chart.plot_payoff_diagram(long_put_strike_price, lower_bound_price, upper_bound_price, call_value, option_type='Long Put')
-        st.pyplot(pnl_plot_long_put)
+        pnl_plot_long_put = pnl_chart.plot_payoff_diagram(long_put_strike_price, lower_bound_price, upper_bound_price, put_value, option_type='Long Put')
+        with instrumentation.span("figure.render"):
+            st.pyplot(pnl_plot_long_put)
 
         # Integrate 3d surface and heatmap to streamlit 
-        fig_surface, fig_heatmap = visualization.plot_3d_surface_and_heatmap(volatility_range[0], volatility_range[1], time_to_maturity_range[0], time_to_maturity_range[1], model_pricing_put_option, title)
-        st.plotly_chart(fig_surface)
-        st.pyplot(fig_heatmap)
+        fig_surface, fig_heatmap = visualization.plot_3d_surface_and_heatmap(volatility_range[0], volatility_range[1], time_to_maturity_range[0], time_to_maturity_range[1], model_pricing_put_option, title,
+                                                                             resolution=surface_resolution, vectorized=True)
+        with instrumentation.span("figure.render"):
+            st.plotly_chart(fig_surface)
+            st.pyplot(fig_heatmap)
 
 
 
@@ -111,6 +123,17 @@ st.set_page_config(page_title='Option Pricer',
                    layout='wide', 
                    initial_sidebar_state='expanded')
 
+# -------------------------------------------------------------- Instrumentation --------------------------------------------------------------------
+# Opt-in timings and profiling, toggled in the debug panel at the bottom of the sidebar (or OPTION_PRICER_INSTRUMENTATION=1).
+# The switch is process wide, and the records are reset on every rerun so the panel shows the last one.
+record_timings = st.session_state.get("record_timings", instrumentation.is_enabled())
+if record_timings:
+    instrumentation.enable()
+    instrumentation.reset()
+else:
+    instrumentation.disable()
+# The button is True during the rerun its click triggered, which is the one profiled
+profiler = instrumentation.SamplingProfiler().start() if st.session_state.get("profile_rerun") else None
 
 
 # -------------------------------------------------------------- Top of Sidebar --------------------------------------------------------------------
@@ -129,10 +152,11 @@ with st.sidebar:
 
     # --- Ticker input ---
     ticker =  st.text_input("**Ticker Symbol**", "NVDA")
-    stock = yfinance_data.stockData(ticker)
-    display_name = stock.get_display_name()
-    spot_price = round(stock.get_spot_price(),2)
-    volatility = round(stock.get_annual_volatility(),5)
+    stock = market_data.CachedStockData(ticker)
+    with instrumentation.span("data.fetch"):
+        display_name = stock.get_display_name()
+        spot_price = round(stock.get_spot_price(),2)
+        volatility = round(stock.get_annual_volatility(),5)
     st.info(f"**Stock Name:** {display_name}")
     # Sidebar slider to select period
     historical_data_period = st.select_slider(
@@ -140,13 +164,14 @@ with st.sidebar:
         options=["1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"],
         value="1y"  # default
     )
-    historical_data = stock.get_historical_data(period=historical_data_period)
+    with instrumentation.span("data.fetch"):
+        historical_data = stock.get_historical_data(period=historical_data_period)
     
     st.markdown("---")
 
 # ---------------- MAIN HEADER ----------------
 st.title("💹 Interactive Option Pricer")
-st.caption("Explore Black-Scholes, Binomial, and Monte Carlo pricing models with dynamic visualizations.")
+st.caption("Explore Black-Scholes, Binomial, Monte Carlo, and finite-difference pricing models with dynamic visualizations.")
 
 # Historical chart
 with st.expander("📜 View Historical Price Data"):
@@ -161,12 +186,14 @@ with st.sidebar:
     - Adjust the ranges to plot the 3D surface over different volatilities and times to expiry.
     """)
 
-# -------------------------------------------------------------- Tabs For Models --------------------------------------------------------------------
-tab_black_scholes, tab_binomial, tab_monte_carlo = st.tabs(["Black-Scholes", "Binomial",  "Monte Carlo"])
+# -------------------------------------------------------------- Model Selector --------------------------------------------------------------------
+# Only the selected model is priced and plotted on a rerun
+selected_model = st.radio("Model", ["Black-Scholes", "Binomial",  "Monte Carlo", "Finite Difference"], horizontal=True, label_visibility="collapsed")
 
 
 # -------------------------------------------------------------- Black-Scholes Model --------------------------------------------------------------------
-with tab_black_scholes:
+if selected_model == "Black-Scholes":
+    import black_scholes
 
     with st.sidebar.form('form1'):
 
@@ -174,27 +201,34 @@ with tab_black_scholes:
         
         with st.expander("Parameters"):
 
-            input_spot_price, input_strike_price, input_interest_rate, input_volatility, input_time_to_maturity, volatility_range, time_to_maturity_range, long_call_strike_price, long_put_strike_price = sidebar_model_parameter(spot_price, volatility)
+            input_spot_price, input_strike_price, input_interest_rate, input_volatility, input_time_to_maturity, volatility_range, time_to_maturity_range, long_call_strike_price, long_put_strike_price, surface_resolution = sidebar_model_parameter(spot_price, volatility)
 
         submit = st.form_submit_button("Update Chart")
 
     st.header("Black-Scholes Model", divider="grey", width="content")
 
-    model_pricing_call_option = lambda volatility, time_to_maturity: black_scholes.black_scholes_pricing_call(spot_price=input_spot_price, 
+    model_pricing_call_option = lambda volatility, time_to_maturity: black_scholes.black_scholes_pricing_batch(spot_price=input_spot_price, 
                                                                                                         strike_price=input_strike_price, 
                                                                                                         risk_free_rate=input_interest_rate, 
                                                                                                         time_to_maturity=time_to_maturity, 
-                                                                                                        volatility=volatility)
-    model_pricing_put_option = lambda volatility, time_to_maturity: black_scholes.black_scholes_pricing_put(spot_price=input_spot_price, 
+                                                                                                        volatility=volatility,
+                                                                                                        option_type = "Call")
+    model_pricing_put_option = lambda volatility, time_to_maturity: black_scholes.black_scholes_pricing_batch(spot_price=input_spot_price, 
                                                                                                         strike_price=input_strike_price, 
                                                                                                         risk_free_rate=input_interest_rate, 
                                                                                                         time_to_maturity=time_to_maturity, 
-                                                                                                        volatility=volatility)
+                                                                                                        volatility=volatility,
+                                                                                                        option_type = "Put")
+    # Serve unchanged prices and surfaces from the cache on reruns
+    model_settings = {"spot_price": input_spot_price, "strike_price": input_strike_price, "risk_free_rate": input_interest_rate}
+    model_pricing_call_option = pricing_cache.default_cache.cached("Black-Scholes Call", model_pricing_call_option, settings=model_settings)
+    model_pricing_put_option = pricing_cache.default_cache.cached("Black-Scholes Put", model_pricing_put_option, settings=model_settings)
     model_visualization_streamlit_integration(model_pricing_call_option, model_pricing_put_option, spot_price, volatility_range, time_to_maturity_range,
-                                            input_volatility, input_time_to_maturity,  input_strike_price, "Black-Scholes",  long_call_strike_price, long_put_strike_price)
+                                            input_volatility, input_time_to_maturity,  input_strike_price, "Black-Scholes",  long_call_strike_price, long_put_strike_price, surface_resolution)
 
 # -------------------------------------------------------------- Binomial Model --------------------------------------------------------------------
-with tab_binomial:
+elif selected_model == "Binomial":
+    import binomial
         
     with st.sidebar.form('form2'):
 
@@ -202,58 +236,144 @@ with tab_binomial:
 
         with st.expander("Parameters"):
 
-            input_spot_price, input_strike_price, input_interest_rate, input_volatility, input_time_to_maturity, volatility_range, time_to_maturity_range, long_call_strike_price, long_put_strike_price = sidebar_model_parameter(spot_price, volatility)
+            input_spot_price, input_strike_price, input_interest_rate, input_volatility, input_time_to_maturity, volatility_range, time_to_maturity_range, long_call_strike_price, long_put_strike_price, surface_resolution = sidebar_model_parameter(spot_price, volatility)
             input_step = int(st.text_input("Number of time steps",100))
+            input_lattice_method = st.selectbox("Lattice", binomial.LATTICE_METHODS)
 
         submit = st.form_submit_button("Update Chart")
 
     st.header("Binomial Model", divider="grey",  width="content")
 
-    model_pricing_call_option = lambda volatility, time_to_maturity: binomial.binomial_pricing(spot_price=input_spot_price, 
+    model_pricing_call_option = lambda volatility, time_to_maturity: binomial.binomial_pricing_batch(spot_price=input_spot_price, 
                                                                                                         strike_price=input_strike_price, 
                                                                                                         risk_free_rate=input_interest_rate, 
                                                                                                         time_to_maturity=time_to_maturity, 
                                                                                                         volatility=volatility,
                                                                                                         steps = input_step,
-                                                                                                        option_type = "Call")
-    model_pricing_put_option = lambda volatility, time_to_maturity: binomial.binomial_pricing(spot_price=input_spot_price, 
+                                                                                                        option_type = "Call",
+                                                                                                        method = input_lattice_method)
+    model_pricing_put_option = lambda volatility, time_to_maturity: binomial.binomial_pricing_batch(spot_price=input_spot_price, 
                                                                                                         strike_price=input_strike_price, 
                                                                                                         risk_free_rate=input_interest_rate, 
                                                                                                         time_to_maturity=time_to_maturity, 
                                                                                                         volatility=volatility,
                                                                                                         steps = input_step,
-                                                                                                        option_type = "Put")
+                                                                                                        option_type = "Put",
+                                                                                                        method = input_lattice_method)
+    model_settings = {"spot_price": input_spot_price, "strike_price": input_strike_price, "risk_free_rate": input_interest_rate,
+                      "steps": input_step, "method": input_lattice_method}
+    model_pricing_call_option = pricing_cache.default_cache.cached("Binomial Call", model_pricing_call_option, settings=model_settings)
+    model_pricing_put_option = pricing_cache.default_cache.cached("Binomial Put", model_pricing_put_option, settings=model_settings)
     model_visualization_streamlit_integration(model_pricing_call_option, model_pricing_put_option, spot_price, volatility_range, time_to_maturity_range,
-                                            input_volatility, input_time_to_maturity,  input_strike_price, "Binomial",  long_call_strike_price, long_put_strike_price)
+                                            input_volatility, input_time_to_maturity,  input_strike_price, "Binomial",  long_call_strike_price, long_put_strike_price, surface_resolution)
 
 
 # -------------------------------------------------------------- Monte Carlo Model --------------------------------------------------------------------
-with tab_monte_carlo:
+elif selected_model == "Monte Carlo":
+    import monte_carlo
     with st.sidebar.form('form3'):
 
         st.header('Monte Carlo')
 
         with st.expander("Parameters"):
 
-            input_spot_price, input_strike_price, input_interest_rate, input_volatility, input_time_to_maturity, volatility_range, time_to_maturity_range, long_call_strike_price, long_put_strike_price = sidebar_model_parameter(spot_price, volatility)
+            input_spot_price, input_strike_price, input_interest_rate, input_volatility, input_time_to_maturity, volatility_range, time_to_maturity_range, long_call_strike_price, long_put_strike_price, surface_resolution = sidebar_model_parameter(spot_price, volatility)
+            input_variance_reduction = st.selectbox("Variance reduction", monte_carlo.VARIANCE_REDUCTION_METHODS, index=1)
+            input_seed = int(st.number_input("Random seed", value=42, step=1))
 
         submit = st.form_submit_button("Update Chart")
 
     st.header("Monte Carlo Model", divider="grey",  width="content")
 
-    model_pricing_call_option = lambda volatility, time_to_maturity: monte_carlo.monte_carlo_pricing(spot_price=input_spot_price, 
+    model_pricing_call_option = lambda volatility, time_to_maturity: monte_carlo.monte_carlo_pricing_chunked(spot_price=input_spot_price, 
                                                                                                         strike_price=input_strike_price, 
                                                                                                         risk_free_rate=input_interest_rate, 
                                                                                                         time_to_maturity=time_to_maturity, 
                                                                                                         volatility=volatility,
-                                                                                                        option_type = "Call")
+                                                                                                        option_type = "Call",
+                                                                                                        number_of_simulation = 10000,
+                                                                                                        variance_reduction = input_variance_reduction,
+                                                                                                        seed = input_seed).price
 
-    model_pricing_put_option = lambda volatility, time_to_maturity: monte_carlo.monte_carlo_pricing(spot_price=input_spot_price, 
+    model_pricing_put_option = lambda volatility, time_to_maturity: monte_carlo.monte_carlo_pricing_chunked(spot_price=input_spot_price, 
                                                                                                         strike_price=input_strike_price, 
                                                                                                         risk_free_rate=input_interest_rate, 
                                                                                                         time_to_maturity=time_to_maturity, 
                                                                                                         volatility=volatility,
-                                                                                                        option_type = "Put")
+                                                                                                        option_type = "Put",
+                                                                                                        number_of_simulation = 10000,
+                                                                                                        variance_reduction = input_variance_reduction,
+                                                                                                        seed = input_seed).price
+
+    # Monte Carlo prices are only reused for the same seed
+    model_settings = {"spot_price": input_spot_price, "strike_price": input_strike_price, "risk_free_rate": input_interest_rate,
+                      "number_of_simulation": 10000, "variance_reduction": input_variance_reduction}
+    model_pricing_call_option = pricing_cache.default_cache.cached("Monte Carlo Call", model_pricing_call_option, settings=model_settings,
+                                                                   seed=input_seed, stochastic=True)
+    model_pricing_put_option = pricing_cache.default_cache.cached("Monte Carlo Put", model_pricing_put_option, settings=model_settings,
+                                                                  seed=input_seed, stochastic=True)
+    model_visualization_streamlit_integration(model_pricing_call_option, model_pricing_put_option, spot_price, volatility_range, time_to_maturity_range,
+                                            input_volatility, input_time_to_maturity,  input_strike_price, "Monte Carlo",  long_call_strike_price, long_put_strike_price, surface_resolution)
+
+# -------------------------------------------------------------- Finite Difference Model --------------------------------------------------------------------
+elif selected_model == "Finite Difference":
+    import finite_difference
+    with st.sidebar.form('form4'):
+
+        st.header('Finite Difference')
+
+        with st.expander("Parameters"):
+
+            input_spot_price, input_strike_price, input_interest_rate, input_volatility, input_time_to_maturity, volatility_range, time_to_maturity_range, long_call_strike_price, long_put_strike_price, surface_resolution = sidebar_model_parameter(spot_price, volatility)
+            input_exercise_style = st.selectbox("Exercise style", ["European", "American"])
+            input_space_steps = int(st.number_input("Spot grid steps", value=300, min_value=20, step=50))
+            input_time_steps = int(st.number_input("Time steps", value=200, min_value=10, step=50))
+
+        submit = st.form_submit_button("Update Chart")
 
+    st.header("Finite Difference Model", divider="grey",  width="content")
+
+    # One Crank-Nicolson solve per volatility prices every maturity of the surface
+    model_pricing_call_option = lambda volatility, time_to_maturity: finite_difference.finite_difference_pricing_batch(spot_price=input_spot_price, 
+                                                                                                        strike_price=input_strike_price, 
+                                                                                                        risk_free_rate=input_interest_rate, 
+                                                                                                        time_to_maturity=time_to_maturity, 
+                                                                                                        volatility=volatility,
+                                                                                                        option_type = "Call",
+                                                                                                        exercise_style = input_exercise_style,
+                                                                                                        space_steps = input_space_steps,
+                                                                                                        time_steps = input_time_steps)
+    model_pricing_put_option = lambda volatility, time_to_maturity: finite_difference.finite_difference_pricing_batch(spot_price=input_spot_price, 
+                                                                                                        strike_price=input_strike_price, 
+                                                                                                        risk_free_rate=input_interest_rate, 
+                                                                                                        time_to_maturity=time_to_maturity, 
+                                                                                                        volatility=volatility,
+                                                                                                        option_type = "Put",
+                                                                                                        exercise_style = input_exercise_style,
+                                                                                                        space_steps = input_space_steps,
+                                                                                                        time_steps = input_time_steps)
+    model_settings = {"spot_price": input_spot_price, "strike_price": input_strike_price, "risk_free_rate": input_interest_rate,
+                      "exercise_style": input_exercise_style, "space_steps": input_space_steps, "time_steps": input_time_steps}
+    model_pricing_call_option = pricing_cache.default_cache.cached("Finite Difference Call", model_pricing_call_option, settings=model_settings)
+    model_pricing_put_option = pricing_cache.default_cache.cached("Finite Difference Put", model_pricing_put_option, settings=model_settings)
     model_visualization_streamlit_integration(model_pricing_call_option, model_pricing_put_option, spot_price, volatility_range, time_to_maturity_range,
-                                            input_volatility, input_time_to_maturity,  input_strike_price, "Monte Carlo",  long_call_strike_price, long_put_strike_price)
+                                            input_volatility, input_time_to_maturity,  input_strike_price, "Finite Difference",  long_call_strike_price, long_put_strike_price, surface_resolution)
+
+# -------------------------------------------------------------- Pricing Cache --------------------------------------------------------------------
+cache_stats = pricing_cache.default_cache.stats()
+st.sidebar.caption(f"Pricing cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['size']}/{cache_stats['maxsize']} entries")
+
+# -------------------------------------------------------------- Debug Panel --------------------------------------------------------------------
+if profiler is not None:
+    profiler.stop()
+with st.sidebar.expander("🛠 Debug"):
+    st.checkbox("Record timings", value=record_timings, key="record_timings", help="Time data fetch, pricing, surfaces and figures on every rerun")
+    if record_timings:
+        st.dataframe(instrumentation.span_table())
+        st.write(instrumentation.export()["counters"])
+        st.download_button("Export timings (JSON)", json.dumps(instrumentation.export(events=True), indent=2),
+                           file_name="timings.json", mime="application/json")
+    st.button("Profile a rerun", key="profile_rerun", help="Rerun the app under the sampling profiler")
+    if profiler is not None:
+        st.caption(f"{profiler.samples} samples")
+        st.dataframe(profiler.table())
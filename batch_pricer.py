@@ -0,0 +1,204 @@
+"""
+Headless batch pricer: streams a portfolio file (CSV or Parquet) in chunks, prices every row with the selected model
+and writes the results out chunk by chunk, so memory stays flat whatever the number of rows.
+
+The portfolio needs the greeks.PORTFOLIO_COLUMNS (spot_price, strike_price, risk_free_rate, time_to_maturity, volatility,
+option_type); every other column is copied to the output. Output columns are price (plus standard_error for Monte Carlo)
+and, with --greeks, the Black-Scholes Greeks of each contract.
+
+Example:
+    python batch_pricer.py portfolio.parquet priced.parquet --model binomial --steps 200 --greeks
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from greeks import GREEK_COLUMNS, PORTFOLIO_COLUMNS
+
+MODELS = ["black_scholes", "binomial", "monte_carlo"]
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_MEMORY_BUDGET = 256*2**20
+# The binomial pricer holds about four (steps+1) x rows float64 arrays: stock prices, values and their scratch copies
+BINOMIAL_BYTES_PER_NODE = 4*8
+
+
+def _file_format(path):
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    raise ValueError(f"unsupported file type '{suffix}', use .csv or .parquet")
+
+
+def chunk_rows_for(model, memory_budget=DEFAULT_MEMORY_BUDGET, steps=100):
+    """
+    Rows per chunk keeping the pricing arrays of a chunk within about memory_budget bytes. Only the binomial trees
+    grow with a setting (steps); the other models use a few arrays per row and get DEFAULT_CHUNK_ROWS.
+    """
+    if model != "binomial":
+        return DEFAULT_CHUNK_ROWS
+    return int(min(DEFAULT_CHUNK_ROWS, max(1, memory_budget//(BINOMIAL_BYTES_PER_NODE*(steps+1)))))
+
+
+def _output_columns(model, greeks):
+    return ["price"]+(["standard_error"] if model == "monte_carlo" else [])+(GREEK_COLUMNS[1:] if greeks else [])
+
+
+def read_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yield the rows of a CSV or Parquet file as DataFrames of at most chunk_rows rows
+    """
+    if _file_format(path) == "csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+    else:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+
+
+def read_empty(path):
+    """
+    Zero-row DataFrame with the columns of a CSV or Parquet file (and, for Parquet, their types)
+    """
+    if _file_format(path) == "csv":
+        return pd.read_csv(path, nrows=0)
+    import pyarrow.parquet as pq
+    return pq.read_schema(path).empty_table().to_pandas()
+
+
+class ChunkWriter:
+    """
+    Append DataFrame chunks to a CSV or Parquet file, the first chunk fixing the columns (and Parquet schema)
+    """
+    def __init__(self, path):
+        self.path = path
+        self.format = _file_format(path)
+        self.parquet_writer = None
+        self.chunks = 0
+
+    def write(self, chunk):
+        if self.format == "csv":
+            chunk.to_csv(self.path, mode="w" if self.chunks == 0 else "a", header=self.chunks == 0, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self.parquet_writer.write_table(table.cast(self.parquet_writer.schema))
+        self.chunks += 1
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def price_chunk(chunk, model="black_scholes", greeks=False, steps=100, exercise_style="European", method="CRR",
+                number_of_simulation=10000, variance_reduction="control_variate", seed=None):
+    """
+    Price every row of a portfolio chunk with one vectorized call of the model and return the chunk with the results appended.
+    seed may be an int or a numpy SeedSequence (the Monte Carlo generator seed).
+    """
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {MODELS}")
+    missing = [column for column in PORTFOLIO_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"portfolio is missing the columns {missing}")
+    if chunk.empty:
+        # Header only: keep the contract columns numeric so the output schema matches a non-empty run
+        return chunk.astype({column: float for column in PORTFOLIO_COLUMNS[:5]}).assign(
+            **{column: np.zeros(0) for column in _output_columns(model, greeks)})
+    contracts = [chunk[column].to_numpy() for column in PORTFOLIO_COLUMNS]
+    parameters, option_type = [np.asarray(values, dtype=float) for values in contracts[:5]], contracts[5].astype(str)
+
+    result = chunk.copy()
+    if model == "black_scholes":
+        import black_scholes
+        result["price"] = black_scholes.black_scholes_pricing_batch(*parameters, option_type=option_type)
+    elif model == "binomial":
+        import binomial
+        result["price"] = binomial.binomial_pricing_batch(*parameters, steps=steps, option_type=option_type,
+                                                          exercise_style=exercise_style, method=method)
+    else:
+        import monte_carlo
+        mc_result = monte_carlo.monte_carlo_pricing_chunked(*parameters, number_of_simulation=number_of_simulation, option_type=option_type,
+                                                            seed=seed, variance_reduction=variance_reduction)
+        result["price"] = mc_result.price
+        result["standard_error"] = mc_result.standard_error
+
+    if greeks:
+        import greeks as greeks_module
+        sensitivities = greeks_module.black_scholes_greeks(*parameters, option_type=option_type)
+        for column in greeks_module.GREEK_COLUMNS[1:]:
+            result[column] = sensitivities[column].to_numpy()
+    return result
+
+
+def price_portfolio_file(input_path, output_path, model="black_scholes", greeks=False, chunk_rows=None, seed=None,
+                         progress=None, memory_budget=DEFAULT_MEMORY_BUDGET, **model_settings):
+    """
+    Stream input_path through price_chunk into output_path, one chunk in memory at a time.
+    chunk_rows defaults to chunk_rows_for the model within memory_budget bytes.
+    Monte Carlo chunks get independent generators spawned from seed, so a run is reproducible for a given chunk_rows.
+    progress, if given, is called with (rows done, seconds elapsed) after every chunk.
+    An empty portfolio still gives an output file with the output columns (and Parquet schema).
+    Returns the number of rows priced and the elapsed seconds.
+    """
+    if chunk_rows is None:
+        chunk_rows = chunk_rows_for(model, memory_budget, model_settings.get("steps", 100))
+    seed_sequence = np.random.SeedSequence(seed)
+    rows = 0
+    start = time.perf_counter()
+    with ChunkWriter(output_path) as writer:
+        for index, chunk in enumerate(read_chunks(input_path, chunk_rows)):
+            chunk_seed = np.random.SeedSequence(seed_sequence.entropy, spawn_key=(index,))
+            writer.write(price_chunk(chunk, model, greeks, seed=chunk_seed, **model_settings))
+            rows += len(chunk)
+            if progress is not None:
+                progress(rows, time.perf_counter()-start)
+        if writer.chunks == 0:
+            writer.write(price_chunk(read_empty(input_path), model, greeks, **model_settings))
+    return rows, time.perf_counter()-start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="portfolio file (.csv or .parquet)")
+    parser.add_argument("output", help="priced portfolio file (.csv or .parquet)")
+    parser.add_argument("--model", choices=MODELS, default="black_scholes")
+    parser.add_argument("--greeks", action="store_true", help="add the Black-Scholes Greeks of every contract")
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help="rows read, priced and written at a time (default: what fits in --memory-budget)")
+    parser.add_argument("--memory-budget", type=int, default=DEFAULT_MEMORY_BUDGET//2**20, help="MB of pricing arrays per chunk")
+    parser.add_argument("--steps", type=int, default=100, help="binomial time steps")
+    parser.add_argument("--exercise-style", choices=["European", "American"], default="European")
+    parser.add_argument("--method", default="CRR", help="binomial lattice, one of binomial.LATTICE_METHODS")
+    parser.add_argument("--simulations", type=int, default=10000, help="Monte Carlo paths per contract")
+    parser.add_argument("--variance-reduction", default="control_variate", help="one of monte_carlo.VARIANCE_REDUCTION_METHODS")
+    parser.add_argument("--seed", type=int, default=None, help="Monte Carlo seed")
+    parser.add_argument("--quiet", action="store_true", help="only report the final throughput")
+    args = parser.parse_args(argv)
+
+    def progress(rows, seconds):
+        print(f"\r{rows:,} rows, {rows/seconds:,.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+    rows, seconds = price_portfolio_file(args.input, args.output, args.model, args.greeks, args.chunk_rows, args.seed,
+                                         None if args.quiet else progress, args.memory_budget*2**20, steps=args.steps, exercise_style=args.exercise_style,
+                                         method=args.method, number_of_simulation=args.simulations,
+                                         variance_reduction=args.variance_reduction)
+    if rows and not args.quiet:
+        print(file=sys.stderr)    # end the \r progress line
+    print(f"priced {rows:,} rows in {seconds:.2f}s ({rows/max(seconds, 1e-9):,.0f} rows/s) with {args.model}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
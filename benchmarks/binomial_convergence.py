@@ -0,0 +1,66 @@
+"""
+Convergence benchmark of the binomial lattices against the Black-Scholes closed form.
+For every scheme and number of steps it reports the largest pricing error over a small chain
+and the wall time needed to price that chain, so error can be compared against cost.
+American chains have no closed form and are compared against a 10001-step Leisen-Reimer tree.
+
+Run from the repository root:
+    python -m benchmarks.binomial_convergence
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import binomial
+import black_scholes
+
+
+def convergence_table(steps_list, exercise_style="European", spot_price=100.0, risk_free_rate=0.05, time_to_maturity=1.0, volatility=0.25, repeat=3):
+    """
+    Error vs wall time of every lattice method for each number of steps
+    """
+    strike_prices = np.array([80.0, 90.0, 95.0, 100.0, 105.0, 110.0, 120.0])
+    option_types = np.array(["Call", "Put"]*4)[:strike_prices.size]
+    if exercise_style == "European":
+        reference = black_scholes.black_scholes_pricing_batch(spot_price, strike_prices, risk_free_rate, time_to_maturity, volatility, option_types)
+    else:
+        reference = binomial.binomial_pricing_batch(spot_price, strike_prices, risk_free_rate, time_to_maturity, volatility,
+                                                    10001, option_types, exercise_style, method="Leisen-Reimer")
+
+    rows = []
+    for method in binomial.LATTICE_METHODS:
+        for steps in steps_list:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                prices = binomial.binomial_pricing_batch(spot_price, strike_prices, risk_free_rate, time_to_maturity, volatility,
+                                                         steps, option_types, exercise_style, method=method)
+                timings.append(time.perf_counter()-start)
+            rows.append({"method": method, "steps": steps,
+                         "max_abs_error": np.max(np.abs(prices-reference)),
+                         "seconds": min(timings)})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, nargs="+", default=[25, 50, 100, 200, 400, 800, 1600, 3200, 6400])
+    parser.add_argument("--target-error", type=float, default=1e-4)
+    parser.add_argument("--exercise-style", choices=["European", "American"], default="European")
+    args = parser.parse_args()
+
+    table = convergence_table(args.steps, args.exercise_style)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.3e}"))
+
+    print(f"\nFewest steps reaching a max error of {args.target_error:g}:")
+    for method, rows in table.groupby("method", sort=False):
+        reached = rows[rows["max_abs_error"] <= args.target_error]
+        if reached.empty:
+            print(f"  {method:<14} not reached")
+        else:
+            best = reached.iloc[0]
+            print(f"  {method:<14} {best['steps']:>6} steps in {best['seconds']*1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Scaling benchmark of monte_carlo.monte_carlo_pricing_parallel.
+Prices the same chain with the same seed on an increasing number of worker processes and reports the wall time,
+the speedup and the parallel efficiency against a single worker, and checks that every run returns the same prices.
+
+Run from the repository root:
+    python -m benchmarks.monte_carlo_scaling --simulations 100000000
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import monte_carlo
+
+
+def scaling_table(worker_counts, number_of_simulation, shard_size, seed=2024):
+    """
+    Wall time, speedup and efficiency of the parallel pricer for each number of workers
+    """
+    strike_prices = np.array([90.0, 100.0, 110.0])
+    rows = []
+    reference_price = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        result = monte_carlo.monte_carlo_pricing_parallel(100.0, strike_prices, 0.03, 1.0, 0.2, number_of_simulation,
+                                                          seed=seed, workers=workers, shard_size=shard_size)
+        seconds = time.perf_counter()-start
+        if reference_price is None:
+            reference_price = result.price
+        rows.append({"workers": workers, "seconds": seconds,
+                     "paths_per_second": number_of_simulation/seconds,
+                     "reproducible": bool(np.array_equal(result.price, reference_price))})
+
+    table = pd.DataFrame(rows)
+    table["speedup"] = table["seconds"].iloc[0]/table["seconds"]
+    table["efficiency"] = table["speedup"]/table["workers"]*table["workers"].iloc[0]
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--simulations", type=int, default=20_000_000)
+    parser.add_argument("--shard-size", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="worker counts to try, by default powers of two up to the number of cores")
+    args = parser.parse_args()
+
+    worker_counts = args.workers
+    if worker_counts is None:
+        cores = os.cpu_count() or 1
+        worker_counts = sorted({min(2**i, cores) for i in range(cores.bit_length()+1)})
+    table = scaling_table(worker_counts, args.simulations, args.shard_size)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
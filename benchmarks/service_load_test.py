@@ -0,0 +1,105 @@
+"""
+Load test of pricing_service.py.
+Sends requests from many concurrent clients to a running instance (or one started with --start-server) and reports
+the throughput, the client side p50/p99 latencies and the batching and latency metrics of the service.
+
+Run from the repository root:
+    python -m benchmarks.service_load_test --start-server --model binomial --concurrency 64 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+
+def random_contract(rng, model, contracts_per_request):
+    """
+    Body of one /price request for contracts_per_request random contracts (a single contract when 1)
+    """
+    contract = {"spot_price": 100.0, "risk_free_rate": 0.03}
+    columns = {"strike_price": rng.uniform(80, 120, contracts_per_request).round(2).tolist(),
+               "time_to_maturity": rng.uniform(0.1, 2.0, contracts_per_request).round(3).tolist(),
+               "volatility": rng.uniform(0.1, 0.5, contracts_per_request).round(3).tolist(),
+               "option_type": rng.choice(["Call", "Put"], contracts_per_request).tolist()}
+    if contracts_per_request == 1:
+        body = {**contract, **{name: values[0] for name, values in columns.items()}}
+    else:
+        body = {"contracts": {**contract, **columns}}
+    body["model"] = model
+    return body
+
+
+async def wait_until_healthy(url, timeout=30):
+    client = AsyncHTTPClient()
+    deadline = time.monotonic()+timeout
+    while True:
+        try:
+            await client.fetch(f"{url}/health")
+            return
+        except (OSError, HTTPClientError):
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def load_test(url, model, number_of_requests, concurrency, contracts_per_request, seed=0):
+    """
+    Send number_of_requests requests from concurrency clients, returning the client latencies (seconds) and the wall time
+    """
+    AsyncHTTPClient.configure(None, max_clients=concurrency)
+    client = AsyncHTTPClient()
+    rng = np.random.default_rng(seed)
+    bodies = [json.dumps(random_contract(rng, model, contracts_per_request)) for _ in range(number_of_requests)]
+    latencies = []
+    next_request = iter(range(number_of_requests))
+
+    async def worker():
+        for index in next_request:
+            start = time.perf_counter()
+            await client.fetch(f"{url}/price", method="POST", body=bodies[index], headers={"Content-Type": "application/json"})
+            latencies.append(time.perf_counter()-start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return np.asarray(latencies), time.perf_counter()-start
+
+
+async def run(args):
+    url = args.url.rstrip("/")
+    await wait_until_healthy(url)
+    latencies, seconds = await load_test(url, args.model, args.requests, args.concurrency, args.contracts_per_request)
+    p50, p99 = np.percentile(latencies*1000, [50, 99])
+    print(f"{args.requests} requests ({args.requests*args.contracts_per_request} contracts) with {args.model} from {args.concurrency} clients")
+    print(f"throughput {args.requests/seconds:,.0f} requests/s, client latency p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+    metrics = json.loads((await AsyncHTTPClient().fetch(f"{url}/metrics")).body)
+    print("service metrics:", json.dumps({"batches": metrics["batches"], args.model: metrics["models"][args.model]}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--model", default="black_scholes", choices=["black_scholes", "binomial", "monte_carlo"])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--contracts-per-request", type=int, default=1)
+    parser.add_argument("--start-server", action="store_true", help="start a local pricing_service.py on the port of --url")
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        port = args.url.rstrip("/").rsplit(":", 1)[-1]
+        server = subprocess.Popen([sys.executable, "pricing_service.py", "--port", port], stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
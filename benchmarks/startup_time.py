@@ -0,0 +1,95 @@
+"""
+Startup time benchmark of the Streamlit app.
+Measures in fresh interpreters the cold import time of what GUI.py loads before rendering anything, then the extra
+time to load each model (its pricing module and the plotting libraries, imported when the model is first selected).
+With --render the app itself is run headless with streamlit.testing, timing the first render and a switch to each model
+(this needs streamlit installed and the market data of the ticker, downloaded or already in the cache).
+
+Run from the repository root:
+    python -m benchmarks.startup_time --render
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import pandas as pd
+
+STARTUP_MODULES = ["streamlit", "market_data", "historical_chart", "pnl_chart", "pricing_cache"]
+PLOTTING_MODULES = ["plotly.graph_objects", "matplotlib.pyplot", "pandas", "seaborn", "plotly.express"]
+MODEL_MODULES = {"Black-Scholes": ["black_scholes"], "Binomial": ["binomial"], "Monte Carlo": ["monte_carlo"],
+                 "Finite Difference": ["finite_difference"]}
+
+
+def import_time(modules, preloaded=(), repeat=3):
+    """
+    Best of repeat cold import times (seconds) of modules in a fresh interpreter where preloaded is already imported.
+    Modules that are not installed are skipped.
+    """
+    script = f"""
+import importlib, json, time
+for name in {list(preloaded)!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+start = time.perf_counter()
+for name in {list(modules)!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+print(json.dumps(time.perf_counter()-start))
+"""
+    timings = [json.loads(subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout)
+               for _ in range(repeat)]
+    return min(timings)
+
+
+def import_table(repeat=3):
+    """
+    Cold import time of the startup modules, and of each model on top of them
+    """
+    rows = [{"stage": "startup imports", "seconds": import_time(STARTUP_MODULES, repeat=repeat)}]
+    for model, modules in MODEL_MODULES.items():
+        rows.append({"stage": f"first {model} imports",
+                     "seconds": import_time(modules+PLOTTING_MODULES, preloaded=STARTUP_MODULES, repeat=repeat)})
+    return pd.DataFrame(rows)
+
+
+def render_table(script="GUI.py", timeout=300):
+    """
+    Wall time of the first render of the app and of a switch to each model, then of the same switches again
+    (served by the pricing cache)
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(script, default_timeout=timeout)
+    rows = []
+    start = time.perf_counter()
+    app.run()
+    rows.append({"stage": "first render", "seconds": time.perf_counter()-start})
+    for attempt in ("first", "cached"):
+        for model in MODEL_MODULES:
+            start = time.perf_counter()
+            app.radio[0].set_value(model).run()
+            rows.append({"stage": f"{attempt} switch to {model}", "seconds": time.perf_counter()-start})
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="cold imports to time, the best one being kept")
+    parser.add_argument("--render", action="store_true", help="also time the rendering of the app with streamlit.testing")
+    args = parser.parse_args()
+
+    tables = [import_table(args.repeat)]
+    if args.render:
+        tables.append(render_table())
+    print(pd.concat(tables).to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
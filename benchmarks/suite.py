@@ -0,0 +1,195 @@
+"""
+Benchmark suite with regression tracking for the pricing models and the price surfaces.
+
+Every case prices a grid of moneyness x maturity x volatility (for trees and Monte Carlo, for several numbers of
+steps and paths) and records its throughput in contracts per second and its largest error against the
+Black-Scholes closed form. Results are compared with a JSON baseline: the run fails (exit code 1) when a case is
+slower than the baseline by more than --threshold, or clearly less accurate than it.
+
+Baselines are machine specific, so none is committed; record one on the machine that runs the comparison:
+    python -m benchmarks.suite --update-baseline
+    python -m benchmarks.suite                      # compare against it
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import binomial
+import finite_difference
+import black_scholes
+import monte_carlo
+import visualization
+from pricing_grid import PricingGrid
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+MONEYNESS = [0.8, 0.9, 1.0, 1.1, 1.2]
+MATURITIES = [0.1, 0.5, 1.0, 3.0]
+VOLATILITIES = [0.1, 0.3, 0.6]
+SPOT_PRICE = 100.0
+RISK_FREE_RATE = 0.03
+
+
+def contract_grid(repeat=1):
+    """
+    Strikes, maturities, volatilities and option types of the moneyness x maturity x volatility grid (calls and puts),
+    tiled repeat times
+    """
+    moneyness, maturity, volatility, option_type = (values.ravel() for values in
+                                                    np.meshgrid(MONEYNESS, MATURITIES, VOLATILITIES, ["Call", "Put"], indexing="ij"))
+    strike_price = SPOT_PRICE/moneyness.astype(float)
+    return (np.tile(strike_price, repeat), np.tile(maturity.astype(float), repeat),
+            np.tile(volatility.astype(float), repeat), np.tile(option_type, repeat))
+
+
+def reference_prices(strike_price, time_to_maturity, volatility, option_type):
+    return black_scholes.black_scholes_pricing_batch(SPOT_PRICE, strike_price, RISK_FREE_RATE, time_to_maturity, volatility, option_type)
+
+
+def best_time(function, repeat):
+    """
+    Best wall time of repeat calls of function, and its last result
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter()-start)
+    return min(timings), result
+
+
+def benchmark_cases(quick=False):
+    """
+    name -> (function returning the prices, number of contracts, reference prices or None)
+    """
+    cases = {}
+    strike, maturity, vol, option_type = contract_grid()
+    reference = reference_prices(strike, maturity, vol, option_type)
+
+    def scalar_loop(pricer):
+        return lambda: np.array([pricer(K, T, sigma, kind) for K, T, sigma, kind in zip(strike, maturity, vol, option_type)])
+
+    cases["black_scholes_scalar"] = (scalar_loop(lambda K, T, sigma, kind: (black_scholes.black_scholes_pricing_call if kind == "Call"
+                                                                             else black_scholes.black_scholes_pricing_put)(SPOT_PRICE, K, RISK_FREE_RATE, T, sigma)),
+                                     strike.size, reference)
+    tiled = contract_grid(repeat=100 if quick else 2000)
+    cases["black_scholes_batch"] = (lambda: reference_prices(*tiled), tiled[0].size, reference_prices(*tiled))
+
+    for steps in ([50, 200] if quick else [50, 200, 1000]):
+        cases[f"binomial_scalar_{steps}_steps"] = (
+            scalar_loop(lambda K, T, sigma, kind, steps=steps: binomial.binomial_pricing(SPOT_PRICE, K, RISK_FREE_RATE, T, sigma, steps, kind)),
+            strike.size, reference)
+        for method in binomial.LATTICE_METHODS:
+            cases[f"binomial_batch_{method}_{steps}_steps"] = (
+                lambda steps=steps, method=method: binomial.binomial_pricing_batch(SPOT_PRICE, strike, RISK_FREE_RATE, maturity, vol, steps,
+                                                                                   option_type, method=method),
+                strike.size, reference)
+    cases["binomial_batch_american_200_steps"] = (
+        lambda: binomial.binomial_pricing_batch(SPOT_PRICE, strike, RISK_FREE_RATE, maturity, vol, 200, option_type, "American"),
+        strike.size, None)
+
+    for paths in ([10_000, 100_000] if quick else [10_000, 100_000, 1_000_000]):
+        cases[f"monte_carlo_scalar_{paths}_paths"] = (
+            scalar_loop(lambda K, T, sigma, kind, paths=paths: monte_carlo.monte_carlo_pricing(SPOT_PRICE, K, RISK_FREE_RATE, T, sigma, paths, kind, seed=7)),
+            strike.size, reference)
+        cases[f"monte_carlo_chunked_{paths}_paths"] = (
+            lambda paths=paths: monte_carlo.monte_carlo_pricing_chunked(SPOT_PRICE, strike, RISK_FREE_RATE, maturity, vol, paths, option_type, seed=7).price,
+            strike.size, reference)
+
+    grid = PricingGrid.build(RISK_FREE_RATE)
+    cases["pricing_grid_lookup"] = (lambda: grid.lookup(SPOT_PRICE, tiled[0], tiled[1], tiled[2], tiled[3]), tiled[0].size, reference_prices(*tiled))
+
+    pricing_function = lambda volatility, time_to_maturity: black_scholes.black_scholes_pricing_batch(SPOT_PRICE, 100.0, RISK_FREE_RATE,
+                                                                                                      time_to_maturity, volatility)
+    for resolution in ([50] if quick else [50, 200]):
+        surface_reference = visualization.compute_price_surface(0.1, 0.8, 0.1, 2.0, pricing_function, resolution, vectorized=True)[2]
+        cases[f"surface_vectorized_{resolution}"] = (
+            lambda resolution=resolution: visualization.compute_price_surface(0.1, 0.8, 0.1, 2.0, pricing_function, resolution, vectorized=True)[2],
+            resolution**2, surface_reference)
+    finite_difference_function = lambda volatility, time_to_maturity: finite_difference.finite_difference_pricing_batch(
+        SPOT_PRICE, 100.0, RISK_FREE_RATE, time_to_maturity, volatility)
+    cases["surface_finite_difference_50"] = (
+        lambda: visualization.compute_price_surface(0.1, 0.8, 0.1, 2.0, finite_difference_function, 50, vectorized=True)[2], 50**2,
+        visualization.compute_price_surface(0.1, 0.8, 0.1, 2.0, pricing_function, 50, vectorized=True)[2])
+    scalar_pricing_function = lambda volatility, time_to_maturity: black_scholes.black_scholes_pricing_call(SPOT_PRICE, 100.0, RISK_FREE_RATE,
+                                                                                                            time_to_maturity, volatility)
+    cases["surface_scalar_20"] = (lambda: visualization.compute_price_surface(0.1, 0.8, 0.1, 2.0, scalar_pricing_function, 20)[2], 20**2,
+                                  visualization.compute_price_surface(0.1, 0.8, 0.1, 2.0, pricing_function, 20, vectorized=True)[2])
+    return cases
+
+
+def run_suite(quick=False, repeat=3, only=None):
+    """
+    Throughput and accuracy of every case, as a DataFrame indexed by case name
+    """
+    rows = {}
+    for name, (function, contracts, reference) in benchmark_cases(quick).items():
+        if only is not None and only not in name:
+            continue
+        seconds, prices = best_time(function, repeat)
+        errors = np.abs(np.asarray(prices, dtype=float)-reference) if reference is not None else np.array([np.nan])
+        rows[name] = {"contracts_per_second": contracts/seconds, "seconds": seconds,
+                      "max_abs_error": float(np.max(errors)), "mean_abs_error": float(np.mean(errors))}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def save_baseline(results, path):
+    baseline = {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "machine": {"platform": platform.platform(), "processor": platform.processor(),
+                            "python": platform.python_version(), "numpy": np.__version__},
+                "cases": results.to_dict(orient="index")}
+    Path(path).write_text(json.dumps(baseline, indent=2))
+
+
+def compare_with_baseline(results, baseline, threshold=0.2, error_tolerance=2.0):
+    """
+    Regressions of results against a baseline: a case is slower when its throughput dropped by more than threshold,
+    and less accurate when its max error grew above error_tolerance times the baseline error (plus 1e-9 for exact cases).
+    Returns the results with the baseline columns and a status column.
+    """
+    base = pd.DataFrame.from_dict(baseline["cases"], orient="index")
+    table = results.join(base[["contracts_per_second", "max_abs_error"]], rsuffix="_baseline", how="left")
+    table["throughput_change"] = table["contracts_per_second"]/table["contracts_per_second_baseline"]-1
+    slower = table["throughput_change"] < -threshold
+    less_accurate = table["max_abs_error"] > error_tolerance*table["max_abs_error_baseline"]+1e-9
+    table["status"] = np.select([table["contracts_per_second_baseline"].isna(), slower & less_accurate, slower, less_accurate],
+                                ["new", "SLOWER, LESS ACCURATE", "SLOWER", "LESS ACCURATE"], "ok")
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="JSON baseline to compare with or update")
+    parser.add_argument("--update-baseline", action="store_true", help="record this run as the baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative throughput drop before failing")
+    parser.add_argument("--quick", action="store_true", help="smaller grid, for a fast check")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best one being kept")
+    parser.add_argument("--only", default=None, help="only run the cases whose name contains this string")
+    args = parser.parse_args()
+
+    results = run_suite(args.quick, args.repeat, args.only)
+    float_format = lambda x: f"{x:.4g}"
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(results.to_string(float_format=float_format))
+        print(f"baseline written to {args.baseline}")
+        return
+    if not args.baseline.is_file():
+        print(results.to_string(float_format=float_format))
+        print(f"no baseline at {args.baseline}, record one with --update-baseline")
+        return
+
+    table = compare_with_baseline(results, json.loads(args.baseline.read_text()), args.threshold)
+    print(table[["contracts_per_second", "throughput_change", "max_abs_error", "max_abs_error_baseline", "status"]].to_string(float_format=float_format))
+    regressions = table.index[~table["status"].isin(["ok", "new"])]
+    if len(regressions):
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
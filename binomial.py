@@ -1,26 +1,149 @@
 import numpy as np
-from math import exp
+from scipy.special import gammaln, xlogy
+from black_scholes import _is_call_option, d1_d2, black_scholes_pricing_batch
+import instrumentation
 
-def binomial_pricing(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, steps=100, option_type="Call"):
+LATTICE_METHODS = ["CRR", "Tian", "Leisen-Reimer", "BBSR"]
+
+def binomial_pricing(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, steps=100, option_type="Call", exercise_style="European", method="CRR"):
+    """
+    Calculates the price of a European (or American) option using the Binomial model.
+    By default the choice of the parameters u and d are made according to the Cox-Ross-Rubinstein (CRR) model,
+    see binomial_pricing_batch for the faster converging alternatives selectable with method.
+    """
+    return binomial_pricing_batch(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, steps, option_type, exercise_style, method)
+
+
+def _peizer_pratt_inversion(z, steps):
+    """
+    Peizer-Pratt method 2 inversion used by Leisen-Reimer to map a normal quantile to a binomial probability
+    """
+    return 0.5+np.sign(z)*0.5*np.sqrt(1-np.exp(-(z/(steps+1/3+0.1/(steps+1)))**2*(steps+1/6)))
+
+
+def _lattice_parameters(method, spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, steps):
+    """
+    Up factor, down factor and risk-neutral up probability of one tree step for the selected parameterization
+    """
+    dt = time_to_maturity/steps
+    growth = np.exp(risk_free_rate*dt)
+    if method in ("CRR", "BBSR"):
+        u = np.exp(volatility*np.sqrt(dt))    # Upward movement factor
+        d = 1/u    # Downward movement factor
+    elif method == "Tian":
+        # Matches the first three moments of the lognormal step
+        v = np.exp(volatility**2*dt)
+        root = np.sqrt(v**2+2*v-3)
+        u = 0.5*growth*v*(v+1+root)
+        d = 0.5*growth*v*(v+1-root)
+    elif method == "Leisen-Reimer":
+        # Centres the tree on the strike so the error decreases smoothly in the number of steps
+        d1, d2 = d1_d2(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility)
+        p = _peizer_pratt_inversion(d2, steps)
+        p1 = _peizer_pratt_inversion(d1, steps)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = growth*p1/p
+            d = (growth-p*u)/(1-p)
+        # Far from the strike the probabilities round to 0 or 1 (or are NaN) and the tree degenerates: use CRR there,
+        # which is then exact to rounding since the option is almost surely exercised (or not)
+        degenerate = ~((p > 0) & (p < 1) & (p1 > 0) & (p1 < 1))
+        if np.any(degenerate):
+            u_crr, d_crr, p_crr = _lattice_parameters("CRR", spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, steps)
+            u, d, p = (np.where(degenerate, crr, lr) for crr, lr in ((u_crr, u), (d_crr, d), (p_crr, p)))
+        return u, d, p
+    else:
+        raise ValueError(f"method must be one of {LATTICE_METHODS}")
+    p = (growth-d)/(u-d)    # Risk-neutral probability of an up move
+    return u, d, p
+
+
+def _tree_value(S, K, r, T, sigma, is_call, steps, u, d, p, american, smooth):
     """
-    Calculates the price of a European call option using the Binomial model. 
-    The choice of the parameters u and d are made according to the Cox-Ross-Rubinstein (CRR) model
+    Value of the trees of the (flattened) contracts. With smooth=True the last step is replaced by the
+    Black-Scholes price over one step, which removes the payoff kink from the lattice (BBS).
     """
-    dt = time_to_maturity/steps     # Length of each time step in years. Smaller dt means a finer (more accurate) tree.
-    u = exp(volatility*np.sqrt(dt))     # Upward movement factor. Represents the percentage increase in stock price after one time step if it moves up.
-    d = 1/u    # Upward movement factor. Represents the percentage increase in stock price after one time step if it moves up.
-    p = (exp(risk_free_rate*dt)-d)/(u-d)    # Upward movement factor. Represents the percentage increase in stock price after one time step if it moves up.
-    discount = exp(-risk_free_rate*dt)    # Upward movement factor. Represents the percentage increase in stock price after one time step if it moves up.
+    sign = np.where(is_call, 1.0, -1.0)    # +1 for calls, -1 for puts
+    discount = np.exp(-r*T/steps)
+    last = steps-1 if smooth else steps
 
-    # Stock prices and call payoffs at maturity - Time step N
-    prices = spot_price*d**np.arange(steps,-1,-1)*u**np.arange(0,steps+1,1)
-    if option_type == "Call":
-        values = np.maximum(prices-strike_price, 0)
+    # Stock prices at the last level of the tree, node j has j up moves
+    up_moves = np.arange(last+1).reshape(-1, 1)
+    stock = S*d**last*(u/d)**up_moves
+    if smooth:
+        values = black_scholes_pricing_batch(stock, K, r, T/steps, sigma, np.where(is_call, "Call", "Put"))
+        if american:
+            values = np.maximum(values, sign*(stock-K))
     else:
-        values = np.maximum(strike_price-prices,0)
+        values = np.maximum(sign*(stock-K), 0)
+
+    if not american:
+        # Probability of ending on node j is C(N, j) p^j (1-p)^(N-j), computed in logs to avoid overflow
+        log_probability = (gammaln(last+1)-gammaln(up_moves+1)-gammaln(last-up_moves+1)
+                           +xlogy(up_moves, p)+xlogy(last-up_moves, 1-p))
+        return discount**last*np.sum(np.exp(log_probability)*values, axis=0)
+
+    up_weight = discount*p
+    down_weight = discount*(1-p)
+    inverse_down = 1/d
+    signed_stock = sign*stock
+    signed_strike = sign*K
+    scratch = np.empty_like(values)
+
     # Backward induction through the tree
-    for i in range(steps-1, -1, -1):
-        values = discount*(p*values[1:]+(1-p)*values[:-1])
+    for i in range(last-1, -1, -1):
+        current, up, buffer = values[:i+1], values[1:i+2], scratch[:i+1]
+        np.multiply(up, up_weight, out=buffer)    # must be read before the in-place update below overwrites it
+        np.multiply(current, down_weight, out=current)
+        np.add(current, buffer, out=current)
+        # Early exercise: the stock on node j at time step i is the stock on node j at step i+1 divided by d
+        node_stock = signed_stock[:i+1]
+        np.multiply(node_stock, inverse_down, out=node_stock)
+        np.subtract(node_stock, signed_strike, out=buffer)
+        np.maximum(current, buffer, out=current)
 
     return values[0]
 
+
+def binomial_pricing_batch(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, steps=100, option_type="Call", exercise_style="European", method="CRR"):
+    """
+    Prices many contracts at once on binomial trees with the same number of steps.
+    Inputs are broadcast against each other like in black_scholes.black_scholes_pricing_batch.
+
+    European contracts are priced directly as the discounted expectation of the payoff under the binomial
+    distribution of the terminal node, which is exactly what the backward induction computes.
+    American contracts run the backward induction on a preallocated (nodes x contracts) buffer updated in place,
+    so every slice is contiguous and no array is allocated inside the loop; the option value at every node
+    is floored by its early-exercise value.
+
+    method selects the lattice:
+    - "CRR": Cox-Ross-Rubinstein, whose error oscillates with the number of steps
+    - "Tian": moment matching tree of Tian (1993)
+    - "Leisen-Reimer": strike-centred tree converging in O(1/steps^2); an even number of steps is increased by one
+    - "BBSR": CRR with the last step smoothed by Black-Scholes and two-point Richardson extrapolation
+      2*BBS(steps)-BBS(steps/2) (Broadie-Detemple)
+    """
+    if exercise_style not in ("European", "American"):
+        raise ValueError("exercise_style must be either 'European' or 'American'")
+    if method not in LATTICE_METHODS:
+        raise ValueError(f"method must be one of {LATTICE_METHODS}")
+    spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, is_call = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (spot_price, strike_price, risk_free_rate, time_to_maturity, volatility)),
+        _is_call_option(option_type))
+    shape = spot_price.shape
+    # One column per contract so the parameters broadcast along the nodes
+    S, K, r, T, sigma, is_call = (x.ravel() for x in (spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, is_call))
+    american = exercise_style == "American"
+
+    if method == "Leisen-Reimer" and steps % 2 == 0:
+        steps += 1
+
+    def value(number_of_steps):
+        u, d, p = _lattice_parameters(method, S, K, r, T, sigma, number_of_steps)
+        return _tree_value(S, K, r, T, sigma, is_call, number_of_steps, u, d, p, american, smooth=method == "BBSR")
+
+    if method == "BBSR":
+        price = 2*value(steps)-value(max(steps//2, 1))
+    else:
+        price = value(steps)
+    instrumentation.count("contracts.binomial", price.size)
+    return price.reshape(shape)[()]
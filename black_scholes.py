@@ -1,7 +1,8 @@
 from math import log, sqrt, exp
-from scipy.stats import norm
+from scipy.special import ndtr
 import numpy as np
 from functools import partial
+import instrumentation
 
 def black_scholes_pricing_call(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility):
     """
@@ -10,7 +11,7 @@ def black_scholes_pricing_call(spot_price, strike_price, risk_free_rate, time_to
     d1 = (log(spot_price/strike_price)+(risk_free_rate+(volatility**2)/2)*time_to_maturity)/(volatility*sqrt(time_to_maturity))
     d2 = d1-volatility*sqrt(time_to_maturity)
 
-    price = spot_price*norm.cdf(d1)-strike_price*exp(-risk_free_rate*time_to_maturity)*norm.cdf(d2)
+    price = spot_price*ndtr(d1)-strike_price*exp(-risk_free_rate*time_to_maturity)*ndtr(d2)
     return price 
 
 def black_scholes_pricing_put(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility):
@@ -20,5 +21,50 @@ def black_scholes_pricing_put(spot_price, strike_price, risk_free_rate, time_to_
     d1 = (log(spot_price/strike_price)+(risk_free_rate+(volatility**2)/2)*time_to_maturity)/(volatility*sqrt(time_to_maturity))
     d2 = d1-volatility*sqrt(time_to_maturity)
 
-    price =  -spot_price*norm.cdf(-d1)+strike_price*exp(-risk_free_rate*time_to_maturity)*norm.cdf(-d2)
+    price =  -spot_price*ndtr(-d1)+strike_price*exp(-risk_free_rate*time_to_maturity)*ndtr(-d2)
     return price
+
+
+def _is_call_option(option_type):
+    """
+    Convert an option type ("Call"/"Put", or an array of them) into a boolean array flagging the calls
+    """
+    option_type = np.asarray(option_type)
+    is_call = option_type == "Call"
+    if not np.all(is_call | (option_type == "Put")):
+        raise ValueError("option_type must be either 'Call' or 'Put'")
+    return is_call
+
+
+def d1_d2(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility):
+    """
+    Vectorized d1 and d2 terms of the Black-Scholes formula. All inputs are broadcast against each other.
+    """
+    volatility_scaled = volatility*np.sqrt(time_to_maturity)
+    d1 = (np.log(spot_price/strike_price)+(risk_free_rate+volatility**2/2)*time_to_maturity)/volatility_scaled
+    d2 = d1-volatility_scaled
+    return d1, d2
+
+
+def black_scholes_pricing_batch(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type="Call"):
+    """
+    Price a whole option chain in one pass. Every input can be a scalar or a NumPy array, arrays are broadcast
+    against each other, and option_type can be an array of "Call"/"Put" so calls and puts share d1, d2 and
+    the discount factors. Contracts at expiry (or with zero volatility) are worth their discounted intrinsic value.
+    """
+    spot_price, strike_price, risk_free_rate, time_to_maturity, volatility = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (spot_price, strike_price, risk_free_rate, time_to_maturity, volatility)))
+    sign = np.where(_is_call_option(option_type), 1.0, -1.0)    # +1 for calls, -1 for puts
+
+    discounted_strike = strike_price*np.exp(-risk_free_rate*time_to_maturity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1, d2 = d1_d2(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility)
+        # Call: S*N(d1)-K*exp(-rT)*N(d2)   Put: K*exp(-rT)*N(-d2)-S*N(-d1)
+        price = sign*(spot_price*ndtr(sign*d1)-discounted_strike*ndtr(sign*d2))
+
+    degenerate = volatility*np.sqrt(time_to_maturity) <= 0
+    if np.any(degenerate):
+        intrinsic = np.maximum(sign*(spot_price-discounted_strike), 0)
+        price = np.where(degenerate, intrinsic, price)
+    instrumentation.count("contracts.black_scholes", price.size)
+    return price[()]    # plain scalar when every input was a scalar
@@ -0,0 +1,263 @@
+"""
+Crank-Nicolson finite-difference pricer for the Black-Scholes PDE.
+
+The PDE is solved in log-spot on a grid shared by many strikes, the option values being held as a
+(nodes x contracts) array like the binomial buffers, so every time step is one tridiagonal solve for all strikes:
+one LAPACK banded solve when the contracts share the PDE coefficients, or a Thomas solve vectorized across the
+contracts otherwise. One solve gives the whole price-vs-spot slice with its grid Greeks, and the values at the
+spot for every maturity up to time_to_maturity.
+"""
+from dataclasses import dataclass
+import numpy as np
+from scipy.interpolate import CubicSpline
+from scipy.linalg import solve_banded
+from black_scholes import _is_call_option
+import instrumentation
+
+AMERICAN_METHODS = ["penalty", "psor"]
+
+
+def thomas_solve(lower, diagonal, upper, rhs):
+    """
+    Solve tridiagonal systems for every column of rhs (rows x systems) at once with the Thomas algorithm.
+    lower[i] multiplies x[i-1] and upper[i] x[i+1] in row i (lower[0] and upper[-1] are ignored); the coefficients
+    are broadcast against rhs, so systems can share them or each have their own.
+    """
+    lower, diagonal, upper = (np.broadcast_to(x, rhs.shape) for x in (lower, diagonal, upper))
+    rows = rhs.shape[0]
+    modified_upper = np.empty(rhs.shape)
+    solution = np.empty(rhs.shape)
+    modified_upper[0] = upper[0]/diagonal[0]
+    solution[0] = rhs[0]/diagonal[0]
+    for i in range(1, rows):
+        pivot = diagonal[i]-lower[i]*modified_upper[i-1]
+        modified_upper[i] = upper[i]/pivot
+        solution[i] = (rhs[i]-lower[i]*solution[i-1])/pivot
+    for i in range(rows-2, -1, -1):
+        solution[i] -= modified_upper[i]*solution[i+1]
+    return solution
+
+
+@dataclass
+class FiniteDifferenceResult:
+    """
+    Solution of one finite-difference solve: prices and grid Greeks at every spot node (rows) for every strike (columns).
+    spot_history holds the value at the spot node after every time step (row j is maturity maturities[j]),
+    when the solve was centred on a spot price.
+    """
+    spot_grid: np.ndarray
+    strike_price: np.ndarray
+    prices: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    theta: np.ndarray
+    maturities: np.ndarray = None
+    spot_history: np.ndarray = None
+
+    def at(self, spot_price, quantity="prices"):
+        """
+        Cubic spline interpolation in log-spot of prices (or delta, gamma, theta) at spot_price, for every strike
+        """
+        spline = CubicSpline(np.log(self.spot_grid), getattr(self, quantity), axis=0)
+        return spline(np.log(np.asarray(spot_price, dtype=float)))
+
+
+def _boundary_values(spot, strike_price, risk_free_rate, tau, is_call, american):
+    """
+    Dirichlet values at a boundary spot: deep in or out of the money prices, floored by exercise for American options
+    """
+    discounted_strike = strike_price*np.exp(-risk_free_rate*tau)
+    value = np.where(is_call, np.maximum(spot-discounted_strike, 0), np.maximum(discounted_strike-spot, 0))
+    if american:
+        value = np.maximum(value, np.where(is_call, spot-strike_price, strike_price-spot))
+    return value
+
+
+def finite_difference_solve(strike_price, risk_free_rate, time_to_maturity, volatility, option_type="Call", exercise_style="European",
+                            spot_price=None, spot_range=None, space_steps=300, time_steps=200, rannacher_steps=2,
+                            american_method="penalty", tolerance=1e-8, max_iterations=100, relaxation=1.2):
+    """
+    Solve the Black-Scholes PDE once for many strikes sharing the rate, the maturity and the grid.
+    strike_price is an array of strikes; volatility and option_type are scalars or one per strike.
+
+    The grid is uniform in log-spot over spot_range (by default the strikes and spot widened by 5 standard deviations)
+    with space_steps intervals, shifted so spot_price, when given, falls on a node. Time is stepped with Crank-Nicolson,
+    the first rannacher_steps steps being replaced by two fully implicit half steps each to damp the payoff kink.
+    American exercise uses american_method:
+    - "penalty": penalized Crank-Nicolson (Forsyth-Vetzal), a few Thomas solves per step with a large penalty
+      1/tolerance on the nodes below their exercise value
+    - "psor": projected SOR with the relaxation factor, iterated until updates are below tolerance
+    Returns a FiniteDifferenceResult.
+    """
+    if exercise_style not in ("European", "American"):
+        raise ValueError("exercise_style must be either 'European' or 'American'")
+    if american_method not in AMERICAN_METHODS:
+        raise ValueError(f"american_method must be one of {AMERICAN_METHODS}")
+    strike_price = np.atleast_1d(np.asarray(strike_price, dtype=float))
+    strike_price, volatility, is_call = np.broadcast_arrays(strike_price, np.asarray(volatility, dtype=float), _is_call_option(option_type))
+    american = exercise_style == "American"
+
+    # Log-spot grid, one row per node
+    if spot_range is None:
+        width = 5*volatility.max()*np.sqrt(time_to_maturity)
+        anchors = strike_price if spot_price is None else np.append(strike_price, spot_price)
+        spot_range = (anchors.min()*np.exp(-width), anchors.max()*np.exp(width))
+    x_min, x_max = np.log(spot_range[0]), np.log(spot_range[1])
+    dx = (x_max-x_min)/space_steps
+    spot_node = None
+    if spot_price is not None:
+        spot_node = int(round((np.log(spot_price)-x_min)/dx))
+        x_min = np.log(spot_price)-spot_node*dx
+    spot = np.exp(x_min+dx*np.arange(space_steps+1))[:, None]
+
+    # L V = lower*V[i-1] + diagonal*V[i] + upper*V[i+1], per strike when the volatilities differ
+    shared = np.all(volatility == volatility.flat[0])
+    sigma = volatility[:1] if shared else volatility
+    diffusion = 0.5*sigma**2/dx**2
+    drift = (risk_free_rate-0.5*sigma**2)/(2*dx)
+    lower, diagonal, upper = diffusion-drift, -2*diffusion-risk_free_rate, diffusion+drift
+
+    payoff = np.maximum(np.where(is_call, spot-strike_price, strike_price-spot), 0)
+    values = payoff.copy()
+    exercise = payoff[1:-1]
+
+    def step(values, tau, dt, theta):
+        """
+        Advance values from tau to tau+dt with the theta scheme (1: implicit, 0.5: Crank-Nicolson)
+        """
+        new = np.empty_like(values)
+        new[0] = _boundary_values(spot[0], strike_price, risk_free_rate, tau+dt, is_call, american)
+        new[-1] = _boundary_values(spot[-1], strike_price, risk_free_rate, tau+dt, is_call, american)
+        explicit = (1-theta)*dt
+        rhs = values[1:-1]+explicit*(lower*values[:-2]+diagonal*values[1:-1]+upper*values[2:])
+        rhs[0] += theta*dt*lower*new[0]
+        rhs[-1] += theta*dt*upper*new[-1]
+        a, b, c = -theta*dt*lower, 1-theta*dt*diagonal, -theta*dt*upper
+
+        if not american:
+            if shared:
+                banded = np.zeros((3, rhs.shape[0]))
+                banded[0, 1:], banded[1], banded[2, :-1] = c, b, a
+                new[1:-1] = solve_banded((1, 1), banded, rhs)
+            else:
+                new[1:-1] = thomas_solve(a, b, c, rhs)
+        elif american_method == "penalty":
+            interior = np.maximum(values[1:-1], exercise)
+            large = 1/tolerance
+            for _ in range(max_iterations):
+                penalty = np.where(interior < exercise, large, 0.0)
+                updated = thomas_solve(a, b+penalty, c, rhs+penalty*exercise)
+                converged = np.max(np.abs(updated-interior)/np.maximum(1, np.abs(updated))) < tolerance
+                interior = updated
+                if converged:
+                    break
+            new[1:-1] = np.maximum(interior, exercise)
+        else:
+            interior = np.maximum(values[1:-1].copy(), exercise)
+            a, b, c = (np.broadcast_to(x, interior.shape) for x in (a, b, c))
+            last = interior.shape[0]-1
+            for _ in range(max_iterations):
+                change = 0.0
+                for i in range(last+1):
+                    neighbours = (a[i]*interior[i-1] if i > 0 else 0)+(c[i]*interior[i+1] if i < last else 0)
+                    gauss_seidel = (rhs[i]-neighbours)/b[i]
+                    updated = np.maximum(exercise[i], interior[i]+relaxation*(gauss_seidel-interior[i]))
+                    change = max(change, np.max(np.abs(updated-interior[i])))
+                    interior[i] = updated
+                if change < tolerance:
+                    break
+            new[1:-1] = interior
+        return new
+
+    dt = time_to_maturity/time_steps
+    history = [values[spot_node].copy()] if spot_node is not None else None
+    previous = values
+    tau = 0.0
+    for n in range(time_steps):
+        previous = values
+        if n < rannacher_steps:
+            values = step(step(values, tau, dt/2, 1.0), tau+dt/2, dt/2, 1.0)
+        else:
+            values = step(values, tau, dt, 0.5)
+        tau += dt
+        if history is not None:
+            history.append(values[spot_node].copy())
+
+    # Grid Greeks from the last slice, in spot terms (derivatives in log-spot divided by S and S^2)
+    first = np.gradient(values, dx, axis=0)
+    second = np.gradient(first, dx, axis=0)
+    delta = first/spot
+    gamma = (second-first)/spot**2
+    theta = -(values-previous)/dt    # calendar time decay, per year
+
+    return FiniteDifferenceResult(spot_grid=spot.ravel(), strike_price=strike_price, prices=values, delta=delta, gamma=gamma, theta=theta,
+                                  maturities=None if history is None else dt*np.arange(time_steps+1),
+                                  spot_history=None if history is None else np.array(history))
+
+
+def _maturity_buckets(maturities, maturity_ratio):
+    """
+    Bucket index of each (positive) maturity: a bucket starts at its shortest maturity and holds the maturities
+    up to maturity_ratio times it
+    """
+    starts = []
+    for maturity in np.unique(maturities):
+        if not starts or maturity > maturity_ratio*starts[-1]:
+            starts.append(maturity)
+    return np.searchsorted(starts, maturities, side="right")-1
+
+
+def finite_difference_pricing_batch(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type="Call",
+                                    exercise_style="European", space_steps=300, time_steps=200, maturity_ratio=4.0):
+    """
+    Price many contracts with the finite-difference engine. Inputs are broadcast against each other like in
+    black_scholes.black_scholes_pricing_batch. Contracts sharing spot, rate, volatility and option type are priced
+    together: every strike is a column of the same grid, and every maturity is read (linearly interpolated in time)
+    from the values at the spot after each time step of a solve run to a longer maturity.
+
+    A grid sized for a long maturity is too coarse for a much shorter one, both in spot (it spans the long maturity's
+    range) and in time, so the maturities are split in buckets spanning at most a factor maturity_ratio, each with
+    its own solve: every maturity then gets at least time_steps/maturity_ratio time steps and a spot grid at most
+    sqrt(maturity_ratio) times wider than it needs. A volatility x maturity surface costs one solve per volatility
+    and bucket.
+    """
+    spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, is_call = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (spot_price, strike_price, risk_free_rate, time_to_maturity, volatility)),
+        _is_call_option(option_type))
+    shape = spot_price.shape
+    S, K, r, T, sigma, is_call = (x.ravel() for x in (spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, is_call))
+    # Expired contracts are worth their intrinsic value
+    prices = np.maximum(np.where(is_call, S-K, K-S), 0)
+
+    live = T > 0
+    groups, group_of = np.unique(np.stack([S[live], r[live], sigma[live], is_call[live]]), axis=1, return_inverse=True)
+    group_of = group_of.ravel()
+    solves = 0
+    for group, (spot, rate, vol, call) in enumerate(groups.T):
+        group_members = np.flatnonzero(live)[group_of == group]
+        bucket_of = _maturity_buckets(T[group_members], maturity_ratio)
+        for bucket in np.unique(bucket_of):
+            members = group_members[bucket_of == bucket]
+            strikes, column = np.unique(K[members], return_inverse=True)
+            longest = T[members].max()
+            result = finite_difference_solve(strikes, rate, longest, vol, "Call" if call else "Put", exercise_style, spot_price=spot,
+                                             space_steps=space_steps, time_steps=time_steps)
+            solves += 1
+            # Linear interpolation between the time levels around each maturity
+            position = T[members]/(longest/time_steps)
+            below = np.minimum(np.floor(position).astype(int), time_steps-1)
+            weight = position-below
+            column = column.ravel()
+            prices[members] = (1-weight)*result.spot_history[below, column]+weight*result.spot_history[below+1, column]
+    instrumentation.count("contracts.finite_difference", prices.size)
+    instrumentation.count("solves.finite_difference", solves)
+    return prices.reshape(shape)[()]
+
+
+def finite_difference_pricing(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type="Call",
+                              exercise_style="European", space_steps=300, time_steps=200):
+    """
+    Price of a single European or American option with the Crank-Nicolson finite-difference engine
+    """
+    return float(finite_difference_pricing_batch(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility,
+                                                 option_type, exercise_style, space_steps, time_steps))
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+from black_scholes import d1_d2, _is_call_option
+
+GREEK_COLUMNS = ["price", "delta", "gamma", "vega", "theta", "rho", "vanna", "volga"]
+PORTFOLIO_COLUMNS = ["spot_price", "strike_price", "risk_free_rate", "time_to_maturity", "volatility", "option_type"]
+
+
+def black_scholes_greeks(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type="Call"):
+    """
+    Compute the Black-Scholes price and Greeks of many contracts in a single vectorized pass.
+    Inputs are broadcast against each other like in black_scholes.black_scholes_pricing_batch.
+    d1, d2, the normal pdf/cdf and the discount factor are computed once and reused by every Greek.
+    Units: vega, vanna and volga are per 1.00 change in volatility, theta is per year and rho is per 1.00 change in rate.
+    Contracts at expiry (or with zero volatility) are valued at their discounted intrinsic value like in the batch pricer:
+    delta is a 1/0 (-1/0 for puts) step on moneyness, gamma, vega, vanna and volga are 0, expired contracts have no
+    theta or rho, and zero-volatility ones only keep the carry of the discounted strike in theta and rho.
+    Returns a DataFrame with one row per contract and the columns of GREEK_COLUMNS.
+    """
+    spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, is_call = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (spot_price, strike_price, risk_free_rate, time_to_maturity, volatility)),
+        _is_call_option(option_type))
+    sign = np.where(is_call, 1.0, -1.0)    # +1 for calls, -1 for puts
+
+    sqrt_time = np.sqrt(time_to_maturity)
+    discounted_strike = strike_price*np.exp(-risk_free_rate*time_to_maturity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1, d2 = d1_d2(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility)
+        pdf_d1 = np.exp(-d1**2/2)/np.sqrt(2*np.pi)
+        cdf_d1 = ndtr(sign*d1)
+        cdf_d2 = ndtr(sign*d2)
+
+        vega = spot_price*pdf_d1*sqrt_time
+        greeks = {
+            "price": sign*(spot_price*cdf_d1-discounted_strike*cdf_d2),
+            "delta": sign*cdf_d1,
+            "gamma": pdf_d1/(spot_price*volatility*sqrt_time),
+            "vega": vega,
+            "theta": -spot_price*pdf_d1*volatility/(2*sqrt_time)-sign*risk_free_rate*discounted_strike*cdf_d2,
+            "rho": sign*time_to_maturity*discounted_strike*cdf_d2,
+            "vanna": -pdf_d1*d2/volatility,
+            "volga": vega*d1*d2/volatility,
+        }
+
+    degenerate = volatility*sqrt_time <= 0
+    if np.any(degenerate):
+        in_the_money = (sign*(spot_price-discounted_strike) > 0).astype(float)
+        limits = {
+            "price": np.maximum(sign*(spot_price-discounted_strike), 0),
+            "delta": sign*in_the_money,
+            "theta": np.where(time_to_maturity > 0, -sign*risk_free_rate*discounted_strike*in_the_money, 0.0),
+            "rho": sign*time_to_maturity*discounted_strike*in_the_money,
+        }
+        for name in GREEK_COLUMNS:
+            greeks[name] = np.where(degenerate, limits.get(name, 0.0), greeks[name])
+
+    return pd.DataFrame({name: np.ravel(values) for name, values in greeks.items()}, columns=GREEK_COLUMNS)
+
+
+def portfolio_greeks(portfolio):
+    """
+    Price and compute Greeks for every position of a portfolio DataFrame.
+    The portfolio needs the PORTFOLIO_COLUMNS; an optional "quantity" column scales each position,
+    and the totals of the whole book are available with .sum() on the returned frame.
+    """
+    missing = [column for column in PORTFOLIO_COLUMNS if column not in portfolio.columns]
+    if missing:
+        raise ValueError(f"portfolio is missing the columns {missing}")
+
+    greeks = black_scholes_greeks(*(portfolio[column].to_numpy() for column in PORTFOLIO_COLUMNS))
+    greeks.index = portfolio.index
+    if "quantity" in portfolio.columns:
+        greeks = greeks.mul(portfolio["quantity"].to_numpy(), axis=0)
+    return greeks
@@ -1,10 +1,11 @@
-import plotly.express as px
 import yfinance_data
 
 def plot_historical_price(price, display_name):
     """
     Create and return an interactive Plotly figure of historical stock price
     """
+    import plotly.express as px
+
     fig = px.line(
         price,
         x=price.index,
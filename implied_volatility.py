@@ -0,0 +1,104 @@
+import numpy as np
+from scipy.special import ndtr
+from black_scholes import _is_call_option
+
+
+def _price_and_vega(spot_price, discounted_strike, time_to_maturity, volatility, sign):
+    """
+    Black-Scholes price (sign = +1 call, -1 put) and vega written with the discounted strike, so the rate drops out
+    """
+    volatility_scaled = volatility*np.sqrt(time_to_maturity)
+    d1 = np.log(spot_price/discounted_strike)/volatility_scaled+volatility_scaled/2
+    d2 = d1-volatility_scaled
+    price = sign*(spot_price*ndtr(sign*d1)-discounted_strike*ndtr(sign*d2))
+    vega = spot_price*np.exp(-d1**2/2)/np.sqrt(2*np.pi)*np.sqrt(time_to_maturity)
+    return price, vega
+
+
+def _initial_guess(call_price, spot_price, discounted_strike, time_to_maturity):
+    """
+    Corrado-Miller rational approximation of the implied volatility, falling back to
+    the Manaster-Koehler guess where the approximation has no real solution
+    """
+    half_moneyness = (spot_price-discounted_strike)/2
+    inner = (call_price-half_moneyness)**2-(spot_price-discounted_strike)**2/np.pi
+    corrado_miller = np.sqrt(2*np.pi/time_to_maturity)/(spot_price+discounted_strike)*(call_price-half_moneyness+np.sqrt(np.maximum(inner, 0)))
+    manaster_koehler = np.sqrt(2*np.abs(np.log(spot_price/discounted_strike))/time_to_maturity)
+    guess = np.where(corrado_miller > 0, corrado_miller, manaster_koehler)
+    return np.clip(guess, 0.01, 3.0)
+
+
+def implied_volatility(option_price, spot_price, strike_price, risk_free_rate, time_to_maturity, option_type="Call",
+                       tolerance=1e-10, max_iterations=100, volatility_bounds=(1e-6, 10.0)):
+    """
+    Back out Black-Scholes implied volatilities for a whole chain at once.
+    Inputs are broadcast against each other like in black_scholes.black_scholes_pricing_batch.
+
+    Every contract is inverted through its out-of-the-money equivalent (put-call parity), which is much better
+    conditioned for deep in-the-money quotes. Starting from the Corrado-Miller rational guess, a vectorized Newton step
+    is taken on the contracts that have not converged yet; whenever that step leaves the current volatility bracket
+    (or vega is too small to trust) a bisection step is taken instead, so every contract inside the no-arbitrage
+    bounds converges.
+
+    Returns (volatility, converged): the implied volatilities (NaN where no solution exists: a price outside
+    the no-arbitrage bounds, or one needing a volatility outside volatility_bounds) and a boolean array with the
+    per-contract convergence status, True only where the model price matches the quote to tolerance (relative).
+    """
+    option_price, spot_price, strike_price, risk_free_rate, time_to_maturity, is_call = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (option_price, spot_price, strike_price, risk_free_rate, time_to_maturity)),
+        _is_call_option(option_type))
+    shape = option_price.shape
+    option_price, spot_price, risk_free_rate, time_to_maturity, is_call = (
+        x.ravel() for x in (option_price, spot_price, risk_free_rate, time_to_maturity, is_call))
+    discounted_strike = strike_price.ravel()*np.exp(-risk_free_rate*time_to_maturity)
+
+    # Convert every quote into the price of the out-of-the-money option of the same strike
+    call_price = np.where(is_call, option_price, option_price+spot_price-discounted_strike)
+    otm_is_call = discounted_strike >= spot_price
+    otm_price = np.where(otm_is_call, call_price, call_price-spot_price+discounted_strike)
+    sign = np.where(otm_is_call, 1.0, -1.0)
+
+    # A solution exists only strictly between intrinsic value (zero for OTM options) and the upper bound
+    upper_bound = np.where(otm_is_call, spot_price, discounted_strike)
+    solvable = (otm_price > 0) & (otm_price < upper_bound) & (time_to_maturity > 0)
+
+    volatility = np.full(option_price.size, np.nan)
+    converged = np.zeros(option_price.size, dtype=bool)
+    active = np.flatnonzero(solvable)
+
+    S, X, T, target, s = (x[active] for x in (spot_price, discounted_strike, time_to_maturity, otm_price, sign))
+    # Nor is there one when the price needs a volatility outside volatility_bounds
+    lowest_price, _ = _price_and_vega(S, X, T, volatility_bounds[0], s)
+    highest_price, _ = _price_and_vega(S, X, T, volatility_bounds[1], s)
+    reachable = (target >= lowest_price) & (target <= highest_price)
+    active, S, X, T, target, s = (x[reachable] for x in (active, S, X, T, target, s))
+    sigma = _initial_guess(call_price[active], S, X, T)
+    lower = np.full(active.size, volatility_bounds[0])
+    upper = np.full(active.size, volatility_bounds[1])
+
+    for _ in range(max_iterations):
+        if active.size == 0:
+            break
+        price, vega = _price_and_vega(S, X, T, sigma, s)
+        difference = price-target
+
+        done = np.abs(difference) <= tolerance*target
+        volatility[active[done]] = sigma[done]
+        converged[active[done]] = True
+        keep = ~done
+        active, S, X, T, target, s, sigma, lower, upper, difference, vega = (
+            x[keep] for x in (active, S, X, T, target, s, sigma, lower, upper, difference, vega))
+
+        # Price is increasing in volatility, so the sign of the error tightens the bracket
+        too_high = difference > 0
+        upper = np.where(too_high, sigma, upper)
+        lower = np.where(too_high, lower, sigma)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = sigma-difference/vega
+        use_newton = (vega > 1e-12*S) & (newton > lower) & (newton < upper)
+        sigma = np.where(use_newton, newton, (lower+upper)/2)
+
+    # Contracts that ran out of iterations keep their best estimate but are flagged as not converged
+    volatility[active] = sigma
+    return volatility.reshape(shape)[()], converged.reshape(shape)[()]
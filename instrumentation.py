@@ -0,0 +1,209 @@
+"""
+Opt-in timing spans, counters and a sampling profiler for finding where the time of the app goes.
+
+Disabled by default: span() then returns a shared do-nothing context manager and count() returns at once, so the
+instrumented hot paths only pay a global lookup. Enable with the environment variable OPTION_PRICER_INSTRUMENTATION=1
+or instrumentation.enable().
+
+    with instrumentation.span("surface.build"):
+        ...
+    instrumentation.count("contracts.black_scholes", 1000)
+    instrumentation.export()    # machine readable summary, json.dumps-able
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+_enabled = os.environ.get("OPTION_PRICER_INSTRUMENTATION", "0").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_spans = {}                        # name -> [count, total seconds, max seconds]
+_counters = Counter()
+_events = deque(maxlen=10_000)     # (name, start, seconds, thread) of the latest spans
+_origin = time.perf_counter()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """
+    Forget every recorded span, counter and event
+    """
+    global _origin
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _events.clear()
+        _origin = time.perf_counter()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter()-self.start
+        with _lock:
+            totals = _spans.get(self.name)
+            if totals is None:
+                _spans[self.name] = [1, seconds, seconds]
+            else:
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] = max(totals[2], seconds)
+            _events.append((self.name, self.start-_origin, seconds, threading.current_thread().name))
+        return False
+
+
+def span(name):
+    """
+    Context manager timing its block under name (nothing is done when instrumentation is disabled)
+    """
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name):
+    """
+    Decorator timing every call of the function under name
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """
+    Add value to the counter name
+    """
+    if _enabled:
+        with _lock:
+            _counters[name] += value
+
+
+def export(events=False):
+    """
+    Summary of the spans (count, total, mean and max in milliseconds) and counters, optionally with the latest span events
+    """
+    with _lock:
+        summary = {"enabled": _enabled,
+                   "spans": {name: {"count": calls, "total_ms": total*1000, "mean_ms": total/calls*1000, "max_ms": longest*1000}
+                             for name, (calls, total, longest) in sorted(_spans.items())},
+                   "counters": dict(sorted(_counters.items()))}
+        if events:
+            summary["events"] = [{"name": name, "start_ms": start*1000, "duration_ms": seconds*1000, "thread": thread}
+                                 for name, start, seconds, thread in _events]
+    return summary
+
+
+def span_table():
+    """
+    The spans of export() as a DataFrame sorted by total time
+    """
+    import pandas as pd
+    table = pd.DataFrame.from_dict(export()["spans"], orient="index", columns=["count", "total_ms", "mean_ms", "max_ms"])
+    return table.sort_values("total_ms", ascending=False)
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler of one thread (the calling one by default): a background thread records the stack of the
+    profiled thread every interval seconds with sys._current_frames(), without slowing the profiled code down otherwise.
+    Meant for capturing a single rerun of the app:
+
+        with SamplingProfiler() as profiler:
+            ...
+        profiler.table()
+    """
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.self_samples = Counter()     # samples with the function on top of the stack
+        self.total_samples = Counter()    # samples with the function anywhere in the stack
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            functions = []
+            while frame is not None:
+                code = frame.f_code
+                functions.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples += 1
+            self.self_samples[functions[0]] += 1
+            self.total_samples.update(set(functions))    # recursive functions count once per sample
+
+    def table(self, top=30):
+        """
+        The top functions by samples including callees, with their share of the samples
+        """
+        import pandas as pd
+        table = pd.DataFrame({"self_samples": pd.Series(self.self_samples, dtype=int),
+                              "total_samples": pd.Series(self.total_samples, dtype=int)}).fillna(0).astype(int)
+        table["self_percent"] = 100*table["self_samples"]/max(self.samples, 1)
+        table["total_percent"] = 100*table["total_samples"]/max(self.samples, 1)
+        return table.sort_values(["total_samples", "self_samples"], ascending=False).head(top)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
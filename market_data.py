@@ -0,0 +1,263 @@
+import json
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import pandas as pd
+from cachetools import TTLCache
+import instrumentation
+import yfinance_data
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("OPTION_PRICER_CACHE_DIR", Path.home()/".cache"/"option_pricer"))
+DEFAULT_TTL = 300    # seconds before market data is fetched again
+
+_PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1), "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1), "3mo": pd.DateOffset(months=3), "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1), "2y": pd.DateOffset(years=2), "5y": pd.DateOffset(years=5), "10y": pd.DateOffset(years=10),
+}
+
+# In-memory LRU with time to live, shared by every CachedStockData of the process so it survives Streamlit reruns
+_memory_cache = TTLCache(maxsize=256, ttl=DEFAULT_TTL)
+
+
+def period_start(period, end):
+    """
+    First date covered by a yfinance period string ('1mo', '1y', 'ytd', 'max'...) ending at end,
+    None for 'max' which has no lower bound
+    """
+    if period == "max":
+        return None
+    if period == "ytd":
+        return end.normalize().replace(month=1, day=1)
+    if period not in _PERIOD_OFFSETS:
+        raise ValueError(f"unsupported period '{period}'")
+    return end.normalize()-_PERIOD_OFFSETS[period]
+
+
+def covers(long_period, period):
+    """
+    True when the history of long_period contains the whole history of period
+    """
+    now = pd.Timestamp.now()
+    long_start, start = period_start(long_period, now), period_start(period, now)
+    return long_start is None or (start is not None and long_start <= start)
+
+
+class HistoryStore:
+    """
+    On-disk Parquet store of price histories keyed by ticker and period: <cache_dir>/<TICKER>/<period>.parquet,
+    plus the ticker info as <cache_dir>/<TICKER>/info.json and the incrementally updated daily history
+    as <cache_dir>/<TICKER>/daily.parquet (with the period it covers in daily.json).
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, ticker, name):
+        return self.cache_dir/ticker.upper()/name
+
+    def save(self, ticker, period, history):
+        """
+        Store the history of ticker for period, replacing the file atomically
+        """
+        path = self._path(ticker, f"{period}.parquet")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix(".tmp")
+        history.to_parquet(temporary_path)
+        os.replace(temporary_path, path)
+
+    def _write_json(self, ticker, name, content):
+        """
+        Write a JSON file of ticker atomically, like save does for histories
+        """
+        path = self._path(ticker, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix(".json.tmp")
+        temporary_path.write_text(json.dumps(content, default=str))
+        os.replace(temporary_path, path)
+
+    def load(self, ticker, period, max_age=None):
+        """
+        History of the shortest stored period covering period, as (stored period, history),
+        or (None, None) when nothing suitable (or nothing younger than max_age seconds) is stored
+        """
+        directory = self.cache_dir/ticker.upper()
+        if not directory.is_dir():
+            return None, None
+        now = pd.Timestamp.now()
+        candidates = []
+        for path in directory.glob("*.parquet"):
+            stored_period = path.stem
+            if stored_period not in _PERIOD_OFFSETS and stored_period not in ("ytd", "max"):
+                continue
+            if max_age is not None and time.time()-path.stat().st_mtime > max_age:
+                continue
+            if covers(stored_period, period):
+                candidates.append((period_start(stored_period, now), stored_period, path))
+        if not candidates:
+            return None, None
+        # Latest start, i.e. the least data to read ('max' starts first)
+        _, stored_period, path = max(candidates, key=lambda candidate: pd.Timestamp.min if candidate[0] is None else candidate[0])
+        return stored_period, pd.read_parquet(path)
+
+    def save_daily(self, ticker, period, history):
+        """
+        Store the incrementally updated daily history of ticker, which covers at least period.
+        The history is replaced before its period, so an interrupted save never claims more than the file holds.
+        """
+        self.save(ticker, "daily", history)
+        self._write_json(ticker, "daily.json", {"period": period})
+
+    def load_daily(self, ticker):
+        """
+        (period covered, history) of the incrementally updated daily history, or (None, None)
+        """
+        path = self._path(ticker, "daily.parquet")
+        if not path.is_file() or not self._path(ticker, "daily.json").is_file():
+            return None, None
+        period = json.loads(self._path(ticker, "daily.json").read_text())["period"]
+        return period, pd.read_parquet(path)
+
+    def save_info(self, ticker, info):
+        self._write_json(ticker, "info.json", info)
+
+    def load_info(self, ticker):
+        path = self._path(ticker, "info.json")
+        return json.loads(path.read_text()) if path.is_file() else None
+
+
+class CachedStockData(yfinance_data.stockData):
+    """
+    stockData with a caching layer, meant for the Streamlit app which asks for the same data on every rerun.
+
+    The history of the longest period needed is fetched once (at least prefetch_period, so the spot price,
+    the volatility and the default chart share one download) and shorter periods are sliced from it.
+    Results are kept in an in-memory LRU with time to live and persisted in a HistoryStore; a stored history younger
+    than ttl is used without any network call, and any stored history is used when fetching fails (offline,
+    rate limited).
+    data can replace the yfinance Ticker by any object with history(period=...) and info, e.g. a local stand-in.
+    """
+    def __init__(self, ticker, store=None, memory_cache=None, ttl=DEFAULT_TTL, prefetch_period="1y", data=None):
+        super().__init__(ticker)
+        if data is not None:
+            self.data = data
+        self.store = store if store is not None else HistoryStore()
+        self.memory_cache = memory_cache if memory_cache is not None else _memory_cache
+        self.ttl = ttl
+        self.prefetch_period = prefetch_period
+
+    def history(self, period="1y"):
+        """
+        Get the daily price history for the selected period, from the caches whenever possible
+        """
+        key = (self.ticker, "history")
+        cached = self.memory_cache.get(key)
+        if cached is None or not covers(cached[0], period):
+            instrumentation.count("data.memory_cache_misses")
+            cached = self._load_history(period)
+            self.memory_cache[key] = cached
+        stored_period, history = cached
+        if history.empty or stored_period == period or period == "max":
+            return history
+        return history[history.index >= period_start(period, history.index[-1])]
+
+    def _load_history(self, period):
+        """
+        (period, history) of at least prefetch_period, from a fresh stored file, the network or, failing that, any stored file
+        """
+        if covers(self.prefetch_period, period):
+            period = self.prefetch_period
+        stored_period, history = self.store.load(self.ticker, period, max_age=self.ttl)
+        if history is not None:
+            return stored_period, history
+        try:
+            with instrumentation.span("data.download"):
+                history = self.data.history(period=period)
+            if history.empty:
+                raise ValueError(f"no price history returned for {self.ticker}")
+        except Exception:
+            stored_period, history = self.store.load(self.ticker, period)
+            if history is None:
+                raise
+            return stored_period, history
+        self.store.save(self.ticker, period, history)
+        return period, history
+
+    def get_display_name(self):
+        """
+        Get the display name of the stock, from the stored info when there is one since it does not change
+        """
+        key = (self.ticker, "display_name")
+        if key not in self.memory_cache:
+            info = self.store.load_info(self.ticker)
+            if info is None:
+                with instrumentation.span("data.download"):
+                    info = self.data.info
+                self.store.save_info(self.ticker, {"displayName": info.get("displayName", self.ticker)})
+            self.memory_cache[key] = info.get("displayName", self.ticker)
+        return self.memory_cache[key]
+
+
+def _yfinance_ticker(ticker):
+    import yfinance as yf    # only imported when something has to be downloaded
+    return yf.Ticker(ticker)
+
+
+def update_history(ticker, period="1y", store=None, ticker_factory=_yfinance_ticker, full_refresh=False):
+    """
+    Bring the stored daily history of ticker up to date and return it (at least period long).
+    Only the bars since the last stored date are downloaded and appended; the last stored bar is downloaded again
+    since it may have been an intraday snapshot. The whole period is downloaded when nothing covering it is stored,
+    or with full_refresh=True (needed after a split or dividend, which rescale the adjusted history).
+    """
+    store = store if store is not None else HistoryStore()
+    stored_period, history = store.load_daily(ticker)
+    data = ticker_factory(ticker.upper())
+
+    if full_refresh or history is None or history.empty or not covers(stored_period, period):
+        history = data.history(period=period)
+        stored_period = period
+    else:
+        last_date = history.index[-1]
+        new_bars = data.history(start=last_date.strftime("%Y-%m-%d"))
+        history = pd.concat([history[history.index < last_date], new_bars])
+        history = history[~history.index.duplicated(keep="last")]
+
+    if history.empty:
+        raise ValueError(f"no price history returned for {ticker}")
+    store.save_daily(ticker, stored_period, history)
+    return history
+
+
+def load_close_prices(tickers, period="1y", max_workers=8, store=None, ticker_factory=_yfinance_ticker, full_refresh=False):
+    """
+    Close prices of many tickers as one DataFrame aligned on dates (one column per ticker, NaN where a ticker
+    has no bar), ready for the vectorized volatility and pricing code (.to_numpy() gives the matrix).
+    Tickers are updated concurrently on a pool of at most max_workers threads with update_history, so repeated runs
+    only download the new bars. A ticker that cannot be downloaded falls back to its stored history, and is left
+    out with a warning when there is none.
+    """
+    store = store if store is not None else HistoryStore()
+    tickers = [ticker.upper() for ticker in tickers]
+
+    def close_prices(ticker):
+        try:
+            history = update_history(ticker, period, store, ticker_factory, full_refresh)
+        except Exception as error:
+            _, history = store.load_daily(ticker)
+            if history is None:
+                warnings.warn(f"skipping {ticker}: {error}")
+                return None
+        return history["Close"]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        closes = dict(zip(tickers, executor.map(close_prices, tickers)))
+
+    closes = {ticker: close for ticker, close in closes.items() if close is not None}
+    if not closes:
+        return pd.DataFrame(columns=tickers, dtype=float)
+    prices = pd.concat(closes, axis=1).sort_index()
+    if period == "max":
+        return prices
+    return prices[prices.index >= period_start(period, prices.index[-1])]
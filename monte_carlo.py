@@ -1,5 +1,12 @@
 import numpy as np
+import pandas as pd
 import scipy.stats as stats
+from scipy.stats import qmc
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from scipy.special import ndtr, ndtri
+from black_scholes import _is_call_option, d1_d2
+import instrumentation
 
 def delta_calculator(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type='Call'):
     """
@@ -12,43 +19,339 @@ def delta_calculator(spot_price, strike_price, risk_free_rate, time_to_maturity,
         delta = -stats.norm.cdf(-d1,0,1)
     return delta
 
-def monte_carlo_pricing(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, number_of_simulation=10000, option_type="Call"):
+def monte_carlo_pricing(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, number_of_simulation=10000, option_type="Call",
+                        variance_reduction="delta_hedge", seed=None):
     """
-    Monte Carlo simulation to price a call option. Variance reduction is applied using the control variates method.
+    Monte Carlo simulation to price a call or put option. By default variance reduction is applied using the control variates
+    method with a one-step delta hedge, see monte_carlo_pricing_chunked for the other variance_reduction methods.
     """
+    if option_type not in ("Call", "Put"):
+        raise ValueError("option_type must be either 'Call' or Put'")
+    return monte_carlo_pricing_chunked(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, number_of_simulation,
+                                       option_type, seed=seed, variance_reduction=variance_reduction).price
+
+
+@dataclass
+class MonteCarloResult:
+    """
+    Monte Carlo estimate with its statistical error. Fields are scalars for a single contract, arrays for a batch.
+    """
+    price: np.ndarray
+    standard_error: np.ndarray
+    confidence_interval: tuple
+    number_of_simulation: int
+
+
+class RunningStatistics:
+    """
+    Running count, mean and sum of squared deviations of samples, one entry per contract, optionally together with
+    a control variate of known zero mean and its co-moment with the samples.
+    Batches are combined with the parallel update of Chan et al., which stays accurate over billions of
+    samples and lets partial results computed elsewhere (other chunks, other processes) be merged exactly.
+    """
+    def __init__(self, shape=(), with_control=False):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.with_control = with_control
+        if with_control:
+            self.control_mean = np.zeros(shape)
+            self.control_m2 = np.zeros(shape)
+            self.co_moment = np.zeros(shape)
+
+    def update(self, samples, controls=None):
+        """
+        Add a batch of samples (and of the matching controls), axis 0 running over the samples
+        """
+        batch = RunningStatistics(with_control=self.with_control)
+        batch.count = samples.shape[0]
+        batch.mean = samples.mean(axis=0)
+        deviations = samples-batch.mean
+        batch.m2 = (deviations**2).sum(axis=0)
+        if self.with_control:
+            batch.control_mean = controls.mean(axis=0)
+            control_deviations = controls-batch.control_mean
+            batch.control_m2 = (control_deviations**2).sum(axis=0)
+            batch.co_moment = (deviations*control_deviations).sum(axis=0)
+        self.merge(batch)
+
+    def merge(self, other):
+        """
+        Combine the statistics of another set of samples into this one
+        """
+        count = self.count+other.count
+        if count == 0:
+            return
+        weight = self.count*other.count/count
+        delta = other.mean-self.mean
+        if self.with_control:
+            control_delta = other.control_mean-self.control_mean
+            self.co_moment = self.co_moment+other.co_moment+delta*control_delta*weight
+            self.control_m2 = self.control_m2+other.control_m2+control_delta**2*weight
+            self.control_mean = self.control_mean+control_delta*other.count/count
+        self.mean = self.mean+delta*other.count/count
+        self.m2 = self.m2+other.m2+delta**2*weight
+        self.count = count
+
+    def _beta(self):
+        """
+        Variance minimizing control variate coefficient cov(samples, control)/var(control)
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.control_m2 > 0, self.co_moment/self.control_m2, 0.0)
+
+    def estimate(self):
+        """
+        Estimate of the mean, corrected by the control variate when there is one
+        """
+        if self.with_control:
+            return self.mean-self._beta()*self.control_mean
+        return self.mean
+
+    def standard_error(self):
+        """
+        Standard error of the estimate (sample variance with Bessel's correction)
+        """
+        if self.count < 3:
+            return np.full_like(self.mean, np.inf)
+        if self.with_control:
+            # Residual variance of the regression of the samples on the control
+            residual = np.maximum(self.m2-self._beta()*self.co_moment, 0)
+            return np.sqrt(residual/(self.count-2)/self.count)
+        return np.sqrt(self.m2/(self.count-1)/self.count)
+
+
+VARIANCE_REDUCTION_METHODS = ["none", "delta_hedge", "control_variate", "antithetic", "moment_matching", "sobol"]
+
+
+def _broadcast_contracts(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type):
+    """
+    Broadcast the contract parameters against each other and flatten them, returning the common shape as well
+    """
+    spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, is_call = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (spot_price, strike_price, risk_free_rate, time_to_maturity, volatility)),
+        _is_call_option(option_type))
+    shape = spot_price.shape
+    contracts = tuple(x.ravel() for x in (spot_price, strike_price, risk_free_rate, time_to_maturity, volatility))
+    return contracts, np.where(is_call.ravel(), 1.0, -1.0), shape
+
+
+def sobol_normals(number_of_points, dimensions, rng):
+    """
+    Standard normal quasi-random points from a scrambled Sobol sequence, shape (number_of_points, dimensions).
+    number_of_points should be a power of two to keep the balance properties of the sequence.
+    """
+    sobol = qmc.Sobol(d=dimensions, scramble=True, seed=rng)
+    uniforms = sobol.random(number_of_points)
+    return ndtri(np.clip(uniforms, 1e-16, 1-1e-16))
+
+
+def brownian_bridge(normals, times):
+    """
+    Build Brownian motion paths W(times) from standard normals with the Brownian bridge construction, shape
+    (number_of_paths, len(times)). The first normal sets the terminal value, the next ones fill the midpoints
+    recursively, so the first (best distributed) Sobol dimensions drive the large scale moves of the paths.
+    """
+    times = np.asarray(times, dtype=float)
+    number_of_steps = times.size
+    paths = np.empty((normals.shape[0], number_of_steps))
+    paths[:, -1] = np.sqrt(times[-1])*normals[:, 0]
+
+    # Breadth-first order of the (left, middle, right) points to fill, left = -1 standing for W(0) = 0
+    intervals = [(-1, number_of_steps-1)]
+    column = 1
+    while intervals:
+        left, right = intervals.pop(0)
+        if right-left < 2:
+            continue
+        middle = (left+right)//2
+        left_time = times[left] if left >= 0 else 0.0
+        left_value = paths[:, left] if left >= 0 else 0.0
+        weight = (times[middle]-left_time)/(times[right]-left_time)
+        standard_deviation = np.sqrt(weight*(times[right]-times[middle]))
+        paths[:, middle] = (1-weight)*left_value+weight*paths[:, right]+standard_deviation*normals[:, column]
+        column += 1
+        intervals.extend([(left, middle), (middle, right)])
+    return paths
+
+
+def _simulate_statistics(contracts, sign, number_of_simulation, rng, chunk_size, target_standard_error=None, variance_reduction="control_variate"):
+    """
+    Simulate the discounted payoffs chunk by chunk and accumulate their statistics, returning them with the number
+    of paths used. At most chunk_size terminal prices are held in memory at once; the same normal draws are shared by
+    every contract of the batch (common random numbers), which keeps surfaces smooth.
+
+    The statistics are over the unit that makes samples independent: single paths, antithetic pairs,
+    or whole chunks for moment matching and Sobol, where every chunk is matched or scrambled independently.
+    """
+    if variance_reduction not in VARIANCE_REDUCTION_METHODS:
+        raise ValueError(f"variance_reduction must be one of {VARIANCE_REDUCTION_METHODS}")
+    spot_price, strike_price, risk_free_rate, time_to_maturity, volatility = contracts
+    paths_per_chunk = max(chunk_size//spot_price.size, 2)
+    batched = variance_reduction in ("moment_matching", "sobol")
+    if batched:
+        # Chunks are the independent samples, so use equal chunks and at least 8 of them for the error estimate
+        paths_per_chunk = max(min(paths_per_chunk, number_of_simulation//8), 2)
+        if variance_reduction == "sobol":
+            paths_per_chunk = 2**int(np.log2(paths_per_chunk))    # power of two point sets
+
     # Precomputed constants
     drift_of_log_returns = (risk_free_rate-0.5*volatility**2)*time_to_maturity
     volatility_scaled = volatility*np.sqrt(time_to_maturity)
-    risk_free_growth_factor = np.exp(risk_free_rate*time_to_maturity)
-    
+    forward_price = spot_price*np.exp(risk_free_rate*time_to_maturity)
+    discount = np.exp(-risk_free_rate*time_to_maturity)
+    d1, _ = d1_d2(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility)
+    delta_0 = sign*ndtr(sign*d1)    # same delta as delta_calculator, for calls and puts at once
 
-    #  Simulate terminal stock prices
-    Z = np.random.standard_normal(number_of_simulation)    # Sample form standard normal distribution 
-    log_returns = drift_of_log_returns+volatility_scaled*Z
-    price_at_maturity = spot_price*np.exp(log_returns) # Geometric Brownian Motion
+    def discounted_payoff(Z):
+        price_at_maturity = spot_price*np.exp(drift_of_log_returns+volatility_scaled*Z)    # Geometric Brownian Motion
+        payoff = discount*np.maximum(sign*(price_at_maturity-strike_price), 0)
+        # Discounted PnL of a one-step delta hedge, zero mean under the risk-neutral measure
+        hedge_pnl = discount*delta_0*(price_at_maturity-forward_price)
+        return payoff, hedge_pnl
 
-    # Payoff and delta
-    if option_type == "Call":
-        payoff = np.maximum(price_at_maturity-strike_price, 0)
-    elif option_type == "Put":
-        payoff = np.maximum(strike_price-price_at_maturity,0)
-    else:
-        raise ValueError("option_type must be either 'Call' or Put'")
-    delta_0 = delta_calculator(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type)
+    statistics = RunningStatistics(spot_price.shape, with_control=variance_reduction == "control_variate")
+    paths = 0
+    while paths < number_of_simulation:
+        chunk_paths = min(paths_per_chunk, number_of_simulation-paths)
+        if batched and chunk_paths < paths_per_chunk and statistics.count >= 2:
+            break    # a smaller last chunk would not be identically distributed
+        if variance_reduction == "antithetic":
+            Z = rng.standard_normal((max(chunk_paths//2, 1), 1))
+            payoff, _ = discounted_payoff(Z)
+            mirrored_payoff, _ = discounted_payoff(-Z)
+            statistics.update((payoff+mirrored_payoff)/2)
+            chunk_paths = 2*Z.shape[0]
+        elif batched:
+            chunk_paths = paths_per_chunk
+            if variance_reduction == "sobol":
+                Z = sobol_normals(chunk_paths, 1, rng)
+            else:
+                Z = rng.standard_normal((chunk_paths, 1))
+                Z = (Z-Z.mean())/Z.std()
+            payoff, _ = discounted_payoff(Z)
+            statistics.update(payoff.mean(axis=0, keepdims=True))
+        else:
+            Z = rng.standard_normal((chunk_paths, 1))
+            payoff, hedge_pnl = discounted_payoff(Z)
+            if variance_reduction == "delta_hedge":
+                # Control variate with the fixed coefficient of -1
+                statistics.update(payoff-hedge_pnl)
+            elif variance_reduction == "control_variate":
+                statistics.update(payoff, hedge_pnl)
+            else:
+                statistics.update(payoff)
+        paths += chunk_paths
 
-    # Control variate using delta hedging over one step
-    pnl =  delta_0*(price_at_maturity-spot_price*risk_free_growth_factor)
+        if target_standard_error is not None and np.all(statistics.standard_error() <= target_standard_error):
+            break
+    return statistics, paths
 
-    # Combine payoff and control variate
-    control_variate_coefficient = -1
-    adjusted_payoff = payoff  + control_variate_coefficient*pnl
 
-    # Discount to present value and calculate monte carlo value
-    discounted_payoff = np.exp(-risk_free_rate*time_to_maturity)*adjusted_payoff
-    option_price = np.mean(discounted_payoff)
+def _monte_carlo_result(statistics, paths, shape, confidence_level):
+    """
+    Turn accumulated statistics into a MonteCarloResult shaped like the contract inputs
+    """
+    z = ndtri(0.5+confidence_level/2)
+    price = statistics.estimate().reshape(shape)
+    standard_error = statistics.standard_error().reshape(shape)
+    instrumentation.count("contracts.monte_carlo", price.size)
+    instrumentation.count("monte_carlo.paths", paths)
+    return MonteCarloResult(price=price[()],
+                            standard_error=standard_error[()],
+                            confidence_interval=((price-z*standard_error)[()], (price+z*standard_error)[()]),
+                            number_of_simulation=paths)
 
-    return option_price
 
+def monte_carlo_pricing_chunked(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, number_of_simulation=1_000_000,
+                                option_type="Call", seed=None, chunk_size=1_000_000, target_standard_error=None, confidence_level=0.95,
+                                variance_reduction="control_variate"):
+    """
+    Streaming Monte Carlo pricer with constant memory, reproducible seeding and error estimates.
+    Inputs are broadcast against each other like in black_scholes.black_scholes_pricing_batch, so a whole
+    chain or surface is simulated at once.
 
+    Paths are drawn from a numpy.random.Generator seeded with seed (an int, a SeedSequence or a Generator)
+    in chunks of at most chunk_size simulated prices, and only running sums are kept, so memory does not grow with
+    number_of_simulation. When target_standard_error is given the simulation stops as soon as every contract
+    reaches it, otherwise after number_of_simulation paths.
+
+    variance_reduction selects one of VARIANCE_REDUCTION_METHODS:
+    - "none": plain average of the discounted payoffs
+    - "delta_hedge": one-step delta hedge PnL as control variate with the fixed coefficient -1
+    - "control_variate": the same control with the variance minimizing coefficient estimated by regression
+    - "antithetic": every draw Z is paired with -Z
+    - "moment_matching": the draws of every chunk are rescaled to mean 0 and variance 1
+    - "sobol": scrambled Sobol points in power of two chunks
+    For the last two the error is estimated across chunks, so at least 8 equal chunks are simulated
+    and the number of paths can fall slightly short of number_of_simulation.
+
+    Returns a MonteCarloResult with the price, standard error and confidence interval at confidence_level.
+    """
+    contracts, sign, shape = _broadcast_contracts(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type)
+    rng = np.random.default_rng(seed)
+    statistics, paths = _simulate_statistics(contracts, sign, number_of_simulation, rng, chunk_size, target_standard_error, variance_reduction)
+    return _monte_carlo_result(statistics, paths, shape, confidence_level)
 
 
+def _simulate_shard(contracts, sign, number_of_simulation, seed_sequence, chunk_size, variance_reduction):
+    """
+    Worker entry point of monte_carlo_pricing_parallel: simulate one shard with its own random stream
+    """
+    return _simulate_statistics(contracts, sign, number_of_simulation, np.random.default_rng(seed_sequence), chunk_size,
+                                variance_reduction=variance_reduction)
+
+
+def monte_carlo_pricing_parallel(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, number_of_simulation=10_000_000,
+                                 option_type="Call", seed=None, workers=None, shard_size=1_000_000, chunk_size=1_000_000, confidence_level=0.95,
+                                 variance_reduction="control_variate"):
+    """
+    Multi-core version of monte_carlo_pricing_chunked.
+    The simulations are split into shards of shard_size paths, each with an independent random stream spawned
+    from SeedSequence(seed), and the shards are run on a pool of workers processes (all cores by default).
+    The partial statistics are merged in shard order, so for a given seed and shard_size the result is identical
+    whatever the number of workers.
+    Returns a MonteCarloResult like monte_carlo_pricing_chunked.
+    """
+    contracts, sign, shape = _broadcast_contracts(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type)
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+    shard_paths = [shard_size]*(number_of_simulation//shard_size)
+    if number_of_simulation % shard_size:
+        shard_paths.append(number_of_simulation % shard_size)
+    shard_seeds = seed_sequence.spawn(len(shard_paths))
+
+    number_of_shards = len(shard_paths)
+    arguments = ([contracts]*number_of_shards, [sign]*number_of_shards, shard_paths, shard_seeds,
+                 [chunk_size]*number_of_shards, [variance_reduction]*number_of_shards)
+    if workers == 1:
+        shards = list(map(_simulate_shard, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            shards = list(executor.map(_simulate_shard, *arguments))
+
+    statistics = RunningStatistics(sign.shape, with_control=variance_reduction == "control_variate")
+    paths = 0
+    for shard_statistics, shard_paths_used in shards:
+        statistics.merge(shard_statistics)
+        paths += shard_paths_used
+    return _monte_carlo_result(statistics, paths, shape, confidence_level)
+
+
+def variance_reduction_report(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, number_of_simulation=100_000,
+                              option_type="Call", seed=None):
+    """
+    Price one contract with every variance reduction method on the same path budget and report the achieved
+    variance reduction factor, (standard error without reduction / standard error of the method)^2, which is also
+    how many times fewer paths the method needs for the same standard error.
+    """
+    seed_sequence = np.random.SeedSequence(seed)
+    rows = []
+    for method, method_seed in zip(VARIANCE_REDUCTION_METHODS, seed_sequence.spawn(len(VARIANCE_REDUCTION_METHODS))):
+        result = monte_carlo_pricing_chunked(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, number_of_simulation,
+                                             option_type, seed=method_seed, variance_reduction=method)
+        rows.append({"method": method, "price": result.price, "standard_error": result.standard_error,
+                     "number_of_simulation": result.number_of_simulation})
+    report = pd.DataFrame(rows)
+    report["variance_reduction_factor"] = (report["standard_error"].iloc[0]/report["standard_error"])**2
+    return report
@@ -0,0 +1,181 @@
+import numpy as np
+from scipy.special import ndtr
+from monte_carlo import RunningStatistics, _monte_carlo_result, sobol_normals, brownian_bridge
+
+BARRIER_TYPES = ["down-and-out", "down-and-in", "up-and-out", "up-and-in"]
+
+
+def simulate_gbm_paths(spot_price, risk_free_rate, time_to_maturity, volatility, time_steps, number_of_simulation, rng,
+                       chunk_size=2_000_000, dtype=np.float64, quasi_random=False):
+    """
+    Generate risk-neutral Geometric Brownian Motion paths in memory-bounded blocks.
+    Every block is a time-major array of shape (time_steps+1, paths): row 0 is the spot price, row i the price at
+    time i*dt, so the per-date operations of the payoffs run over contiguous rows. A block holds at most chunk_size
+    prices, in dtype (float32 halves memory and bandwidth).
+    With quasi_random=True the paths are built from scrambled Sobol points with the Brownian bridge construction,
+    in at least 8 equal blocks of a power of two paths, so slightly fewer than number_of_simulation paths may be used.
+    """
+    dt = time_to_maturity/time_steps
+    times = dt*np.arange(1, time_steps+1)
+    paths_per_block = max(chunk_size//(time_steps+1), 2)
+    if quasi_random:
+        # Blocks are the independent samples of the estimate, so use at least 8 equal ones
+        paths_per_block = 2**int(np.log2(max(min(paths_per_block, number_of_simulation//8), 2)))
+
+    log_spot = np.log(spot_price)
+    drift = (risk_free_rate-0.5*volatility**2)*dt
+    volatility_scaled = volatility*np.sqrt(dt)
+
+    simulated = 0
+    while simulated < number_of_simulation:
+        block = min(paths_per_block, number_of_simulation-simulated)
+        if quasi_random and block < paths_per_block:
+            break    # a smaller last block would not be identically distributed
+        log_paths = np.empty((time_steps+1, block), dtype=dtype)
+        log_paths[0] = log_spot
+        if quasi_random:
+            brownian = brownian_bridge(sobol_normals(block, time_steps, rng), times).T.astype(dtype)
+            log_paths[1:] = log_spot+(risk_free_rate-0.5*volatility**2)*times.astype(dtype)[:, None]+volatility*brownian
+        else:
+            increments = rng.standard_normal((time_steps, block), dtype=dtype)
+            increments *= volatility_scaled
+            increments += drift
+            np.cumsum(increments, axis=0, out=log_paths[1:])
+            log_paths[1:] += log_spot
+        simulated += block
+        yield np.exp(log_paths, out=log_paths)
+
+
+def _path_monte_carlo(block_payoff, spot_price, risk_free_rate, time_to_maturity, volatility, time_steps, number_of_simulation,
+                      seed, chunk_size, dtype, quasi_random, confidence_level, with_control=False):
+    """
+    Accumulate the discounted payoffs (and controls) returned by block_payoff over all path blocks.
+    Sobol blocks are the independent samples of the quasi-random estimate, so their means are accumulated instead.
+    """
+    rng = np.random.default_rng(seed)
+    discount = np.exp(-risk_free_rate*time_to_maturity)
+    statistics = RunningStatistics(with_control=with_control)
+    paths = 0
+    for block in simulate_gbm_paths(spot_price, risk_free_rate, time_to_maturity, volatility, time_steps, number_of_simulation,
+                                    rng, chunk_size, dtype, quasi_random):
+        payoff, control = block_payoff(block)
+        payoff = discount*payoff.astype(np.float64)
+        control = None if control is None else control.astype(np.float64)
+        if quasi_random:
+            payoff = payoff.mean(keepdims=True)
+            control = None if control is None else control.mean(keepdims=True)
+        statistics.update(payoff, control)
+        paths += block.shape[1]
+    return _monte_carlo_result(statistics, paths, (), confidence_level)
+
+
+def geometric_asian_closed_form(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, time_steps=252, option_type="Call"):
+    """
+    Exact price of a geometric average Asian option monitored at the time_steps equally spaced dates t_i = i*T/time_steps.
+    The log of the geometric average is normal, so the price has a Black-Scholes like closed form.
+    """
+    dt = time_to_maturity/time_steps
+    mean_time = dt*(time_steps+1)/2
+    log_mean = np.log(spot_price)+(risk_free_rate-0.5*volatility**2)*mean_time
+    log_standard_deviation = volatility*np.sqrt(dt*(time_steps+1)*(2*time_steps+1)/(6*time_steps))
+
+    sign = 1.0 if option_type == "Call" else -1.0
+    d2 = (log_mean-np.log(strike_price))/log_standard_deviation
+    d1 = d2+log_standard_deviation
+    expected_average = np.exp(log_mean+log_standard_deviation**2/2)
+    return np.exp(-risk_free_rate*time_to_maturity)*sign*(expected_average*ndtr(sign*d1)-strike_price*ndtr(sign*d2))
+
+
+def asian_option_pricing(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, time_steps=252, number_of_simulation=100_000,
+                         option_type="Call", averaging="arithmetic", seed=None, chunk_size=2_000_000, dtype=np.float64, quasi_random=False,
+                         control_variate=True, confidence_level=0.95):
+    """
+    Monte Carlo price of a fixed strike Asian option on the average of the time_steps monitoring dates.
+    averaging is "arithmetic" or "geometric". For the arithmetic average the geometric Asian, whose price is known in
+    closed form, is used as a control variate with a regression estimated coefficient (control_variate=True), which
+    typically removes more than 99% of the variance.
+    Returns a monte_carlo.MonteCarloResult.
+    """
+    if averaging not in ("arithmetic", "geometric"):
+        raise ValueError("averaging must be either 'arithmetic' or 'geometric'")
+    if option_type not in ("Call", "Put"):
+        raise ValueError("option_type must be either 'Call' or 'Put'")
+    sign = 1.0 if option_type == "Call" else -1.0
+    use_control = control_variate and averaging == "arithmetic"
+    geometric_price = geometric_asian_closed_form(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, time_steps, option_type)
+    discount = np.exp(-risk_free_rate*time_to_maturity)
+
+    def block_payoff(paths):
+        monitored = paths[1:]
+        geometric_average = np.exp(np.log(monitored).mean(axis=0))
+        geometric_payoff = np.maximum(sign*(geometric_average-strike_price), 0)
+        if averaging == "geometric":
+            return geometric_payoff, None
+        payoff = np.maximum(sign*(monitored.mean(axis=0)-strike_price), 0)
+        if not use_control:
+            return payoff, None
+        # Discounted geometric payoff minus its exact price has zero mean
+        return payoff, discount*geometric_payoff-geometric_price
+
+    return _path_monte_carlo(block_payoff, spot_price, risk_free_rate, time_to_maturity, volatility, time_steps, number_of_simulation,
+                             seed, chunk_size, dtype, quasi_random, confidence_level, with_control=use_control)
+
+
+def barrier_option_pricing(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, barrier, barrier_type="down-and-out",
+                           time_steps=252, number_of_simulation=100_000, option_type="Call", seed=None, chunk_size=2_000_000,
+                           dtype=np.float64, quasi_random=False, confidence_level=0.95):
+    """
+    Monte Carlo price of a continuously monitored single barrier option (barrier_type one of BARRIER_TYPES).
+    Between two simulated dates the path may cross the barrier unseen; instead of checking the dates only, each path
+    is weighted by its Brownian bridge probability of never touching the barrier,
+    prod_i (1 - exp(-2 ln(S_i/B) ln(S_i+1/B) / (sigma^2 dt))), which removes the discrete monitoring bias.
+    Knock-in options are valued as the complementary weight 1 - survival.
+    Returns a monte_carlo.MonteCarloResult.
+    """
+    if barrier_type not in BARRIER_TYPES:
+        raise ValueError(f"barrier_type must be one of {BARRIER_TYPES}")
+    if option_type not in ("Call", "Put"):
+        raise ValueError("option_type must be either 'Call' or 'Put'")
+    sign = 1.0 if option_type == "Call" else -1.0
+    direction = -1.0 if barrier_type.startswith("down") else 1.0    # the barrier is hit when direction*(S-B) >= 0
+    knock_out = barrier_type.endswith("out")
+    variance_per_step = volatility**2*time_to_maturity/time_steps
+
+    def block_payoff(paths):
+        log_distance = np.log(paths/barrier)    # positive above the barrier, negative below
+        alive = np.all(direction*log_distance < 0, axis=0)
+        with np.errstate(over="ignore"):
+            crossing = np.exp(np.minimum(-2*log_distance[:-1]*log_distance[1:]/variance_per_step, 0))
+        survival = np.where(alive, np.prod(1-crossing, axis=0), 0.0)
+        payoff = np.maximum(sign*(paths[-1]-strike_price), 0)
+        return payoff*(survival if knock_out else 1-survival), None
+
+    return _path_monte_carlo(block_payoff, spot_price, risk_free_rate, time_to_maturity, volatility, time_steps, number_of_simulation,
+                             seed, chunk_size, dtype, quasi_random, confidence_level)
+
+
+def lookback_option_pricing(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, time_steps=252, number_of_simulation=100_000,
+                            option_type="Call", strike_type="floating", seed=None, chunk_size=2_000_000, dtype=np.float64, quasi_random=False,
+                            confidence_level=0.95):
+    """
+    Monte Carlo price of a discretely monitored lookback option, the extremes being taken over the time_steps dates.
+    strike_type "floating": the call pays S_T - min S and the put max S - S_T (strike_price is ignored).
+    strike_type "fixed": the call pays max(max S - K, 0) and the put max(K - min S, 0).
+    Returns a monte_carlo.MonteCarloResult.
+    """
+    if strike_type not in ("floating", "fixed"):
+        raise ValueError("strike_type must be either 'floating' or 'fixed'")
+    if option_type not in ("Call", "Put"):
+        raise ValueError("option_type must be either 'Call' or 'Put'")
+
+    def block_payoff(paths):
+        if strike_type == "floating":
+            if option_type == "Call":
+                return paths[-1]-paths.min(axis=0), None
+            return paths.max(axis=0)-paths[-1], None
+        if option_type == "Call":
+            return np.maximum(paths.max(axis=0)-strike_price, 0), None
+        return np.maximum(strike_price-paths.min(axis=0), 0), None
+
+    return _path_monte_carlo(block_payoff, spot_price, risk_free_rate, time_to_maturity, volatility, time_steps, number_of_simulation,
+                             seed, chunk_size, dtype, quasi_random, confidence_level)
@@ -1,6 +1,7 @@
 import numpy as np 
 import math
-import matplotlib.pyplot as plt
+import instrumentation
+import strategy
 
 def round_pnl_chart_bound(spot_price, buffer_ratio=0.2):
     """
@@ -37,25 +38,29 @@ def get_strike_prices_for_long_options(spot_price, margin=0.05):
     return call_strike, put_strike
 
 
-import numpy as np
-import matplotlib.pyplot as plt
-
-def plot_payoff_diagram(K, price_lower_bound, price_upper_bound, premium=5, option_type='Long Put'):
+def plot_payoff_diagram(K, price_lower_bound, price_upper_bound, premium=5, option_type='Long Put', points=300):
     """
     Plot profit and loss diagram for a given strike price and a given range for the possible stock price.
     Includes clear placement of the breakeven point.
     """
-    S_range = np.linspace(price_lower_bound, price_upper_bound, 300)  
-    
-    # Payoff and PnL
-    if option_type == 'Long Call':
-        payoff = np.maximum(S_range - K, 0)
-        breakeven = K + premium
-    else:  # Long Put
-        payoff = np.maximum(K - S_range, 0)
-        breakeven = K - premium
-    
-    pnl = payoff - premium
+    book = strategy.Strategy.single("Call" if option_type == 'Long Call' else "Put", K, spot_price=K, premium=premium)
+    return plot_strategy_pnl(book, price_lower_bound, price_upper_bound, title=f"{option_type} Option: Payoff & PnL", points=points)
+
+
+@instrumentation.timed("figure.pnl")
+def plot_strategy_pnl(book, price_lower_bound, price_upper_bound, elapsed_times=(), title="Strategy: Payoff & PnL", points=300):
+    """
+    Plot the PnL of a strategy.Strategy at its first expiry over the stock price range, with its breakevens,
+    plus the PnL curves before expiry at each of elapsed_times (years since opening).
+    Every value comes from the strategy; this function only draws.
+    """
+    import matplotlib.pyplot as plt    # imported on first plot, the bound helpers above are used at startup
+
+    S_range = np.linspace(price_lower_bound, price_upper_bound, points)
+    pnl = book.expiry_pnl(S_range)
+    payoff = pnl+book.cost
+    breakevens = book.breakevens()
+    pre_expiry_pnl = book.pnl(S_range[None, :], np.asarray(elapsed_times, dtype=float)[:, None])
 
     # Create Figure
     fig, ax = plt.subplots(figsize=(10,6), facecolor="white")
@@ -69,18 +74,25 @@ def plot_payoff_diagram(K, price_lower_bound, price_upper_bound, premium=5, opti
     # Payoff
     ax.plot(S_range, payoff, linestyle='--', color='#2980b9', linewidth=2, label="Payoff (no cost)")
 
+    # PnL before expiry
+    for elapsed_time, curve in zip(elapsed_times, pre_expiry_pnl):
+        ax.plot(S_range, curve, linewidth=1.2, alpha=0.8, label=f'PnL after {elapsed_time:.2f}y')
+
     # Reference lines
     ax.axhline(0, color='black', linewidth=1, linestyle='-')
-    ax.axvline(K, color='#7f8c8d', linestyle=':', linewidth=1.3, label=f'Strike Price ({K})')
+    strikes = np.unique(book.strike_price)
+    for i, K in enumerate(strikes):
+        label = f'Strike Price ({K:g})' if strikes.size == 1 else ('Strike Prices' if i == 0 else None)
+        ax.axvline(K, color='#7f8c8d', linestyle=':', linewidth=1.3, label=label)
 
-    # Add breakeven only if it lies inside plotted range
-    if price_lower_bound <= breakeven <= price_upper_bound:
+    # Add breakevens only if they lie inside plotted range
+    for breakeven in breakevens[(breakevens >= price_lower_bound) & (breakevens <= price_upper_bound)]:
         ax.axvline(breakeven, 
                    color='#e67e22', linestyle='--', linewidth=1.5, 
                    label=f'Breakeven ({breakeven:.2f})')
 
     # Titles & labels
-    ax.set_title(f"{option_type} Option: Payoff & PnL", fontsize=16, fontweight='bold', color='#1F2937')
+    ax.set_title(title, fontsize=16, fontweight='bold', color='#1F2937')
     ax.set_xlabel("Stock Price at Expiration", fontsize=12, color='#1F2937')
     ax.set_ylabel("Profit / Loss", fontsize=12, color='#1F2937')
 
@@ -90,5 +102,3 @@ def plot_payoff_diagram(K, price_lower_bound, price_upper_bound, premium=5, opti
 
     fig.tight_layout()
     return fig
-
-
@@ -0,0 +1,78 @@
+import hashlib
+import numpy as np
+from cachetools import LRUCache
+
+
+class PricingCache:
+    """
+    Bounded LRU cache of pricing results, keyed on the model name, its settings and its (rounded) parameters.
+    Floats are rounded to decimals places and arrays (e.g. surface grids) are hashed after rounding, so inputs that
+    only differ by floating point noise share an entry. Stochastic models must pass their seed: results are keyed by it,
+    and an unseeded Monte Carlo run is never served from the cache.
+    """
+    def __init__(self, maxsize=512, decimals=8):
+        self.entries = LRUCache(maxsize=maxsize)
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+
+    def _normalize(self, value):
+        """
+        Hashable, rounded representation of a parameter
+        """
+        if isinstance(value, (bool, str, type(None))):
+            return value
+        if isinstance(value, dict):
+            return tuple(sorted((name, self._normalize(item)) for name, item in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(self._normalize(item) for item in value)
+        array = np.asarray(value)
+        if array.dtype.kind in "fc":
+            array = np.round(array, self.decimals)+0.0    # +0.0 folds -0.0 into 0.0
+        if array.ndim == 0:
+            return array.item()
+        return (array.shape, array.dtype.str, hashlib.sha1(np.ascontiguousarray(array).tobytes()).hexdigest())
+
+    def key(self, model, parameters, settings=None, seed=None):
+        return (model, self._normalize(settings or {}), self._normalize(parameters), self._normalize(seed))
+
+    def get_or_compute(self, model, function, parameters, settings=None, seed=None, stochastic=False):
+        """
+        Return function(*parameters) from the cache, computing and storing it on a miss
+        """
+        if stochastic and seed is None:
+            self.misses += 1
+            return function(*parameters)
+        key = self.key(model, parameters, settings, seed)
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        result = function(*parameters)
+        if isinstance(result, np.ndarray):
+            result.setflags(write=False)    # shared between callers
+        self.entries[key] = result
+        return result
+
+    def cached(self, model, function, settings=None, seed=None, stochastic=False):
+        """
+        Wrap a pricing function so every call goes through the cache. settings must hold every input the function
+        closes over (spot, strike, steps...), since only they and the call arguments make up the key.
+        """
+        def cached_function(*parameters):
+            return self.get_or_compute(model, function, parameters, settings, seed, stochastic)
+        return cached_function
+
+    def stats(self):
+        lookups = self.hits+self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.entries.maxsize,
+                "hit_rate": self.hits/lookups if lookups else 0.0}
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by every rerun of the Streamlit app, which runs in the same process
+default_cache = PricingCache()
@@ -0,0 +1,193 @@
+"""
+Precomputed price and Greeks grid with cubic spline lookups.
+
+Prices are homogeneous in (spot, strike), so the grid stores the value of a unit strike option over
+moneyness (spot/strike) x volatility x maturity, for one risk-free rate, and rescales it by the strike on lookup.
+The axes are uniform in log-moneyness, volatility and sqrt(maturity), where prices are smoothest, which lets
+scipy.ndimage.map_coordinates interpolate every query at once from B-spline coefficients computed once at build time.
+
+    grid = PricingGrid.build(risk_free_rate=0.03)                      # Black-Scholes
+    grid = PricingGrid.build(0.03, engine="binomial", exercise_style="American")
+    grid.save("grids/american")
+    grid = PricingGrid.load("grids/american")                          # memory-mapped, shared between processes
+    prices = grid.lookup(spot_price, strike_price, time_to_maturity, volatility, option_type)
+"""
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from scipy.ndimage import map_coordinates, maximum_filter, spline_filter
+from black_scholes import _is_call_option
+
+GRID_QUANTITIES = ["price", "delta", "gamma", "vega", "theta", "rho"]
+ENGINES = ["black_scholes", "binomial"]
+OPTION_TYPES = ["Call", "Put"]
+# The centre of a cell can miss the peak of its interpolation error by a small factor (more in the outer cells, where
+# the spline boundary condition bites), and sits near zero where the error changes sign: bounds are widened by
+# ERROR_BOUND_FACTOR, doubled in the outer cells and floored at ERROR_BOUND_FLOOR times the largest error
+ERROR_BOUND_FACTOR = 2.0
+ERROR_BOUND_FLOOR = 1e-3
+
+
+def _axes(moneyness_range, volatility_range, maturity_range, shape):
+    """
+    Grid axes in the interpolation coordinates: log-moneyness, volatility and sqrt(maturity)
+    """
+    return (np.linspace(np.log(moneyness_range[0]), np.log(moneyness_range[1]), shape[0]),
+            np.linspace(volatility_range[0], volatility_range[1], shape[1]),
+            np.linspace(np.sqrt(maturity_range[0]), np.sqrt(maturity_range[1]), shape[2]))
+
+
+def unit_strike_values(moneyness, volatility, time_to_maturity, risk_free_rate, option_type, engine="black_scholes",
+                       steps=200, exercise_style="European", method="Leisen-Reimer"):
+    """
+    Price and Greeks (GRID_QUANTITIES, stacked on the first axis) of unit strike options with spot = moneyness.
+    Black-Scholes Greeks are analytic; binomial Greeks are central differences of repriced trees.
+    """
+    if engine == "black_scholes":
+        from greeks import black_scholes_greeks
+        greeks = black_scholes_greeks(moneyness, 1.0, risk_free_rate, time_to_maturity, volatility, option_type)
+        shape = np.broadcast_shapes(np.shape(moneyness), np.shape(volatility), np.shape(time_to_maturity))
+        return np.stack([greeks[name].to_numpy().reshape(shape) for name in GRID_QUANTITIES])
+    if engine != "binomial":
+        raise ValueError(f"engine must be one of {ENGINES}")
+
+    from binomial import binomial_pricing_batch
+
+    def price(spot=moneyness, rate=risk_free_rate, maturity=time_to_maturity, sigma=volatility):
+        return binomial_pricing_batch(spot, 1.0, rate, maturity, sigma, steps, option_type, exercise_style, method)
+
+    spot_bump, volatility_bump, time_bump, rate_bump = 0.01*moneyness, 1e-3, 1e-4, 1e-4
+    center = price()
+    up, down = price(spot=moneyness+spot_bump), price(spot=moneyness-spot_bump)
+    return np.stack([center,
+                     (up-down)/(2*spot_bump),
+                     (up-2*center+down)/spot_bump**2,
+                     (price(sigma=volatility+volatility_bump)-price(sigma=volatility-volatility_bump))/(2*volatility_bump),
+                     -(price(maturity=time_to_maturity+time_bump)-price(maturity=time_to_maturity-time_bump))/(2*time_bump),
+                     (price(rate=risk_free_rate+rate_bump)-price(rate=risk_free_rate-rate_bump))/(2*rate_bump)])
+
+
+class PricingGrid:
+    """
+    Table of unit strike prices and Greeks over log-moneyness x volatility x sqrt(maturity), for calls and puts,
+    stored as cubic B-spline coefficients of shape (quantities, option types, moneyness, volatility, maturity).
+    cell_errors holds, for each grid cell, the largest interpolation error measured against the engine at the centres
+    of the cell and its neighbours and widened (see ERROR_BOUND_FACTOR), used as the error bound of the lookups falling in that cell.
+    """
+    def __init__(self, coefficients, cell_errors, meta):
+        self.coefficients = coefficients
+        self.cell_errors = cell_errors
+        self.meta = meta
+        self.axes = _axes(meta["moneyness_range"], meta["volatility_range"], meta["maturity_range"], meta["shape"])
+
+    @classmethod
+    def build(cls, risk_free_rate, moneyness_range=(0.5, 2.0), volatility_range=(0.05, 1.0), maturity_range=(1/52, 3.0),
+              shape=(61, 40, 40), engine="black_scholes", steps=200, exercise_style="European", method="Leisen-Reimer"):
+        """
+        Evaluate the engine on the grid nodes (one vectorized call per option type), fit the splines, then measure
+        the interpolation error at every cell centre
+        """
+        meta = {"risk_free_rate": risk_free_rate, "moneyness_range": list(moneyness_range), "volatility_range": list(volatility_range),
+                "maturity_range": list(maturity_range), "shape": list(shape), "engine": engine, "steps": steps,
+                "exercise_style": exercise_style, "method": method, "quantities": GRID_QUANTITIES, "option_types": OPTION_TYPES}
+        engine_settings = {"engine": engine, "steps": steps, "exercise_style": exercise_style, "method": method}
+        axes = _axes(moneyness_range, volatility_range, maturity_range, shape)
+        centres = [(axis[1:]+axis[:-1])/2 for axis in axes]
+        cell_index = np.meshgrid(*(np.arange(n-1) for n in shape), indexing="ij")
+        outer_cells = np.any([(index == 0) | (index == n-2) for index, n in zip(cell_index, shape)], axis=0)
+        bound_factor = ERROR_BOUND_FACTOR*np.where(outer_cells, 2.0, 1.0)
+
+        def values(log_moneyness, volatility, sqrt_maturity, option_type):
+            M, V, T = np.meshgrid(np.exp(log_moneyness), volatility, sqrt_maturity**2, indexing="ij")
+            return unit_strike_values(M, V, T, risk_free_rate, option_type, **engine_settings)
+
+        coefficients = np.empty((len(GRID_QUANTITIES), len(OPTION_TYPES), *shape))
+        cell_errors = np.empty((len(GRID_QUANTITIES), len(OPTION_TYPES), *(n-1 for n in shape)))
+        for index, option_type in enumerate(OPTION_TYPES):
+            node_values = values(*axes, option_type)
+            for quantity in range(len(GRID_QUANTITIES)):
+                coefficients[quantity, index] = spline_filter(node_values[quantity], order=3, mode="nearest")
+            # Interpolate at the cell centres, half way between nodes, where spline errors are largest
+            centre_values = values(*centres, option_type)
+            coordinates = np.stack(np.meshgrid(*(np.arange(n-1)+0.5 for n in shape), indexing="ij")).reshape(3, -1)
+            for quantity in range(len(GRID_QUANTITIES)):
+                interpolated = map_coordinates(coefficients[quantity, index], coordinates, order=3, prefilter=False, mode="nearest")
+                centre_errors = np.abs(interpolated.reshape(cell_errors.shape[2:])-centre_values[quantity])
+                # A query can sit anywhere in its cell, so take the largest centre error of the cell and its neighbours
+                cell_errors[quantity, index] = bound_factor*np.maximum(maximum_filter(centre_errors, size=3, mode="nearest"),
+                                                                       ERROR_BOUND_FLOOR*centre_errors.max())
+        return cls(coefficients, cell_errors, meta)
+
+    def _fractional_indices(self, moneyness, volatility, time_to_maturity):
+        """
+        Position of the queries in grid index units, and a mask of the queries outside the grid
+        """
+        coordinates = (np.log(moneyness), volatility, np.sqrt(np.maximum(time_to_maturity, 0)))
+        indices = np.stack([(coordinate-axis[0])/(axis[1]-axis[0]) for coordinate, axis in zip(coordinates, self.axes)])
+        limits = np.array(self.meta["shape"])[:, None]-1
+        outside = np.any((indices < -1e-9) | (indices > limits+1e-9), axis=0)
+        return indices, outside
+
+    def lookup(self, spot_price, strike_price, time_to_maturity, volatility, option_type="Call", greeks=False, error_bounds=False):
+        """
+        Interpolated prices (or, with greeks=True, a DataFrame of GRID_QUANTITIES like greeks.black_scholes_greeks)
+        at the grid's risk-free rate. Inputs are broadcast against each other; queries outside the grid are NaN.
+        With error_bounds=True the estimated interpolation errors are returned as well, shaped like the results.
+        """
+        spot_price, strike_price, time_to_maturity, volatility, is_call = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (spot_price, strike_price, time_to_maturity, volatility)), _is_call_option(option_type))
+        shape = spot_price.shape
+        strike = strike_price.ravel()
+        indices, outside = self._fractional_indices(spot_price.ravel()/strike, volatility.ravel(), time_to_maturity.ravel())
+        quantities = GRID_QUANTITIES if greeks else GRID_QUANTITIES[:1]
+        # Back from unit strike: price, vega, theta and rho scale with the strike, delta does not, gamma with its inverse
+        scale = {"price": strike, "delta": 1.0, "gamma": 1/strike, "vega": strike, "theta": strike, "rho": strike}
+
+        results = {name: np.full(strike.size, np.nan) for name in quantities}
+        errors = {name: np.full(strike.size, np.nan) for name in quantities}
+        cells = tuple(np.clip(np.floor(axis_indices), 0, n-2).astype(int) for axis_indices, n in zip(indices, self.meta["shape"]))
+        for type_index, calls in enumerate((True, False)):
+            selected = (is_call.ravel() == calls) & ~outside
+            if not selected.any():
+                continue
+            for name in quantities:
+                quantity = GRID_QUANTITIES.index(name)
+                values = map_coordinates(self.coefficients[quantity, type_index], indices[:, selected], order=3, prefilter=False, mode="nearest")
+                results[name][selected] = values*np.broadcast_to(scale[name], strike.shape)[selected]
+                cell_error = self.cell_errors[quantity, type_index][tuple(cell[selected] for cell in cells)]
+                errors[name][selected] = cell_error*np.abs(np.broadcast_to(scale[name], strike.shape)[selected])
+
+        if greeks:
+            result = pd.DataFrame(results, columns=quantities)
+            error = pd.DataFrame(errors, columns=quantities)
+        else:
+            result, error = results["price"].reshape(shape)[()], errors["price"].reshape(shape)[()]
+        return (result, error) if error_bounds else result
+
+    def max_errors(self):
+        """
+        Largest estimated interpolation error of every quantity and option type, for a unit strike
+        """
+        return pd.DataFrame(self.cell_errors.reshape(*self.cell_errors.shape[:2], -1).max(axis=2).T,
+                            index=OPTION_TYPES, columns=GRID_QUANTITIES)
+
+    def save(self, directory):
+        """
+        Write the grid as coefficients.npy, cell_errors.npy and meta.json in directory
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory/"coefficients.npy", self.coefficients)
+        np.save(directory/"cell_errors.npy", self.cell_errors)
+        (directory/"meta.json").write_text(json.dumps(self.meta, indent=2))
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """
+        Open a saved grid. With the default mmap_mode="r" the arrays are memory-mapped read-only, so every process
+        loading the same grid shares the operating system's page cache instead of holding its own copy.
+        """
+        directory = Path(directory)
+        return cls(np.load(directory/"coefficients.npy", mmap_mode=mmap_mode), np.load(directory/"cell_errors.npy", mmap_mode=mmap_mode),
+                   json.loads((directory/"meta.json").read_text()))
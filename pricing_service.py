@@ -0,0 +1,293 @@
+"""
+Asynchronous HTTP pricing service (tornado on asyncio).
+
+Concurrent requests for the same model and settings arriving within a short window are coalesced into one vectorized
+call of the batch pricer; trees and Monte Carlo run on a process pool so the event loop never blocks, while the
+Black-Scholes closed form is cheap enough to run on the loop.
+
+Endpoints:
+    POST /price    one contract {"model": "binomial", "steps": 200, "spot_price": 100, "strike_price": 105, ...}
+                   or many with "contracts" as a list of contracts or as columns ({"strike_price": [90, 100], ...},
+                   scalars being broadcast). Model settings (steps, exercise_style, method, number_of_simulation,
+                   variance_reduction, seed) go at the top level.
+    GET  /metrics  request counts, batch sizes and p50/p90/p99 latencies per model
+    GET  /health
+
+Run:
+    python pricing_service.py --port 8000
+"""
+import argparse
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import tornado.escape
+import tornado.web
+from binomial import LATTICE_METHODS
+from greeks import PORTFOLIO_COLUMNS
+from monte_carlo import VARIANCE_REDUCTION_METHODS
+
+MODELS = ["black_scholes", "binomial", "monte_carlo"]
+# Settings of each model with their defaults and types; requests only differing by their contracts share a batch
+MODEL_SETTINGS = {
+    "black_scholes": {},
+    "binomial": {"steps": (int, 100), "exercise_style": (str, "European"), "method": (str, "CRR")},
+    "monte_carlo": {"number_of_simulation": (int, 10000), "variance_reduction": (str, "control_variate"), "seed": (int, None)},
+}
+# Allowed values of the string settings, checked before a request joins a batch
+SETTING_CHOICES = {"exercise_style": ["European", "American"], "method": LATTICE_METHODS, "variance_reduction": VARIANCE_REDUCTION_METHODS}
+NUMERIC_COLUMNS = PORTFOLIO_COLUMNS[:5]
+
+
+def price_contracts(model, settings, spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type):
+    """
+    Price a batch of contracts, returning the prices and the standard errors (None except for Monte Carlo).
+    Runs in the worker processes, so the pricing modules are imported here.
+    """
+    if model == "black_scholes":
+        import black_scholes
+        return black_scholes.black_scholes_pricing_batch(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type), None
+    if model == "binomial":
+        import binomial
+        return binomial.binomial_pricing_batch(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility,
+                                               option_type=option_type, **settings), None
+    import monte_carlo
+    result = monte_carlo.monte_carlo_pricing_chunked(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility,
+                                                     option_type=option_type, **settings)
+    return result.price, result.standard_error
+
+
+def parse_request(body):
+    """
+    Validate a /price request body. Returns (model, settings, contracts, single) where contracts holds one 1D array
+    per PORTFOLIO_COLUMNS entry and single tells whether the body was a single contract. Raises ValueError.
+    """
+    if not isinstance(body, dict):
+        raise ValueError("the request body must be a JSON object")
+    model = body.get("model", "black_scholes")
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {MODELS}")
+    settings = {}
+    for name, (cast, default) in MODEL_SETTINGS[model].items():
+        value = body.get(name, default)
+        settings[name] = None if value is None else cast(value)
+        if name in SETTING_CHOICES and settings[name] not in SETTING_CHOICES[name]:
+            raise ValueError(f"{name} must be one of {SETTING_CHOICES[name]}")
+        if name in ("steps", "number_of_simulation") and settings[name] < 1:
+            raise ValueError(f"{name} must be a positive integer")
+
+    single = "contracts" not in body
+    contracts = body if single else body["contracts"]
+    if isinstance(contracts, list):
+        contracts = {column: [contract.get(column) for contract in contracts] for column in PORTFOLIO_COLUMNS}
+    if not isinstance(contracts, dict):
+        raise ValueError("contracts must be a list of contracts or an object of columns")
+    missing = [column for column in NUMERIC_COLUMNS if column not in contracts]
+    if missing:
+        raise ValueError(f"missing the fields {missing}")
+
+    columns = [np.asarray(contracts[column], dtype=float) for column in NUMERIC_COLUMNS]
+    option_type = contracts.get("option_type", "Call")
+    option_type = np.asarray(["Call" if value is None else value for value in option_type] if isinstance(option_type, list) else option_type)
+    if not np.isin(option_type, ["Call", "Put"]).all():
+        raise ValueError("option_type must be either 'Call' or 'Put'")
+    # Validated here so that a bad request cannot fail the batch it would have joined
+    columns = [np.ravel(column) for column in np.broadcast_arrays(*columns, option_type)]
+    return model, settings, columns, single
+
+
+class RequestBatcher:
+    """
+    Coalesce concurrent pricing requests: the first request for a (model, settings) opens a batch that is priced
+    window seconds later (or as soon as it holds max_batch_size contracts) with one vectorized call, and every request
+    gets its slice of the result. Models other than Black-Scholes are priced on executor.
+    Seeded Monte Carlo requests are priced on their own: in a shared batch their draws, and so their prices, would
+    depend on the other requests that happened to arrive in the same window.
+    """
+    def __init__(self, window=0.002, max_batch_size=50_000, executor=None):
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.executor = executor
+        self.pending = {}
+        self.pending_contracts = {}
+        self.timers = {}
+        self.batch_sizes = deque(maxlen=10_000)
+        self.batch_count = 0
+        self.tasks = set()    # running batches, referenced until done so they cannot be garbage collected
+
+    async def price(self, model, settings, contracts):
+        """
+        Price contracts (one array per PORTFOLIO_COLUMNS entry) in the next batch of their model and settings
+        """
+        loop = asyncio.get_running_loop()
+        key = (model, tuple(sorted(settings.items())))
+        future = loop.create_future()
+        if settings.get("seed") is not None:
+            await self._price_batch(key, [(contracts, future)])
+            return await future
+        requests = self.pending.setdefault(key, [])
+        requests.append((contracts, future))
+        self.pending_contracts[key] = self.pending_contracts.get(key, 0)+contracts[0].size
+        if self.pending_contracts[key] >= self.max_batch_size:
+            self._flush(key)
+        elif len(requests) == 1:
+            self.timers[key] = loop.call_later(self.window, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        requests = self.pending.pop(key, None)
+        self.pending_contracts.pop(key, None)
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()    # flushed early by max_batch_size: the next batch of this key gets its own window
+        if requests:
+            task = asyncio.ensure_future(self._price_batch(key, requests))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _price_batch(self, key, requests):
+        model, settings = key
+        columns = [np.concatenate([contracts[i] for contracts, _ in requests]) for i in range(len(PORTFOLIO_COLUMNS))]
+        self.batch_count += 1
+        self.batch_sizes.append(columns[0].size)
+        try:
+            if model == "black_scholes" or self.executor is None:
+                price, standard_error = price_contracts(model, dict(settings), *columns)
+            else:
+                price, standard_error = await asyncio.get_running_loop().run_in_executor(self.executor, price_contracts, model, dict(settings), *columns)
+        except Exception as error:
+            for _, future in requests:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        price = np.atleast_1d(price)
+        standard_error = None if standard_error is None else np.atleast_1d(standard_error)
+        start = 0
+        for contracts, future in requests:
+            end = start+contracts[0].size
+            if not future.done():    # the client may have gone away
+                future.set_result((price[start:end], None if standard_error is None else standard_error[start:end]))
+            start = end
+
+    def stats(self):
+        sizes = np.asarray(self.batch_sizes)
+        return {"count": self.batch_count, "mean_size": float(sizes.mean()) if sizes.size else 0.0,
+                "max_size": int(sizes.max()) if sizes.size else 0}
+
+
+class LatencyTracker:
+    """
+    Request counts and latency percentiles over the last window requests
+    """
+    def __init__(self, window=10_000):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.contracts = 0
+
+    def record(self, seconds, contracts=1):
+        self.latencies.append(seconds)
+        self.requests += 1
+        self.contracts += contracts
+
+    def summary(self):
+        latency = {}
+        if self.latencies:
+            p50, p90, p99 = np.percentile(np.asarray(self.latencies)*1000, [50, 90, 99])
+            latency = {"p50": p50, "p90": p90, "p99": p99, "max": max(self.latencies)*1000}
+        return {"requests": self.requests, "contracts": self.contracts, "latency_ms": latency}
+
+
+class PricingService:
+    """
+    State shared by the handlers: the batcher, its process pool and the latency trackers
+    """
+    def __init__(self, window=0.002, max_batch_size=50_000, workers=None):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.batcher = RequestBatcher(window, max_batch_size, self.executor)
+        self.latency = {model: LatencyTracker() for model in MODELS}
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+class PriceHandler(tornado.web.RequestHandler):
+    def initialize(self, service):
+        self.service = service
+
+    async def post(self):
+        start = time.perf_counter()
+        try:
+            model, settings, contracts, single = parse_request(tornado.escape.json_decode(self.request.body))
+        except (ValueError, TypeError, KeyError) as error:
+            self.set_status(400)
+            self.finish({"error": str(error)})
+            return
+        try:
+            price, standard_error = await self.service.batcher.price(model, settings, contracts)
+        except Exception as error:
+            self.set_status(500)
+            self.finish({"error": str(error)})
+            return
+
+        if single:
+            response = {"price": float(price[0])}
+            if standard_error is not None:
+                response["standard_error"] = float(standard_error[0])
+        else:
+            response = {"prices": price.tolist()}
+            if standard_error is not None:
+                response["standard_errors"] = standard_error.tolist()
+        self.finish(response)
+        self.service.latency[model].record(time.perf_counter()-start, price.size)
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def initialize(self, service):
+        self.service = service
+
+    def get(self):
+        self.finish({"models": {model: tracker.summary() for model, tracker in self.service.latency.items()},
+                     "batches": self.service.batcher.stats()})
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.finish({"status": "ok"})
+
+
+def make_app(service):
+    return tornado.web.Application([
+        (r"/price", PriceHandler, {"service": service}),
+        (r"/metrics", MetricsHandler, {"service": service}),
+        (r"/health", HealthHandler),
+    ])
+
+
+async def serve(port=8000, window=0.002, max_batch_size=50_000, workers=None):
+    service = PricingService(window, max_batch_size, workers)
+    server = make_app(service).listen(port)
+    print(f"pricing service listening on http://localhost:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        server.stop()
+        service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--window-ms", type=float, default=2.0, help="time a batch stays open for more requests")
+    parser.add_argument("--max-batch-size", type=int, default=50_000, help="contracts after which a batch is priced at once")
+    parser.add_argument("--workers", type=int, default=None, help="processes pricing trees and Monte Carlo (all cores by default)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.port, args.window_ms/1000, args.max_batch_size, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Scenario and stress-testing engine: revalue a whole option book under spot, volatility and rate shocks
+and summarize the scenario PnL with value at risk and expected shortfall.
+
+Scenarios are a DataFrame with the columns of SCENARIO_COLUMNS, one row per scenario:
+    spot_shock        relative move of the underlying (0.05 = +5%)
+    volatility_shock  absolute change of every volatility (0.02 = +2 vol points)
+    rate_shock        absolute change of the risk-free rate
+    time_shift        years elapsed before the shock (the horizon), shortening every maturity
+The book is a portfolio DataFrame as in greeks.portfolio_greeks (PORTFOLIO_COLUMNS plus an optional quantity),
+all positions sharing the shocked underlying.
+
+    scenarios = historical_scenarios(stock.get_historical_data("5y"), horizon_days=10)
+    pnl = revalue(portfolio, scenarios, workers=None)
+    risk_report(pnl)
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+import numpy as np
+import pandas as pd
+from black_scholes import black_scholes_pricing_batch
+from greeks import PORTFOLIO_COLUMNS, black_scholes_greeks
+
+SCENARIO_COLUMNS = ["spot_shock", "volatility_shock", "rate_shock", "time_shift"]
+REVALUATION_METHODS = ["black_scholes", "grid", "taylor"]
+TRADING_DAYS = 252
+
+
+def grid_scenarios(spot_shocks, volatility_shocks=(0.0,), rate_shocks=(0.0,), time_shift=0.0):
+    """
+    Every combination of the given spot, volatility and rate shocks, at the same horizon
+    """
+    spot, volatility, rate = (values.ravel() for values in np.meshgrid(spot_shocks, volatility_shocks, rate_shocks, indexing="ij"))
+    return pd.DataFrame({"spot_shock": spot, "volatility_shock": volatility, "rate_shock": rate, "time_shift": time_shift})
+
+
+def historical_scenarios(close, horizon_days=1, volatility_window=21, with_volatility=True):
+    """
+    Replay the moves of a historical close price series (e.g. stockData.get_historical_data) over horizon_days:
+    the spot shocks are the overlapping horizon returns, and with with_volatility=True the volatility shocks
+    are the changes of the rolling realized volatility over the same horizons
+    """
+    close = close.dropna()
+    scenarios = pd.DataFrame({"spot_shock": close.pct_change(horizon_days)}, index=close.index)
+    if with_volatility:
+        import volatility
+        scenarios["volatility_shock"] = volatility.rolling_volatility(close, volatility_window).diff(horizon_days)
+    else:
+        scenarios["volatility_shock"] = 0.0
+    scenarios["rate_shock"] = 0.0
+    scenarios["time_shift"] = horizon_days/TRADING_DAYS
+    return scenarios.dropna()
+
+
+def _book_arrays(portfolio):
+    """
+    Position arrays of a portfolio: the five numeric contract columns, the option types and the quantities
+    """
+    missing = [column for column in PORTFOLIO_COLUMNS if column not in portfolio.columns]
+    if missing:
+        raise ValueError(f"portfolio is missing the columns {missing}")
+    contracts = tuple(portfolio[column].to_numpy(dtype=float) for column in PORTFOLIO_COLUMNS[:5])
+    option_type = portfolio["option_type"].to_numpy().astype(str)
+    quantity = portfolio["quantity"].to_numpy(dtype=float) if "quantity" in portfolio.columns else np.ones(len(portfolio))
+    return contracts, option_type, quantity
+
+
+def _shocked_values(contracts, option_type, scenarios, method, grid):
+    """
+    (scenarios x positions) values of the positions under the shocks of a block of scenarios
+    """
+    spot_price, strike_price, risk_free_rate, time_to_maturity, volatility = contracts
+    spot_shock, volatility_shock, rate_shock, time_shift = (column[:, None] for column in scenarios)
+    shocked_spot = spot_price*(1+spot_shock)
+    shocked_volatility = np.maximum(volatility+volatility_shock, 1e-8)
+    remaining_time = np.maximum(time_to_maturity-time_shift, 0)
+    if method == "grid":
+        if np.any(rate_shock != 0) or np.any(risk_free_rate != grid.meta["risk_free_rate"]):
+            raise ValueError("the pricing grid is built for a single risk-free rate and cannot apply rate shocks")
+        values = grid.lookup(shocked_spot, strike_price, remaining_time, shocked_volatility, option_type)
+        if np.any(np.isnan(values)):
+            raise ValueError("some shocked positions fall outside the pricing grid")
+        return values
+    return black_scholes_pricing_batch(shocked_spot, strike_price, risk_free_rate+rate_shock, remaining_time, shocked_volatility, option_type)
+
+
+def _revalue_scenarios(contracts, option_type, quantity, base_values, scenarios, method, grid, block_size):
+    """
+    Book PnL of each scenario, revaluing blocks of at most block_size (scenario, position) pairs at a time.
+    Worker entry point of revalue.
+    """
+    if isinstance(grid, (str, os.PathLike)):
+        from pricing_grid import PricingGrid
+        grid = PricingGrid.load(grid)    # memory-mapped, shared by the workers
+    number_of_scenarios, number_of_positions = scenarios.shape[1], quantity.size
+    positions_per_block = min(number_of_positions, max(block_size, 1))
+    scenarios_per_block = max(block_size//positions_per_block, 1)
+
+    pnl = np.zeros(number_of_scenarios)
+    for position_start in range(0, number_of_positions, positions_per_block):
+        positions = slice(position_start, position_start+positions_per_block)
+        block_contracts = tuple(values[positions] for values in contracts)
+        for scenario_start in range(0, number_of_scenarios, scenarios_per_block):
+            block = slice(scenario_start, scenario_start+scenarios_per_block)
+            values = _shocked_values(block_contracts, option_type[positions], scenarios[:, block], method, grid)
+            pnl[block] += (values-base_values[positions])@quantity[positions]
+    return pnl
+
+
+def _taylor_pnl(contracts, option_type, quantity, scenarios):
+    """
+    Second order expansion of the book PnL in the shocks. Since every position shares the shocks, the Greeks are
+    aggregated once over the book and each scenario costs a few multiply-adds whatever the number of positions.
+    """
+    greeks = black_scholes_greeks(*contracts, option_type).mul(quantity, axis=0)
+    spot_price = contracts[0]
+    dollar_delta = np.sum(greeks["delta"].to_numpy()*spot_price)
+    dollar_gamma = np.sum(greeks["gamma"].to_numpy()*spot_price**2)
+    dollar_vanna = np.sum(greeks["vanna"].to_numpy()*spot_price)
+    vega, volga, theta, rho = (np.nansum(greeks[name].to_numpy()) for name in ("vega", "volga", "theta", "rho"))
+    spot_shock, volatility_shock, rate_shock, time_shift = scenarios
+    return (dollar_delta*spot_shock+0.5*dollar_gamma*spot_shock**2+vega*volatility_shock+0.5*volga*volatility_shock**2
+            + dollar_vanna*spot_shock*volatility_shock+rho*rate_shock+theta*time_shift)
+
+
+def revalue(portfolio, scenarios, method="black_scholes", grid=None, block_size=1_000_000, scenarios_per_task=1000, workers=1):
+    """
+    PnL of the whole book in every scenario (a Series aligned on the scenarios), against its current value.
+
+    method selects one of REVALUATION_METHODS:
+    - "black_scholes": full repricing of every position in every scenario with the vectorized pricer
+    - "grid": full repricing by interpolation in a pricing_grid.PricingGrid (grid, or the directory of a saved grid,
+      which workers then memory-map); the grid has a fixed rate, so rate shocks are not supported
+    - "taylor": delta-gamma-vega expansion with the Black-Scholes Greeks (plus vanna, volga, theta and rho),
+      approximate but independent of the number of positions
+
+    Full repricing runs on blocks of at most block_size (scenario, position) pairs, so memory stays bounded
+    whatever the size of the book and of the scenario set. With workers other than 1 the scenarios are split in
+    tasks of scenarios_per_task, run on a pool of workers processes (all cores when None).
+    """
+    if method not in REVALUATION_METHODS:
+        raise ValueError(f"method must be one of {REVALUATION_METHODS}")
+    if method == "grid" and grid is None:
+        raise ValueError("the grid method needs a pricing grid")
+    missing = [column for column in SCENARIO_COLUMNS if column not in scenarios.columns]
+    if missing:
+        raise ValueError(f"scenarios are missing the columns {missing}")
+    contracts, option_type, quantity = _book_arrays(portfolio)
+    shocks = scenarios[SCENARIO_COLUMNS].to_numpy(dtype=float).T    # one row per shock
+
+    if method == "taylor":
+        return pd.Series(_taylor_pnl(contracts, option_type, quantity, shocks), index=scenarios.index, name="pnl")
+
+    no_shock = np.zeros((len(SCENARIO_COLUMNS), 1))
+    if isinstance(grid, (str, os.PathLike)):
+        from pricing_grid import PricingGrid
+        base_grid = PricingGrid.load(grid)
+    else:
+        base_grid = grid
+    base_values = _shocked_values(contracts, option_type, no_shock, method, base_grid)[0]
+
+    if workers == 1:
+        pnl = _revalue_scenarios(contracts, option_type, quantity, base_values, shocks, method, grid, block_size)
+    else:
+        tasks = [shocks[:, start:start+scenarios_per_task] for start in range(0, shocks.shape[1], scenarios_per_task)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = executor.map(_revalue_scenarios, *zip(*[(contracts, option_type, quantity, base_values, task, method, grid, block_size)
+                                                            for task in tasks]))
+            pnl = np.concatenate(list(parts))
+    return pd.Series(pnl, index=scenarios.index, name="pnl")
+
+
+def value_at_risk(pnl, confidence_level=0.99):
+    """
+    Loss not exceeded with probability confidence_level, as a positive number
+    """
+    return -np.quantile(np.asarray(pnl, dtype=float), 1-confidence_level)
+
+
+def expected_shortfall(pnl, confidence_level=0.99):
+    """
+    Average loss in the scenarios at or beyond the value at risk, as a positive number
+    """
+    pnl = np.asarray(pnl, dtype=float)
+    return -pnl[pnl <= -value_at_risk(pnl, confidence_level)].mean()
+
+
+def risk_report(pnl, confidence_levels=(0.95, 0.99), worst=5):
+    """
+    Value at risk and expected shortfall at each confidence level, and the worst scenarios
+    """
+    report = pd.DataFrame({"value_at_risk": [value_at_risk(pnl, level) for level in confidence_levels],
+                           "expected_shortfall": [expected_shortfall(pnl, level) for level in confidence_levels]},
+                          index=pd.Index(confidence_levels, name="confidence_level"))
+    return report, pd.Series(pnl).nsmallest(worst)
@@ -0,0 +1,192 @@
+"""
+Multi-leg option strategies: value and PnL of a whole book over a spot x time grid with one vectorized
+Black-Scholes call, and breakevens (exact at expiry, by vectorized root finding before it).
+
+    book = Strategy.iron_condor(spot_price=100, strikes=(85, 95, 105, 115), time_to_maturity=0.25, volatility=0.3)
+    pnl = book.pnl(spot_prices[None, :], elapsed_times[:, None])    # times x spots
+    book.breakevens()                                               # at the first expiry
+"""
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from black_scholes import black_scholes_pricing_batch, _is_call_option
+
+OPTION_TYPES = ["Call", "Put"]
+
+
+@dataclass
+class Leg:
+    """
+    One option position: quantity > 0 is long and < 0 short. premium is the price paid (or received) per unit;
+    when None it is priced with Black-Scholes at the strategy's spot price.
+    volatility overrides the strategy's volatility for this leg.
+    """
+    option_type: str
+    strike_price: float
+    quantity: float = 1.0
+    time_to_maturity: float = 1.0
+    premium: Optional[float] = None
+    volatility: Optional[float] = None
+
+
+class Strategy:
+    """
+    A book of option legs on one underlying. Legs are held as arrays so every valuation prices all of them at once.
+    Before its expiry a leg is valued with Black-Scholes at risk_free_rate and its volatility, at and after it
+    with its intrinsic value.
+    """
+    def __init__(self, legs, spot_price, risk_free_rate=0.02, volatility=0.2):
+        if not legs:
+            raise ValueError("a strategy needs at least one leg")
+        self.legs = list(legs)
+        self.spot_price = spot_price
+        self.risk_free_rate = risk_free_rate
+        self.option_type = np.array([leg.option_type for leg in self.legs])
+        self.is_call = _is_call_option(self.option_type)
+        self.strike_price = np.array([leg.strike_price for leg in self.legs], dtype=float)
+        self.quantity = np.array([leg.quantity for leg in self.legs], dtype=float)
+        self.time_to_maturity = np.array([leg.time_to_maturity for leg in self.legs], dtype=float)
+        self.volatility = np.array([volatility if leg.volatility is None else leg.volatility for leg in self.legs], dtype=float)
+
+        self.premium = np.array([np.nan if leg.premium is None else leg.premium for leg in self.legs], dtype=float)
+        unpriced = np.isnan(self.premium)    # only these legs need a Black-Scholes premium
+        if np.any(unpriced):
+            self.premium[unpriced] = black_scholes_pricing_batch(spot_price, self.strike_price[unpriced], risk_free_rate,
+                                                                 self.time_to_maturity[unpriced], self.volatility[unpriced],
+                                                                 self.option_type[unpriced])
+        self.cost = float(self.quantity@self.premium)    # net debit (> 0) or credit (< 0) of opening the book
+        self.expiry = float(self.time_to_maturity.min())
+
+    # ---------------------------------------------------------------- valuation ----------------------------------------------------------------
+
+    def value(self, spot_price, elapsed_time=0.0):
+        """
+        Market value of the book for spot prices and elapsed times (years since opening), broadcast against each other,
+        e.g. spot_price[None, :] and elapsed_time[:, None] for a times x spots grid
+        """
+        spot_price = np.asarray(spot_price, dtype=float)[..., None]    # legs along a new last axis
+        remaining = np.maximum(self.time_to_maturity-np.asarray(elapsed_time, dtype=float)[..., None], 0)
+        prices = black_scholes_pricing_batch(spot_price, self.strike_price, self.risk_free_rate, remaining, self.volatility, self.option_type)
+        return prices@self.quantity
+
+    def pnl(self, spot_price, elapsed_time=0.0):
+        """
+        Profit and loss of the book (value minus opening cost) for spot prices and elapsed times, broadcast like value
+        """
+        return self.value(spot_price, elapsed_time)-self.cost
+
+    def payoff(self, spot_price):
+        """
+        Value of the book when every leg has expired, without the opening cost
+        """
+        spot_price = np.asarray(spot_price, dtype=float)[..., None]
+        sign = np.where(self.is_call, 1.0, -1.0)
+        return np.maximum(sign*(spot_price-self.strike_price), 0)@self.quantity
+
+    def expiry_pnl(self, spot_price):
+        """
+        PnL at the first expiry; legs expiring later are still valued with Black-Scholes
+        """
+        return self.pnl(spot_price, self.expiry)
+
+    # ---------------------------------------------------------------- breakevens ----------------------------------------------------------------
+
+    def _single_expiry(self):
+        return np.all(self.time_to_maturity == self.expiry)
+
+    def breakevens(self, elapsed_time=None, spot_range=None, points=2001, iterations=60):
+        """
+        Spot prices where the PnL crosses zero, at elapsed_time (the first expiry by default).
+        When every leg has expired by then the PnL is piecewise linear in the spot with kinks at the strikes, so the
+        roots are found exactly segment by segment. Otherwise sign changes are located on a log-spaced spot grid over
+        spot_range (default: a fifth of the lowest strike to five times the highest) and all brackets are refined
+        at once by vectorized bisection.
+        """
+        elapsed_time = self.expiry if elapsed_time is None else elapsed_time
+        if np.all(self.time_to_maturity <= elapsed_time):
+            return self._expiry_breakevens()
+
+        low, high = spot_range or (self.strike_price.min()/5, self.strike_price.max()*5)
+        spots = np.geomspace(low, high, points)
+        pnl = self.pnl(spots, elapsed_time)
+        roots = list(spots[pnl == 0])
+        bracket = np.flatnonzero(np.sign(pnl[:-1])*np.sign(pnl[1:]) < 0)
+        lower, upper = spots[bracket], spots[bracket+1]
+        lower_sign = np.sign(pnl[bracket])
+        for _ in range(iterations):
+            middle = (lower+upper)/2
+            same_side = np.sign(self.pnl(middle, elapsed_time)) == lower_sign
+            lower, upper = np.where(same_side, middle, lower), np.where(same_side, upper, middle)
+        return np.sort(np.concatenate([roots, (lower+upper)/2]))
+
+    def _expiry_breakevens(self):
+        """
+        Exact zeros of the piecewise linear expiry PnL
+        """
+        kinks = np.unique(np.concatenate([[0.0], self.strike_price]))
+        pnl = self.payoff(kinks)-self.cost
+        roots = list(kinks[pnl == 0])
+        # Interior segments with a sign change
+        crossing = np.flatnonzero(pnl[:-1]*pnl[1:] < 0)
+        roots += list(kinks[crossing]-pnl[crossing]*(kinks[crossing+1]-kinks[crossing])/(pnl[crossing+1]-pnl[crossing]))
+        # Beyond the highest strike the PnL is linear with the net call quantity as slope
+        slope = self.quantity[self.is_call].sum()
+        if slope != 0 and pnl[-1] != 0 and -pnl[-1]/slope > 0:
+            roots.append(kinks[-1]-pnl[-1]/slope)
+        return np.sort(np.array(roots, dtype=float))
+
+    def expiry_profit_range(self):
+        """
+        (max loss, max profit) of the book at expiry when all legs share it; unbounded sides are -inf/inf
+        """
+        if not self._single_expiry():
+            raise ValueError("the expiry PnL is only piecewise linear when all legs share the same expiry")
+        kinks = np.unique(np.concatenate([[0.0], self.strike_price]))
+        pnl = self.payoff(kinks)-self.cost
+        slope = self.quantity[self.is_call].sum()
+        max_profit = np.inf if slope > 0 else pnl.max()
+        max_loss = -np.inf if slope < 0 else pnl.min()
+        return float(max_loss), float(max_profit)
+
+    # ---------------------------------------------------------------- common books ----------------------------------------------------------------
+
+    @classmethod
+    def single(cls, option_type, strike_price, spot_price, quantity=1.0, time_to_maturity=1.0, premium=None, **market):
+        return cls([Leg(option_type, strike_price, quantity, time_to_maturity, premium)], spot_price, **market)
+
+    @classmethod
+    def vertical_spread(cls, option_type, lower_strike, upper_strike, spot_price, time_to_maturity=1.0, quantity=1.0, **market):
+        """
+        Bull spread for quantity > 0: long the lower strike, short the upper one
+        """
+        return cls([Leg(option_type, lower_strike, quantity, time_to_maturity), Leg(option_type, upper_strike, -quantity, time_to_maturity)],
+                   spot_price, **market)
+
+    @classmethod
+    def straddle(cls, strike_price, spot_price, time_to_maturity=1.0, quantity=1.0, **market):
+        return cls([Leg("Call", strike_price, quantity, time_to_maturity), Leg("Put", strike_price, quantity, time_to_maturity)],
+                   spot_price, **market)
+
+    @classmethod
+    def strangle(cls, put_strike, call_strike, spot_price, time_to_maturity=1.0, quantity=1.0, **market):
+        return cls([Leg("Put", put_strike, quantity, time_to_maturity), Leg("Call", call_strike, quantity, time_to_maturity)],
+                   spot_price, **market)
+
+    @classmethod
+    def butterfly(cls, option_type, strikes, spot_price, time_to_maturity=1.0, quantity=1.0, **market):
+        """
+        Long the wings and short twice the body, strikes being (low, middle, high)
+        """
+        low, middle, high = strikes
+        return cls([Leg(option_type, low, quantity, time_to_maturity), Leg(option_type, middle, -2*quantity, time_to_maturity),
+                    Leg(option_type, high, quantity, time_to_maturity)], spot_price, **market)
+
+    @classmethod
+    def iron_condor(cls, strikes, spot_price, time_to_maturity=1.0, quantity=1.0, **market):
+        """
+        Short put spread plus short call spread, strikes being (long put, short put, short call, long call)
+        """
+        long_put, short_put, short_call, long_call = strikes
+        return cls([Leg("Put", long_put, quantity, time_to_maturity), Leg("Put", short_put, -quantity, time_to_maturity),
+                    Leg("Call", short_call, -quantity, time_to_maturity), Leg("Call", long_call, quantity, time_to_maturity)],
+                   spot_price, **market)
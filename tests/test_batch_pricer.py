@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+import batch_pricer
+from black_scholes import black_scholes_pricing_batch
+from greeks import black_scholes_greeks
+
+
+def portfolio(rows=1000):
+    rng = np.random.default_rng(8)
+    return pd.DataFrame({"trade_id": np.arange(rows), "spot_price": rng.uniform(80, 120, rows), "strike_price": rng.uniform(80, 120, rows),
+                         "risk_free_rate": 0.03, "time_to_maturity": rng.uniform(0.1, 2, rows), "volatility": rng.uniform(0.1, 0.5, rows),
+                         "option_type": np.where(rng.random(rows) < 0.5, "Call", "Put")})
+
+
+def test_csv_to_parquet_round_trip(tmp_path):
+    contracts = portfolio()
+    contracts.to_csv(tmp_path/"portfolio.csv", index=False)
+    rows, _ = batch_pricer.price_portfolio_file(tmp_path/"portfolio.csv", tmp_path/"priced.parquet", greeks=True, chunk_rows=300)
+    priced = pd.read_parquet(tmp_path/"priced.parquet")
+    assert rows == len(priced) == len(contracts)
+    pd.testing.assert_frame_equal(priced[contracts.columns], contracts)
+    parameters = [contracts[column].to_numpy() for column in ["spot_price", "strike_price", "risk_free_rate", "time_to_maturity", "volatility"]]
+    np.testing.assert_allclose(priced["price"], black_scholes_pricing_batch(*parameters, contracts["option_type"].to_numpy()))
+    greeks = black_scholes_greeks(*parameters, option_type=contracts["option_type"].to_numpy())
+    np.testing.assert_allclose(priced["delta"], greeks["delta"])
+
+
+def test_monte_carlo_chunks_are_reproducible(tmp_path):
+    contracts = portfolio(200)
+    pd.concat([contracts, contracts], ignore_index=True).to_parquet(tmp_path/"portfolio.parquet")
+    settings = {"model": "monte_carlo", "chunk_rows": 200, "number_of_simulation": 2000}
+    batch_pricer.price_portfolio_file(tmp_path/"portfolio.parquet", tmp_path/"first.parquet", seed=5, **settings)
+    batch_pricer.price_portfolio_file(tmp_path/"portfolio.parquet", tmp_path/"second.parquet", seed=5, **settings)
+    batch_pricer.price_portfolio_file(tmp_path/"portfolio.parquet", tmp_path/"other.parquet", seed=6, **settings)
+    first, second, other = (pd.read_parquet(tmp_path/f"{name}.parquet") for name in ("first", "second", "other"))
+    pd.testing.assert_frame_equal(first, second)
+    assert not np.array_equal(first["price"], other["price"])
+    # The two chunks hold the same contracts but draw from their own streams
+    assert not np.array_equal(first["price"].iloc[:200], first["price"].iloc[200:])
+
+
+def test_missing_columns_are_reported(tmp_path):
+    portfolio().drop(columns="volatility").to_csv(tmp_path/"portfolio.csv", index=False)
+    with pytest.raises(ValueError, match="volatility"):
+        batch_pricer.price_portfolio_file(tmp_path/"portfolio.csv", tmp_path/"priced.csv")
+
+
+@pytest.mark.parametrize("model", batch_pricer.MODELS)
+def test_empty_portfolio_gives_an_empty_file_with_the_output_schema(tmp_path, model):
+    portfolio(10).to_parquet(tmp_path/"portfolio.parquet")
+    portfolio(10).iloc[:0].to_parquet(tmp_path/"empty.parquet")
+    batch_pricer.price_portfolio_file(tmp_path/"portfolio.parquet", tmp_path/"priced.parquet", model, greeks=True, number_of_simulation=100)
+    rows, _ = batch_pricer.price_portfolio_file(tmp_path/"empty.parquet", tmp_path/"priced_empty.parquet", model, greeks=True)
+    priced, empty = pd.read_parquet(tmp_path/"priced.parquet"), pd.read_parquet(tmp_path/"priced_empty.parquet")
+    assert rows == len(empty) == 0
+    pd.testing.assert_series_equal(empty.dtypes, priced.dtypes)
+
+
+def test_binomial_chunks_fit_the_memory_budget():
+    assert batch_pricer.chunk_rows_for("black_scholes") == batch_pricer.DEFAULT_CHUNK_ROWS
+    rows = batch_pricer.chunk_rows_for("binomial", memory_budget=64*2**20, steps=1000)
+    assert rows*1001*batch_pricer.BINOMIAL_BYTES_PER_NODE <= 64*2**20 < (rows+1)*1001*batch_pricer.BINOMIAL_BYTES_PER_NODE
+    assert batch_pricer.chunk_rows_for("binomial", memory_budget=1, steps=1000) == 1
+
+
+def test_summary_starts_on_its_own_line(tmp_path, capsys):
+    portfolio(100).to_csv(tmp_path/"portfolio.csv", index=False)
+    batch_pricer.main([str(tmp_path/"portfolio.csv"), str(tmp_path/"priced.csv"), "--chunk-rows", "40"])
+    progress, summary = capsys.readouterr().err.rstrip("\n").split("\n")
+    assert progress.startswith("\r") and progress.endswith("rows/s")
+    assert summary.startswith("priced 100 rows")
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+import binomial
+from black_scholes import black_scholes_pricing_batch
+
+SPOT_PRICES = np.geomspace(5, 2000, 40)
+
+
+def reference_tree(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, steps, option_type, exercise_style):
+    """
+    Scalar Cox-Ross-Rubinstein backward induction, one contract at a time
+    """
+    dt = time_to_maturity/steps
+    u = np.exp(volatility*np.sqrt(dt))
+    d = 1/u
+    p = (np.exp(risk_free_rate*dt)-d)/(u-d)
+    discount = np.exp(-risk_free_rate*dt)
+    sign = 1 if option_type == "Call" else -1
+    values = [max(sign*(spot_price*u**j*d**(steps-j)-strike_price), 0) for j in range(steps+1)]
+    for i in range(steps-1, -1, -1):
+        values = [discount*(p*values[j+1]+(1-p)*values[j]) for j in range(i+1)]
+        if exercise_style == "American":
+            values = [max(value, sign*(spot_price*u**j*d**(i-j)-strike_price)) for j, value in enumerate(values)]
+    return values[0]
+
+
+@pytest.mark.parametrize("exercise_style", ["European", "American"])
+def test_batch_matches_the_scalar_tree(exercise_style):
+    rng = np.random.default_rng(2)
+    spot, strike = rng.uniform(70, 130, 12), rng.uniform(70, 130, 12)
+    rate, maturity, volatility = rng.uniform(0, 0.1, 12), rng.uniform(0.1, 2, 12), rng.uniform(0.1, 0.6, 12)
+    option_type = np.where(np.arange(12) % 2 == 0, "Call", "Put")
+    batch = binomial.binomial_pricing_batch(spot, strike, rate, maturity, volatility, 60, option_type, exercise_style)
+    reference = [reference_tree(*contract, 60, kind, exercise_style) for *contract, kind in zip(spot, strike, rate, maturity, volatility, option_type)]
+    np.testing.assert_allclose(batch, reference, rtol=1e-10, atol=1e-10)
+
+
+def test_american_exercise_premium():
+    european = binomial.binomial_pricing_batch(100, [90, 100, 110], 0.05, 1.0, 0.3, 200, "Put")
+    american = binomial.binomial_pricing_batch(100, [90, 100, 110], 0.05, 1.0, 0.3, 200, "Put", "American")
+    assert np.all(american > european)
+    # Without dividends an American call is never exercised early
+    np.testing.assert_allclose(binomial.binomial_pricing_batch(100, [90, 110], 0.05, 1.0, 0.3, 200, "Call", "American"),
+                               binomial.binomial_pricing_batch(100, [90, 110], 0.05, 1.0, 0.3, 200, "Call"), rtol=1e-10)
+
+
+@pytest.mark.parametrize("method, tolerance", [("CRR", 0.05), ("Tian", 0.05), ("Leisen-Reimer", 1e-3), ("BBSR", 1e-3)])
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_lattices_converge_to_black_scholes(method, tolerance, option_type):
+    strike = np.linspace(80, 120, 9)
+    prices = binomial.binomial_pricing_batch(100, strike, 0.05, 1.0, 0.25, 201, option_type, method=method)
+    reference = black_scholes_pricing_batch(100, strike, 0.05, 1.0, 0.25, option_type)
+    np.testing.assert_allclose(prices, reference, atol=tolerance)
+
+
+@pytest.mark.parametrize("exercise_style", ["European", "American"])
+def test_leisen_reimer_far_from_the_strike_is_finite(exercise_style):
+    # Peizer-Pratt probabilities round to 0 or 1 there; those contracts must fall back to CRR
+    prices = binomial.binomial_pricing_batch(SPOT_PRICES, 100, 0.05, 1.0, 0.2, 101, "Put", exercise_style, "Leisen-Reimer")
+    assert np.all(np.isfinite(prices))
+    assert np.all(prices >= np.maximum(100*np.exp(-0.05)-SPOT_PRICES, 0)-1e-8)
+    if exercise_style == "European":
+        np.testing.assert_allclose(prices, black_scholes_pricing_batch(SPOT_PRICES, 100, 0.05, 1.0, 0.2, "Put"), atol=1e-3)
+
+
+def test_leisen_reimer_uses_odd_steps():
+    even = binomial.binomial_pricing(100, 100, 0.05, 1.0, 0.2, 100, method="Leisen-Reimer")
+    odd = binomial.binomial_pricing(100, 100, 0.05, 1.0, 0.2, 101, method="Leisen-Reimer")
+    assert even == odd
+
+
+def test_unknown_lattice_is_rejected():
+    with pytest.raises(ValueError):
+        binomial.binomial_pricing_batch(100, 100, 0.05, 1.0, 0.2, method="Trinomial")
+
+
+@pytest.mark.parametrize("method", binomial.LATTICE_METHODS)
+def test_scalar_inputs_give_a_roundable_scalar(method):
+    # The app rounds the point value of the selected model
+    price = binomial.binomial_pricing_batch(100, 100, 0.05, 1.0, 0.2, method=method)
+    assert np.ndim(price) == 0
+    assert round(price, 2) == pytest.approx(price, abs=0.005)
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from black_scholes import black_scholes_pricing_batch, black_scholes_pricing_call, black_scholes_pricing_put
+
+rng = np.random.default_rng(0)
+SPOT, STRIKE = rng.uniform(50, 150, 200), rng.uniform(50, 150, 200)
+RATE, MATURITY, VOLATILITY = rng.uniform(0, 0.1, 200), rng.uniform(0.01, 3, 200), rng.uniform(0.05, 1, 200)
+
+
+@pytest.mark.parametrize("option_type, scalar_pricer", [("Call", black_scholes_pricing_call), ("Put", black_scholes_pricing_put)])
+def test_batch_matches_the_scalar_pricers(option_type, scalar_pricer):
+    batch = black_scholes_pricing_batch(SPOT, STRIKE, RATE, MATURITY, VOLATILITY, option_type)
+    scalar = [scalar_pricer(*contract) for contract in zip(SPOT, STRIKE, RATE, MATURITY, VOLATILITY)]
+    np.testing.assert_allclose(batch, scalar, rtol=1e-12, atol=1e-12)
+
+
+def test_mixed_option_types_and_put_call_parity():
+    option_type = np.where(np.arange(SPOT.size) % 2 == 0, "Call", "Put")
+    mixed = black_scholes_pricing_batch(SPOT, STRIKE, RATE, MATURITY, VOLATILITY, option_type)
+    calls = black_scholes_pricing_batch(SPOT, STRIKE, RATE, MATURITY, VOLATILITY, "Call")
+    puts = black_scholes_pricing_batch(SPOT, STRIKE, RATE, MATURITY, VOLATILITY, "Put")
+    np.testing.assert_allclose(mixed, np.where(option_type == "Call", calls, puts))
+    np.testing.assert_allclose(calls-puts, SPOT-STRIKE*np.exp(-RATE*MATURITY), atol=1e-10)
+
+
+def test_broadcasting_and_scalars():
+    surface = black_scholes_pricing_batch(100, 100, 0.05, np.linspace(0.1, 2, 5)[:, None], np.linspace(0.1, 0.5, 4))
+    assert surface.shape == (5, 4)
+    assert surface[2, 1] == pytest.approx(black_scholes_pricing_call(100, 100, 0.05, np.linspace(0.1, 2, 5)[2], np.linspace(0.1, 0.5, 4)[1]))
+    assert np.ndim(black_scholes_pricing_batch(100, 100, 0.05, 1, 0.2)) == 0
+
+
+def test_expired_and_zero_volatility_contracts_are_worth_discounted_intrinsic():
+    prices = black_scholes_pricing_batch(100, [90, 110, 90, 110], 0.05, [0, 0, 1, 1], [0.2, 0.2, 0, 0], ["Call", "Put", "Call", "Put"])
+    np.testing.assert_allclose(prices, [10, 10, 100-90*np.exp(-0.05), 110*np.exp(-0.05)-100])
+
+
+def test_unknown_option_type_is_rejected():
+    with pytest.raises(ValueError):
+        black_scholes_pricing_batch(100, 100, 0.05, 1, 0.2, "Straddle")
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from scipy.linalg import solve_banded
+import finite_difference
+from binomial import binomial_pricing_batch
+from black_scholes import black_scholes_pricing_batch
+from greeks import black_scholes_greeks
+
+STRIKES = np.linspace(70, 130, 13)
+
+
+def test_thomas_solve_matches_a_banded_solve():
+    rng = np.random.default_rng(1)
+    rows, systems = 50, 4
+    lower, upper = rng.uniform(-1, 0, (rows, systems)), rng.uniform(-1, 0, (rows, systems))
+    diagonal = 3+rng.uniform(0, 1, (rows, systems))    # diagonally dominant
+    rhs = rng.normal(size=(rows, systems))
+    solution = finite_difference.thomas_solve(lower, diagonal, upper, rhs)
+    for system in range(systems):
+        banded = np.stack([np.r_[0, upper[:-1, system]], diagonal[:, system], np.r_[lower[1:, system], 0]])
+        np.testing.assert_allclose(solution[:, system], solve_banded((1, 1), banded, rhs[:, system]))
+
+
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_european_slice_matches_black_scholes(option_type):
+    result = finite_difference.finite_difference_solve(STRIKES, 0.03, 1.0, 0.25, option_type, spot_price=100)
+    np.testing.assert_allclose(result.at(100), black_scholes_pricing_batch(100, STRIKES, 0.03, 1.0, 0.25, option_type), atol=5e-3)
+    spots = np.array([85.0, 100.0, 115.0])
+    np.testing.assert_allclose(result.at(spots), black_scholes_pricing_batch(spots[:, None], STRIKES, 0.03, 1.0, 0.25, option_type), atol=5e-3)
+    greeks = black_scholes_greeks(100, STRIKES, 0.03, 1.0, 0.25, option_type)
+    np.testing.assert_allclose(result.at(100, "delta"), greeks["delta"], atol=1e-3)
+    np.testing.assert_allclose(result.at(100, "gamma"), greeks["gamma"], atol=1e-4)
+    np.testing.assert_allclose(result.at(100, "theta"), greeks["theta"], atol=2e-2)
+
+
+def test_per_strike_volatilities():
+    volatility = np.linspace(0.2, 0.35, STRIKES.size)
+    result = finite_difference.finite_difference_solve(STRIKES, 0.03, 1.0, volatility, "Call", spot_price=100)
+    np.testing.assert_allclose(result.at(100), black_scholes_pricing_batch(100, STRIKES, 0.03, 1.0, volatility), atol=5e-3)
+
+
+@pytest.mark.parametrize("american_method", finite_difference.AMERICAN_METHODS)
+def test_american_put_matches_a_fine_tree(american_method):
+    strikes = np.array([80.0, 100.0, 120.0])
+    result = finite_difference.finite_difference_solve(strikes, 0.05, 1.0, 0.3, "Put", "American", spot_price=100,
+                                                       space_steps=200, time_steps=100, american_method=american_method)
+    reference = binomial_pricing_batch(100, strikes, 0.05, 1.0, 0.3, 2001, "Put", "American")
+    np.testing.assert_allclose(result.at(100), reference, atol=1e-2)
+    assert np.all(result.prices >= np.maximum(strikes-result.spot_grid[:, None], 0)-1e-9)
+
+
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_short_and_long_maturities_in_one_batch(option_type):
+    # Maturities far apart must not share one coarse solve
+    maturity = np.array([1/365, 0.01, 0.02, 0.1, 1.0, 5.0])
+    prices = finite_difference.finite_difference_pricing_batch(100, 100, 0.05, maturity, 0.2, option_type)
+    reference = black_scholes_pricing_batch(100, 100, 0.05, maturity, 0.2, option_type)
+    np.testing.assert_allclose(prices, reference, rtol=2e-3)
+
+
+def test_surface_matches_black_scholes():
+    volatility, maturity = np.meshgrid(np.linspace(0.1, 0.8, 8), np.linspace(0.01, 5, 12))
+    prices = finite_difference.finite_difference_pricing_batch(100, 105, 0.03, maturity, volatility, "Put")
+    reference = black_scholes_pricing_batch(100, 105, 0.03, maturity, volatility, "Put")
+    np.testing.assert_allclose(prices, reference, rtol=2e-3, atol=2e-2)
+
+
+def test_expired_contracts_and_scalars():
+    np.testing.assert_allclose(finite_difference.finite_difference_pricing_batch(100, [90, 110], 0.05, 0.0, 0.2, ["Call", "Put"]), [10, 10])
+    price = finite_difference.finite_difference_pricing(100, 100, 0.05, 0.5, 0.2, "Put", "American")
+    assert isinstance(price, float) and price > black_scholes_pricing_batch(100, 100, 0.05, 0.5, 0.2, "Put")
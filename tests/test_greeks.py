@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from black_scholes import black_scholes_pricing_batch, black_scholes_pricing_call, black_scholes_pricing_put
+from greeks import GREEK_COLUMNS, PORTFOLIO_COLUMNS, black_scholes_greeks, portfolio_greeks
+
+CONTRACTS = [(100, 90, 0.05, 0.5, 0.2), (100, 100, 0.01, 1.0, 0.3), (80, 120, 0.03, 2.0, 0.5), (150, 100, 0.0, 0.1, 0.15)]
+
+
+def scalar_greeks(spot_price, strike_price, risk_free_rate, time_to_maturity, volatility, option_type):
+    """
+    Central differences of the scalar pricers
+    """
+    pricer = black_scholes_pricing_call if option_type == "Call" else black_scholes_pricing_put
+
+    def price(S=spot_price, r=risk_free_rate, T=time_to_maturity, sigma=volatility):
+        return pricer(S, strike_price, r, T, sigma)
+
+    h_spot, h_vol, h_time, h_rate = 1e-3*spot_price, 1e-4, 1e-5, 1e-5
+    return {
+        "price": price(),
+        "delta": (price(S=spot_price+h_spot)-price(S=spot_price-h_spot))/(2*h_spot),
+        "gamma": (price(S=spot_price+h_spot)-2*price()+price(S=spot_price-h_spot))/h_spot**2,
+        "vega": (price(sigma=volatility+h_vol)-price(sigma=volatility-h_vol))/(2*h_vol),
+        "theta": -(price(T=time_to_maturity+h_time)-price(T=time_to_maturity-h_time))/(2*h_time),
+        "rho": (price(r=risk_free_rate+h_rate)-price(r=risk_free_rate-h_rate))/(2*h_rate),
+        "vanna": (price(S=spot_price+h_spot, sigma=volatility+h_vol)-price(S=spot_price+h_spot, sigma=volatility-h_vol)
+                  - price(S=spot_price-h_spot, sigma=volatility+h_vol)+price(S=spot_price-h_spot, sigma=volatility-h_vol))/(4*h_spot*h_vol),
+        "volga": (price(sigma=volatility+h_vol)-2*price()+price(sigma=volatility-h_vol))/h_vol**2,
+    }
+
+
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_greeks_match_finite_differences_of_the_scalar_pricers(option_type):
+    greeks = black_scholes_greeks(*np.array(CONTRACTS).T, option_type)
+    assert list(greeks.columns) == GREEK_COLUMNS
+    for row, contract in enumerate(CONTRACTS):
+        reference = scalar_greeks(*contract, option_type)
+        for name in GREEK_COLUMNS:
+            assert greeks.loc[row, name] == pytest.approx(reference[name], rel=1e-3, abs=1e-3), name
+
+
+def test_portfolio_greeks_scale_by_quantity():
+    portfolio = pd.DataFrame(CONTRACTS, columns=PORTFOLIO_COLUMNS[:5]).assign(option_type=["Call", "Put", "Call", "Put"], quantity=[1, -2, 3, 0])
+    greeks = portfolio_greeks(portfolio)
+    unit = black_scholes_greeks(*(portfolio[column].to_numpy() for column in PORTFOLIO_COLUMNS))
+    pd.testing.assert_frame_equal(greeks, unit.mul(portfolio["quantity"].to_numpy(), axis=0))
+    with pytest.raises(ValueError):
+        portfolio_greeks(portfolio.drop(columns="volatility"))
+
+
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_expired_and_zero_volatility_contracts_use_the_intrinsic_limit(option_type):
+    spot = np.array([80.0, 120.0, 80.0, 120.0])
+    maturity, volatility = np.array([0.0, 0.0, 1.0, 1.0]), np.array([0.2, 0.2, 0.0, 0.0])
+    greeks = black_scholes_greeks(spot, 100, 0.05, maturity, volatility, option_type)
+    assert np.all(np.isfinite(greeks.to_numpy()))
+    np.testing.assert_allclose(greeks["price"], black_scholes_pricing_batch(spot, 100, 0.05, maturity, volatility, option_type))
+    np.testing.assert_array_equal(greeks["delta"], [0, 1, 0, 1] if option_type == "Call" else [-1, 0, -1, 0])
+    assert np.all(greeks[["gamma", "vega", "vanna", "volga"]].to_numpy() == 0)
+    assert np.all(greeks.loc[:1, ["theta", "rho"]].to_numpy() == 0)
+    # With zero volatility the Greeks are the limits of the closed forms as the volatility vanishes
+    limit = black_scholes_greeks(spot[2:], 100, 0.05, 1.0, 1e-6, option_type)
+    np.testing.assert_allclose(greeks.iloc[2:].to_numpy(), limit.to_numpy(), atol=1e-6)
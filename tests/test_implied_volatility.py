@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from scipy.optimize import brentq
+from black_scholes import black_scholes_pricing_batch, black_scholes_pricing_call, black_scholes_pricing_put
+from implied_volatility import implied_volatility
+
+rng = np.random.default_rng(3)
+SPOT, STRIKE = 100.0, rng.uniform(40, 200, 300)
+RATE, MATURITY, VOLATILITY = 0.03, rng.uniform(0.02, 3, 300), rng.uniform(0.05, 2.0, 300)
+
+
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_round_trip_over_a_chain(option_type):
+    prices = black_scholes_pricing_batch(SPOT, STRIKE, RATE, MATURITY, VOLATILITY, option_type)
+    volatility, converged = implied_volatility(prices, SPOT, STRIKE, RATE, MATURITY, option_type)
+    # Quotes whose time value is below the float resolution of the price carry no volatility information
+    sign = 1 if option_type == "Call" else -1
+    informative = prices-np.maximum(sign*(SPOT-STRIKE*np.exp(-RATE*MATURITY)), 0) > 1e-8*SPOT
+    assert converged[informative].all()
+    np.testing.assert_allclose(volatility[informative], VOLATILITY[informative], rtol=1e-6)
+
+
+@pytest.mark.parametrize("option_type, scalar_pricer", [("Call", black_scholes_pricing_call), ("Put", black_scholes_pricing_put)])
+def test_matches_a_scalar_root_finder(option_type, scalar_pricer):
+    # (price, strike, maturity) inside the no-arbitrage bounds of both calls and puts
+    quotes = [(5.0, 100, 0.5), (15.0, 90, 1.0), (6.0, 105, 0.25), (25.0, 120, 2.0)]
+    volatility, _ = implied_volatility([price for price, _, _ in quotes], SPOT, [strike for _, strike, _ in quotes], RATE,
+                                       [maturity for _, _, maturity in quotes], option_type)
+    for (price, strike, maturity), estimate in zip(quotes, volatility):
+        reference = brentq(lambda sigma: scalar_pricer(SPOT, strike, RATE, maturity, sigma)-price, 1e-6, 10, xtol=1e-14)
+        assert estimate == pytest.approx(reference, rel=1e-8)
+
+
+def test_prices_outside_the_no_arbitrage_bounds_have_no_solution():
+    volatility, converged = implied_volatility([-1.0, 0.0, 150.0, 5.0], SPOT, 100, RATE, [1.0, 1.0, 1.0, 0.0])
+    assert np.isnan(volatility).all() and not converged.any()
+    volatility, converged = implied_volatility(10.0, SPOT, 100, RATE, 1.0)
+    assert np.ndim(volatility) == 0 and converged
+
+
+@pytest.mark.parametrize("true_volatility", [12.0, 1e-7])
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_volatilities_outside_the_bounds_have_no_solution(true_volatility, option_type):
+    # At-the-money forward, where even a 1e-7 volatility gives a positive price
+    strike = SPOT*np.exp(RATE)
+    price = black_scholes_pricing_batch(SPOT, strike, RATE, 1.0, true_volatility, option_type)
+    volatility, converged = implied_volatility(price, SPOT, strike, RATE, 1.0, option_type)
+    assert np.isnan(volatility) and not converged
+    volatility, converged = implied_volatility(price, SPOT, strike, RATE, 1.0, option_type, volatility_bounds=(1e-8, 20.0))
+    assert converged and volatility == pytest.approx(true_volatility, rel=1e-4)
@@ -0,0 +1,38 @@
+import matplotlib
+import pytest
+import instrumentation
+import pnl_chart
+
+matplotlib.use("Agg")
+
+
+@pytest.fixture
+def recording():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_spans_and_counters(recording):
+    with instrumentation.span("outer"):
+        with instrumentation.span("inner"):
+            pass
+    instrumentation.count("contracts", 10)
+    instrumentation.count("contracts", 5)
+    summary = instrumentation.export()
+    assert {name: span["count"] for name, span in summary["spans"].items()} == {"inner": 1, "outer": 1}
+    assert summary["counters"] == {"contracts": 15}
+
+
+def test_disabled_instrumentation_records_nothing():
+    instrumentation.reset()
+    with instrumentation.span("ignored"):
+        instrumentation.count("ignored")
+    assert instrumentation.export()["spans"] == {} and instrumentation.export()["counters"] == {}
+
+
+def test_each_pnl_chart_is_timed_once(recording):
+    pnl_chart.plot_payoff_diagram(100, 80, 120, premium=5, option_type="Long Call")
+    assert instrumentation.export()["spans"]["figure.pnl"]["count"] == 1
@@ -0,0 +1,185 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from cachetools import TTLCache
+import market_data
+from market_data import CachedStockData, HistoryStore
+
+
+class FakeTicker:
+    """
+    Local stand-in for yfinance.Ticker serving a synthetic daily history, optionally offline
+    """
+    def __init__(self, days=800, end="2026-10-16", tz="Europe/Paris"):
+        index = pd.bdate_range(end=end, periods=days, tz=tz)
+        close = np.linspace(100, 150, days)
+        self.prices = pd.DataFrame({"Open": close, "High": close*1.01, "Low": close*0.99, "Close": close, "Volume": 1000.0}, index=index)
+        self.info = {"displayName": "Fake Corp"}
+        self.calls = []
+        self.offline = False
+
+    def history(self, period=None, start=None):
+        self.calls.append(period if start is None else f"start={start}")
+        if self.offline:
+            raise ConnectionError("offline")
+        if start is not None:
+            return self.prices[self.prices.index >= pd.Timestamp(start, tz=self.prices.index.tz)]
+        if period == "max":
+            return self.prices
+        return self.prices[self.prices.index >= market_data.period_start(period, self.prices.index[-1])]
+
+    def add_bars(self, days):
+        index = pd.bdate_range(self.prices.index[-1]+pd.offsets.BDay(), periods=days, tz=self.prices.index.tz)
+        close = self.prices["Close"].iloc[-1]+np.arange(1, days+1)
+        new_bars = pd.DataFrame({"Open": close, "High": close*1.01, "Low": close*0.99, "Close": close, "Volume": 1000.0}, index=index)
+        self.prices = pd.concat([self.prices, new_bars])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def age_store(store, ticker, seconds):
+    """
+    Make every file stored for ticker look seconds old
+    """
+    for path in (store.cache_dir/ticker).iterdir():
+        timestamp = time.time()-seconds
+        os.utime(path, (timestamp, timestamp))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(tmp_path)
+
+
+def cached_stock(fake, store, clock=None, ttl=300):
+    memory_cache = TTLCache(maxsize=16, ttl=ttl, timer=clock or Clock())
+    return CachedStockData("fake", store=store, memory_cache=memory_cache, ttl=ttl, data=fake)
+
+
+def test_shorter_periods_are_sliced_from_one_download(store):
+    fake = FakeTicker()
+    stock = cached_stock(fake, store)
+    year = stock.history("1y")
+    month = stock.history("1mo")
+    assert fake.calls == ["1y"]
+    assert month.index[0] >= market_data.period_start("1mo", year.index[-1])
+    pd.testing.assert_frame_equal(month, year[year.index >= month.index[0]])
+    stock.get_spot_price()
+    assert fake.calls == ["1y"]
+
+
+def test_longer_period_is_downloaded(store):
+    fake = FakeTicker()
+    stock = cached_stock(fake, store)
+    stock.history("1mo")
+    assert len(stock.history("2y")) > len(stock.history("1y"))
+    assert fake.calls == ["1y", "2y"]
+
+
+def test_history_is_downloaded_again_after_the_ttl(store):
+    fake, clock = FakeTicker(), Clock()
+    stock = cached_stock(fake, store, clock)
+    stock.history("1y")
+    clock.now += 100
+    stock.history("1y")
+    assert fake.calls == ["1y"]
+    clock.now += 300
+    age_store(store, "FAKE", 400)
+    stock.history("1y")
+    assert fake.calls == ["1y", "1y"]
+
+
+def test_fresh_stored_history_skips_the_network(store):
+    fake = FakeTicker()
+    cached_stock(fake, store).history("1y")
+    fake.offline = True
+    other = cached_stock(fake, store)    # new process: empty memory cache, same Parquet store
+    pd.testing.assert_frame_equal(other.history("6mo"), cached_stock(FakeTicker(), HistoryStore(store.cache_dir)).history("6mo"))
+    assert fake.calls == ["1y"]
+
+
+def test_stale_stored_history_is_used_when_offline(store):
+    fake = FakeTicker()
+    expected = cached_stock(fake, store).history("1y")
+    age_store(store, "FAKE", 10_000)
+    fake.offline = True
+    history = cached_stock(fake, store).history("1y")
+    assert fake.calls == ["1y", "1y"]    # tried the network, then fell back to Parquet
+    pd.testing.assert_frame_equal(history, expected, check_freq=False)
+
+
+def test_offline_without_stored_history_raises(store):
+    fake = FakeTicker()
+    fake.offline = True
+    with pytest.raises(ConnectionError):
+        cached_stock(fake, store).history("1y")
+
+
+def test_display_name_is_stored(store):
+    fake = FakeTicker()
+    assert cached_stock(fake, store).get_display_name() == "Fake Corp"
+    fake.info = None    # any access would fail
+    assert cached_stock(fake, store).get_display_name() == "Fake Corp"
+
+
+@pytest.mark.parametrize("tz", ["UTC", "Europe/Paris", "Asia/Tokyo", "America/New_York"])
+def test_max_period_in_any_timezone(store, tz):
+    fake = FakeTicker(tz=tz)
+    stock = cached_stock(fake, store)
+    assert market_data.period_start("max", fake.prices.index[-1]) is None
+    assert len(stock.history("max")) == len(fake.prices)
+    assert len(stock.history("1y")) < len(fake.prices)
+    assert fake.calls == ["max"]
+    assert market_data.covers("max", "1y") and not market_data.covers("1y", "max")
+
+
+def test_incremental_update_only_downloads_new_bars(store):
+    fake = FakeTicker()
+    first = market_data.update_history("fake", "1y", store, ticker_factory=lambda ticker: fake)
+    fake.add_bars(5)
+    fake.prices.iloc[-6, fake.prices.columns.get_loc("Close")] += 0.5    # the last stored bar was an intraday snapshot
+    updated = market_data.update_history("fake", "1y", store, ticker_factory=lambda ticker: fake)
+    assert fake.calls[0] == "1y" and fake.calls[1].startswith("start=")
+    assert len(updated) == len(first)+5
+    assert updated.index.is_unique and updated.index.is_monotonic_increasing
+    assert updated["Close"].iloc[-6] == fake.prices["Close"].iloc[-6]
+    assert market_data.update_history("fake", "1y", store, ticker_factory=lambda ticker: fake, full_refresh=True).equals(
+        fake.history("1y"))
+
+
+def test_load_close_prices_aligns_tickers_and_falls_back(store):
+    fakes = {"AAA": FakeTicker(), "BBB": FakeTicker(days=100), "CCC": FakeTicker()}
+    fakes["CCC"].offline = True
+    with pytest.warns(UserWarning, match="CCC"):
+        prices = market_data.load_close_prices(["aaa", "bbb", "ccc"], "1y", store=store, ticker_factory=fakes.get)
+    assert list(prices.columns) == ["AAA", "BBB"]
+    assert prices["BBB"].isna().sum() == len(prices)-100
+    fakes["AAA"].offline = True
+    with pytest.warns(UserWarning, match="CCC"):
+        offline = market_data.load_close_prices(["aaa", "bbb", "ccc"], "max", store=store, ticker_factory=fakes.get)
+    pd.testing.assert_series_equal(offline["AAA"], prices["AAA"], check_freq=False)
+
+
+def test_interrupted_daily_save_keeps_the_previous_period(store, monkeypatch):
+    history = FakeTicker().prices
+    store.save_daily("fake", "1y", history.iloc[-252:])
+    replace = os.replace
+
+    def interrupted_replace(source, destination):
+        if str(destination).endswith("daily.json"):
+            raise KeyboardInterrupt
+        replace(source, destination)
+
+    monkeypatch.setattr(market_data.os, "replace", interrupted_replace)
+    with pytest.raises(KeyboardInterrupt):
+        store.save_daily("fake", "2y", history)
+    period, stored = store.load_daily("fake")
+    assert period == "1y" and stored.equals(history)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+import monte_carlo
+from black_scholes import black_scholes_pricing_batch
+
+STRIKES = np.array([80.0, 100.0, 120.0])
+
+
+@pytest.mark.parametrize("variance_reduction", monte_carlo.VARIANCE_REDUCTION_METHODS)
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_chunked_prices_agree_with_black_scholes(variance_reduction, option_type):
+    result = monte_carlo.monte_carlo_pricing_chunked(100, STRIKES, 0.05, 1.0, 0.25, 200_000, option_type, seed=11, chunk_size=50_000,
+                                                     variance_reduction=variance_reduction)
+    reference = black_scholes_pricing_batch(100, STRIKES, 0.05, 1.0, 0.25, option_type)
+    assert np.all(np.abs(result.price-reference) < 5*result.standard_error+1e-6)
+    assert np.all(result.confidence_interval[0] <= result.price) and np.all(result.price <= result.confidence_interval[1])
+
+
+def test_scalar_pricer_matches_black_scholes():
+    price = monte_carlo.monte_carlo_pricing(100, 100, 0.05, 1.0, 0.2, 200_000, "Put", seed=5)
+    assert price == pytest.approx(float(black_scholes_pricing_batch(100, 100, 0.05, 1.0, 0.2, "Put")), abs=0.05)
+
+
+def test_seeded_runs_are_reproducible():
+    first = monte_carlo.monte_carlo_pricing_chunked(100, STRIKES, 0.05, 1.0, 0.25, 100_000, seed=3, chunk_size=30_000)
+    second = monte_carlo.monte_carlo_pricing_chunked(100, STRIKES, 0.05, 1.0, 0.25, 100_000, seed=3, chunk_size=30_000)
+    other = monte_carlo.monte_carlo_pricing_chunked(100, STRIKES, 0.05, 1.0, 0.25, 100_000, seed=4, chunk_size=30_000)
+    np.testing.assert_array_equal(first.price, second.price)
+    assert not np.array_equal(first.price, other.price)
+    assert first.number_of_simulation == 100_000
+
+
+def test_standard_error_shrinks_with_paths_and_target_stops_early():
+    small = monte_carlo.monte_carlo_pricing_chunked(100, 100, 0.05, 1.0, 0.2, 10_000, seed=1, variance_reduction="none")
+    large = monte_carlo.monte_carlo_pricing_chunked(100, 100, 0.05, 1.0, 0.2, 160_000, seed=1, variance_reduction="none")
+    assert large.standard_error == pytest.approx(small.standard_error/4, rel=0.1)
+    targeted = monte_carlo.monte_carlo_pricing_chunked(100, 100, 0.05, 1.0, 0.2, 10_000_000, seed=1, chunk_size=10_000,
+                                                       target_standard_error=0.05, variance_reduction="none")
+    assert targeted.standard_error <= 0.05 and targeted.number_of_simulation < 10_000_000
+
+
+def test_parallel_result_does_not_depend_on_the_worker_count():
+    results = [monte_carlo.monte_carlo_pricing_parallel(100, STRIKES, 0.05, 1.0, 0.25, 250_000, "Put", seed=7, workers=workers,
+                                                        shard_size=60_000, chunk_size=25_000) for workers in (1, 2, 3)]
+    for result in results[1:]:
+        np.testing.assert_array_equal(result.price, results[0].price)
+        np.testing.assert_array_equal(result.standard_error, results[0].standard_error)
+    assert results[0].number_of_simulation == 250_000
+    reference = black_scholes_pricing_batch(100, STRIKES, 0.05, 1.0, 0.25, "Put")
+    assert np.all(np.abs(results[0].price-reference) < 5*results[0].standard_error)
+
+
+def test_every_variance_reduction_method_lowers_the_standard_error():
+    report = monte_carlo.variance_reduction_report(100, 105, 0.05, 1.0, 0.25, 100_000, "Call", seed=2).set_index("method")
+    reference = float(black_scholes_pricing_batch(100, 105, 0.05, 1.0, 0.25, "Call"))
+    assert np.all(np.abs(report["price"]-reference) < 5*report["standard_error"])
+    assert np.all(report["variance_reduction_factor"].drop("none") > 1.2)
+
+
+def test_merged_running_statistics_match_one_pass():
+    rng = np.random.default_rng(0)
+    samples, controls = rng.normal(size=(1000, 3)), rng.normal(size=(1000, 3))
+    samples += 0.5*controls
+    merged = monte_carlo.RunningStatistics((3,), with_control=True)
+    for start in range(0, 1000, 300):
+        merged.update(samples[start:start+300], controls[start:start+300])
+    whole = monte_carlo.RunningStatistics((3,), with_control=True)
+    whole.update(samples, controls)
+    np.testing.assert_allclose(merged.estimate(), whole.estimate())
+    np.testing.assert_allclose(merged.standard_error(), whole.standard_error())
+    np.testing.assert_allclose(merged.mean, samples.mean(axis=0))
+    np.testing.assert_allclose(merged.m2/(merged.count-1), samples.var(axis=0, ddof=1))
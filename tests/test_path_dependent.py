@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+import path_dependent
+from black_scholes import black_scholes_pricing_batch
+
+
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_geometric_asian_matches_its_closed_form(option_type):
+    result = path_dependent.asian_option_pricing(100, 100, 0.05, 1.0, 0.3, time_steps=52, number_of_simulation=200_000,
+                                                 option_type=option_type, averaging="geometric", seed=3)
+    reference = path_dependent.geometric_asian_closed_form(100, 100, 0.05, 1.0, 0.3, time_steps=52, option_type=option_type)
+    assert abs(result.price-reference) < 4*result.standard_error
+
+
+def test_geometric_closed_form_tends_to_black_scholes_with_one_date():
+    # With a single monitoring date the average is the terminal price
+    np.testing.assert_allclose(path_dependent.geometric_asian_closed_form(100, [90, 110], 0.05, 1.0, 0.3, time_steps=1),
+                               black_scholes_pricing_batch(100, [90, 110], 0.05, 1.0, 0.3))
+
+
+def test_arithmetic_control_variate_shrinks_the_error():
+    plain = path_dependent.asian_option_pricing(100, 100, 0.05, 1.0, 0.3, time_steps=52, number_of_simulation=50_000, seed=4,
+                                                control_variate=False)
+    controlled = path_dependent.asian_option_pricing(100, 100, 0.05, 1.0, 0.3, time_steps=52, number_of_simulation=50_000, seed=4)
+    assert controlled.standard_error < plain.standard_error/5
+    assert abs(controlled.price-plain.price) < 4*plain.standard_error
+
+
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+@pytest.mark.parametrize("direction, barrier", [("down", 85.0), ("up", 120.0)])
+def test_knock_in_plus_knock_out_is_the_vanilla(option_type, direction, barrier):
+    settings = dict(time_steps=50, number_of_simulation=100_000, option_type=option_type, seed=9)
+    knock_in = path_dependent.barrier_option_pricing(100, 100, 0.05, 1.0, 0.25, barrier, f"{direction}-and-in", **settings)
+    knock_out = path_dependent.barrier_option_pricing(100, 100, 0.05, 1.0, 0.25, barrier, f"{direction}-and-out", **settings)
+    vanilla = float(black_scholes_pricing_batch(100, 100, 0.05, 1.0, 0.25, option_type))
+    assert 0 < knock_out.price < vanilla
+    assert abs(knock_in.price+knock_out.price-vanilla) < 4*(knock_in.standard_error+knock_out.standard_error)
+
+
+def test_down_and_out_call_matches_the_continuous_formula():
+    # Merton / Reiner-Rubinstein closed form for a down-and-out call with the barrier below the strike
+    spot, strike, rate, maturity, sigma, barrier = 100.0, 100.0, 0.05, 1.0, 0.25, 90.0
+    exponent = 2*rate/sigma**2-1
+    mirrored = barrier**2/spot
+    reference = (black_scholes_pricing_batch(spot, strike, rate, maturity, sigma)
+                 - (barrier/spot)**exponent*black_scholes_pricing_batch(mirrored, strike, rate, maturity, sigma))
+    result = path_dependent.barrier_option_pricing(spot, strike, rate, maturity, sigma, barrier, "down-and-out", time_steps=50,
+                                                   number_of_simulation=200_000, seed=1)
+    assert abs(result.price-reference) < 4*result.standard_error
@@ -0,0 +1,63 @@
+import numpy as np
+from pricing_cache import PricingCache
+
+
+class CountingPricer:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, *parameters):
+        self.calls += 1
+        return np.asarray(parameters[0])*2
+
+
+def test_hits_and_misses():
+    cache, pricer = PricingCache(), CountingPricer()
+    assert cache.get_or_compute("black_scholes", pricer, (100.0, 0.2)) == 200.0
+    assert cache.get_or_compute("black_scholes", pricer, (100.0, 0.2)) == 200.0
+    cache.get_or_compute("binomial", pricer, (100.0, 0.2))
+    cache.get_or_compute("binomial", pricer, (100.0, 0.2), settings={"steps": 200})
+    assert pricer.calls == 3
+    assert cache.stats() == {"hits": 1, "misses": 3, "size": 3, "maxsize": 512, "hit_rate": 0.25}
+    cache.clear()
+    assert cache.stats()["size"] == 0 and cache.stats()["hits"] == 0
+
+
+def test_keys_are_rounded():
+    cache = PricingCache(decimals=6)
+    assert cache.key("model", (0.1+0.2, -0.0)) == cache.key("model", (0.3, 0.0))
+    assert cache.key("model", (0.3,)) != cache.key("model", (0.300001,))
+    grid = np.linspace(0.1, 0.5, 50)
+    assert cache.key("model", (grid,)) == cache.key("model", (grid+1e-12,))
+    assert cache.key("model", (grid,)) != cache.key("model", (grid[::-1],))
+    assert cache.key("model", (1.0,), {"steps": 100, "method": "CRR"}) == cache.key("model", (1.0,), {"method": "CRR", "steps": 100})
+
+
+def test_arrays_are_shared_read_only():
+    cache, pricer = PricingCache(), CountingPricer()
+    first = cache.get_or_compute("surface", pricer, (np.ones(4),))
+    second = cache.get_or_compute("surface", pricer, (np.ones(4),))
+    assert first is second and not first.flags.writeable
+
+
+def test_unseeded_stochastic_results_are_not_cached():
+    cache, pricer = PricingCache(), CountingPricer()
+    cached = cache.cached("monte_carlo", pricer, stochastic=True)
+    cached(1.0)
+    cached(1.0)
+    assert pricer.calls == 2 and cache.stats()["size"] == 0
+    seeded = cache.cached("monte_carlo", pricer, seed=42, stochastic=True)
+    seeded(1.0)
+    seeded(1.0)
+    cache.cached("monte_carlo", pricer, seed=43, stochastic=True)(1.0)
+    assert pricer.calls == 4
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache, pricer = PricingCache(maxsize=2), CountingPricer()
+    for value in (1.0, 2.0, 1.0, 3.0):
+        cache.get_or_compute("model", pricer, (value,))
+    cache.get_or_compute("model", pricer, (1.0,))
+    assert pricer.calls == 3
+    cache.get_or_compute("model", pricer, (2.0,))
+    assert pricer.calls == 4
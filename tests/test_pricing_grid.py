@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from black_scholes import black_scholes_pricing_batch
+from greeks import black_scholes_greeks
+from pricing_grid import PricingGrid
+
+
+@pytest.fixture(scope="module")
+def grid():
+    return PricingGrid.build(0.03, moneyness_range=(0.7, 1.4), volatility_range=(0.1, 0.6), maturity_range=(0.1, 2.0), shape=(31, 21, 21))
+
+
+def random_queries(size=2000):
+    rng = np.random.default_rng(6)
+    strike = rng.uniform(50, 150, size)
+    return strike*rng.uniform(0.72, 1.38, size), strike, rng.uniform(0.11, 1.9, size), rng.uniform(0.11, 0.59, size)
+
+
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_lookups_match_black_scholes(grid, option_type):
+    # Coarse grid: errors of a few 1e-3 of the strike
+    spot, strike, maturity, volatility = random_queries()
+    prices = grid.lookup(spot, strike, maturity, volatility, option_type)
+    assert np.all(np.abs(prices-black_scholes_pricing_batch(spot, strike, 0.03, maturity, volatility, option_type)) < 3e-3*strike)
+    values = grid.lookup(spot, strike, maturity, volatility, option_type, greeks=True)
+    reference = black_scholes_greeks(spot, strike, 0.03, maturity, volatility, option_type)
+    np.testing.assert_allclose(values["delta"], reference["delta"], atol=1e-2)
+    assert np.all(np.abs(values["vega"]-reference["vega"]) < 1e-2*strike)
+
+
+@pytest.mark.parametrize("option_type", ["Call", "Put"])
+def test_price_errors_are_within_the_reported_bounds(grid, option_type):
+    spot, strike, maturity, volatility = random_queries()
+    prices, bounds = grid.lookup(spot, strike, maturity, volatility, option_type, error_bounds=True)
+    errors = np.abs(prices-black_scholes_pricing_batch(spot, strike, 0.03, maturity, volatility, option_type))
+    assert np.all(errors <= bounds+1e-12)
+    assert np.max(bounds/strike) <= grid.max_errors().loc[option_type, "price"]+1e-15
+
+
+def test_greek_errors_are_within_the_reported_bounds(grid):
+    spot, strike, maturity, volatility = random_queries()
+    values, bounds = grid.lookup(spot, strike, maturity, volatility, "Put", greeks=True, error_bounds=True)
+    reference = black_scholes_greeks(spot, strike, 0.03, maturity, volatility, "Put")
+    for name in ["delta", "gamma", "vega"]:
+        assert np.all(np.abs(values[name]-reference[name]) <= bounds[name]+1e-12), name
+
+
+def test_queries_outside_the_grid_are_nan(grid):
+    prices = grid.lookup([100, 100, 100, 300], 100, [1.0, 5.0, 1.0, 1.0], [0.2, 0.2, 0.9, 0.2])
+    assert np.isfinite(prices[0]) and np.all(np.isnan(prices[1:]))
+
+
+def test_saved_grid_is_memory_mapped(grid, tmp_path):
+    grid.save(tmp_path)
+    loaded = PricingGrid.load(tmp_path)
+    assert isinstance(loaded.coefficients, np.memmap) and not loaded.coefficients.flags.writeable
+    assert loaded.lookup(105, 100, 0.5, 0.3) == grid.lookup(105, 100, 0.5, 0.3)
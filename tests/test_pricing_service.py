@@ -0,0 +1,86 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+from black_scholes import black_scholes_pricing_batch
+from pricing_service import PricingService, RequestBatcher, make_app, parse_request
+
+CONTRACT = {"spot_price": 100, "strike_price": 105, "risk_free_rate": 0.03, "time_to_maturity": 0.5, "volatility": 0.2}
+
+
+@pytest.mark.parametrize("settings", [{"model": "binomial", "method": "Trinomial"}, {"model": "binomial", "exercise_style": "Bermudan"},
+                                      {"model": "binomial", "steps": 0}, {"model": "monte_carlo", "variance_reduction": "importance"},
+                                      {"model": "heston"}, {"option_type": "Straddle"}])
+def test_invalid_requests_are_rejected(settings):
+    with pytest.raises(ValueError):
+        parse_request({**CONTRACT, **settings})
+
+
+def test_columns_are_broadcast():
+    model, settings, contracts, single = parse_request({"model": "binomial", "steps": "50", "contracts": {**CONTRACT, "strike_price": [90, 100, 110]}})
+    assert (model, settings, single) == ("binomial", {"steps": 50, "exercise_style": "European", "method": "CRR"}, False)
+    assert all(column.shape == (3,) for column in contracts)
+
+
+def test_concurrent_requests_share_a_batch():
+    async def run():
+        batcher = RequestBatcher(window=0.01)
+        requests = [parse_request({**CONTRACT, "strike_price": strike})[2] for strike in (90, 100, 110)]
+        results = await asyncio.gather(*(batcher.price("black_scholes", {}, contracts) for contracts in requests))
+        assert not batcher.tasks
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert batcher.stats()["count"] == 1
+    prices = np.concatenate([price for price, _ in results])
+    np.testing.assert_allclose(prices, black_scholes_pricing_batch(100, [90, 100, 110], 0.03, 0.5, 0.2))
+
+
+def test_seeded_monte_carlo_is_reproducible_under_load():
+    settings = {"number_of_simulation": 20_000, "variance_reduction": "control_variate", "seed": 7}
+    request = parse_request({**CONTRACT, "model": "monte_carlo", **settings})[2]
+
+    async def run(other_requests):
+        batcher = RequestBatcher(window=0.01)
+        others = [parse_request({**CONTRACT, "strike_price": strike, "model": "monte_carlo", **settings})[2] for strike in other_requests]
+        results = await asyncio.gather(*(batcher.price("monte_carlo", settings, contracts) for contracts in [*others, request, *others]))
+        return results[len(others)][0]
+
+    alone = asyncio.run(run([]))
+    np.testing.assert_array_equal(asyncio.run(run([80, 90, 110, 120])), alone)
+    np.testing.assert_array_equal(asyncio.run(run([95])), alone)
+
+
+def test_full_batch_cancels_its_window_timer():
+    async def run():
+        batcher = RequestBatcher(window=0.05, max_batch_size=2)
+        requests = [parse_request({**CONTRACT, "strike_price": strike})[2] for strike in (90, 100)]
+        await asyncio.gather(*(batcher.price("black_scholes", {}, contracts) for contracts in requests))
+        return batcher
+
+    batcher = asyncio.run(run())
+    assert batcher.stats()["count"] == 1 and not batcher.timers
+
+
+class PriceEndpointTest(AsyncHTTPTestCase):
+    def get_app(self):
+        self.service = PricingService(workers=1)
+        return make_app(self.service)
+
+    def tearDown(self):
+        super().tearDown()
+        self.service.shutdown()
+
+    def post(self, body):
+        return self.fetch("/price", method="POST", body=json.dumps(body), raise_error=False)
+
+    def test_binomial_price(self):
+        response = self.post({**CONTRACT, "model": "binomial", "steps": 101, "method": "Leisen-Reimer"})
+        assert response.code == 200
+        assert json.loads(response.body)["price"] == pytest.approx(float(black_scholes_pricing_batch(**CONTRACT)), abs=1e-3)
+
+    def test_invalid_lattice_is_a_client_error(self):
+        response = self.post({**CONTRACT, "model": "binomial", "method": "Trinomial"})
+        assert response.code == 400
+        assert "method must be one of" in json.loads(response.body)["error"]
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scenario
+from black_scholes import black_scholes_pricing_batch
+
+
+@pytest.fixture
+def portfolio():
+    rng = np.random.default_rng(12)
+    size = 20
+    return pd.DataFrame({"spot_price": 100.0, "strike_price": rng.uniform(80, 120, size), "risk_free_rate": 0.03,
+                         "time_to_maturity": rng.uniform(0.1, 1.5, size), "volatility": rng.uniform(0.15, 0.4, size),
+                         "option_type": np.where(rng.random(size) < 0.5, "Call", "Put"), "quantity": rng.integers(-5, 6, size)})
+
+
+@pytest.fixture
+def scenarios():
+    rng = np.random.default_rng(13)
+    size = 500
+    return pd.DataFrame({"spot_shock": rng.normal(0, 0.03, size), "volatility_shock": rng.normal(0, 0.02, size),
+                         "rate_shock": rng.normal(0, 0.002, size), "time_shift": 1/252})
+
+
+def brute_force_pnl(portfolio, scenarios):
+    """
+    Revalue the book one scenario and one position at a time
+    """
+    pnl = []
+    for _, shock in scenarios.iterrows():
+        total = 0.0
+        for _, position in portfolio.iterrows():
+            base = black_scholes_pricing_batch(position.spot_price, position.strike_price, position.risk_free_rate,
+                                               position.time_to_maturity, position.volatility, position.option_type)
+            shocked = black_scholes_pricing_batch(position.spot_price*(1+shock.spot_shock), position.strike_price,
+                                                  position.risk_free_rate+shock.rate_shock, position.time_to_maturity-shock.time_shift,
+                                                  position.volatility+shock.volatility_shock, position.option_type)
+            total += position.quantity*(shocked-base)
+        pnl.append(total)
+    return np.array(pnl)
+
+
+def test_revaluation_matches_a_brute_force_loop(portfolio, scenarios):
+    expected = brute_force_pnl(portfolio, scenarios.iloc[:100])
+    np.testing.assert_allclose(scenario.revalue(portfolio, scenarios.iloc[:100], block_size=300), expected, rtol=1e-10, atol=1e-10)
+
+
+def test_var_and_es_match_the_brute_force_pnl(portfolio, scenarios):
+    pnl = scenario.revalue(portfolio, scenarios)
+    expected = np.sort(brute_force_pnl(portfolio, scenarios))
+    # 500 scenarios: the 99% VaR sits between the 5th and 6th worst outcomes, the ES averages the 5 worst
+    assert -expected[5] <= scenario.value_at_risk(pnl, 0.99) <= -expected[4]
+    assert scenario.expected_shortfall(pnl, 0.99) == pytest.approx(-expected[:5].mean())
+    report, worst = scenario.risk_report(pnl)
+    assert report.loc[0.99, "value_at_risk"] == scenario.value_at_risk(pnl, 0.99)
+    np.testing.assert_allclose(np.sort(worst.to_numpy()), expected[:5])
+
+
+def test_taylor_expansion_is_close_for_small_shocks(portfolio, scenarios):
+    small = scenarios.assign(spot_shock=scenarios["spot_shock"]/3)
+    full = scenario.revalue(portfolio, small)
+    taylor = scenario.revalue(portfolio, small, method="taylor")
+    assert np.max(np.abs(taylor-full)) < 0.05*np.max(np.abs(full))
+
+
+def test_grid_scenarios_cover_every_combination():
+    scenarios = scenario.grid_scenarios([-0.1, 0.0, 0.1], [-0.05, 0.05], time_shift=0.1)
+    assert len(scenarios) == 6 and list(scenarios.columns) == scenario.SCENARIO_COLUMNS
+    assert set(zip(scenarios["spot_shock"], scenarios["volatility_shock"])) == {(s, v) for s in (-0.1, 0.0, 0.1) for v in (-0.05, 0.05)}
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from black_scholes import black_scholes_pricing_batch
+from strategy import Leg, Strategy
+
+
+def test_straddle_breakevens_are_strike_plus_and_minus_the_cost():
+    book = Strategy.straddle(100, spot_price=100, time_to_maturity=0.5, volatility=0.25)
+    cost = black_scholes_pricing_batch(100, 100, 0.02, 0.5, 0.25, ["Call", "Put"]).sum()
+    assert book.cost == pytest.approx(cost)
+    np.testing.assert_allclose(book.breakevens(), [100-cost, 100+cost])
+    assert book.expiry_profit_range() == (pytest.approx(-cost), np.inf)
+
+
+def test_iron_condor_breakevens_and_profit_range():
+    strikes = (85, 95, 105, 115)
+    book = Strategy.iron_condor(strikes, spot_price=100, time_to_maturity=0.25, volatility=0.3)
+    credit = -book.cost
+    assert credit > 0
+    np.testing.assert_allclose(book.breakevens(), [95-credit, 105+credit])
+    max_loss, max_profit = book.expiry_profit_range()
+    assert max_profit == pytest.approx(credit) and max_loss == pytest.approx(credit-10)
+
+
+def test_breakevens_before_expiry_are_roots_of_the_pnl():
+    book = Strategy.iron_condor((85, 95, 105, 115), spot_price=100, time_to_maturity=0.25, volatility=0.3)
+    roots = book.breakevens(elapsed_time=0.1)
+    assert len(roots) == 2
+    np.testing.assert_allclose(book.pnl(roots, 0.1), 0, atol=1e-9)
+
+
+def test_pnl_grid_matches_leg_by_leg_pricing():
+    legs = [Leg("Call", 100, 2, 0.5, premium=4.0), Leg("Put", 90, -1, 1.0, volatility=0.35)]
+    book = Strategy(legs, spot_price=100, risk_free_rate=0.03, volatility=0.25)
+    spots, times = np.linspace(60, 140, 9), np.array([0.0, 0.2, 0.5])
+    pnl = book.pnl(spots[None, :], times[:, None])
+    put_premium = black_scholes_pricing_batch(100, 90, 0.03, 1.0, 0.35, "Put")
+    expected = (2*black_scholes_pricing_batch(spots[None, :], 100, 0.03, np.maximum(0.5-times[:, None], 0), 0.25, "Call")
+                - black_scholes_pricing_batch(spots[None, :], 90, 0.03, 1.0-times[:, None], 0.35, "Put")-(2*4.0-put_premium))
+    np.testing.assert_allclose(pnl, expected)
+
+
+def test_empty_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        Strategy([], spot_price=100)
+
+
+def test_only_legs_without_a_premium_are_priced(monkeypatch):
+    priced = []
+
+    def pricer(*args):
+        priced.append(np.size(args[1]))
+        return black_scholes_pricing_batch(*args)
+
+    monkeypatch.setattr("strategy.black_scholes_pricing_batch", pricer)
+    Strategy.single("Put", 100, spot_price=100, premium=5.0)
+    assert priced == []
+    book = Strategy([Leg("Call", 100, premium=4.0), Leg("Put", 90)], spot_price=100)
+    assert priced == [1] and book.premium[0] == 4.0
+    assert book.premium[1] == pytest.approx(black_scholes_pricing_batch(100, 90, 0.02, 1.0, 0.2, "Put"))
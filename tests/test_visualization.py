@@ -0,0 +1,28 @@
+import matplotlib
+import numpy as np
+import pytest
+import visualization
+from black_scholes import black_scholes_pricing_batch
+
+matplotlib.use("Agg")
+
+
+def call_price(volatility, time_to_maturity):
+    return black_scholes_pricing_batch(100, 100, 0.03, time_to_maturity, volatility)
+
+
+def test_vectorized_surface_matches_the_cell_loop():
+    vectorized = visualization.compute_price_surface(0.1, 0.5, 0.1, 2.0, call_price, resolution=12, vectorized=True)
+    looped = visualization.compute_price_surface(0.1, 0.5, 0.1, 2.0, call_price, resolution=12)
+    for expected, result in zip(looped, vectorized):
+        np.testing.assert_allclose(result, expected)
+
+
+@pytest.mark.parametrize("resolution", [visualization.ANNOTATION_MAX_RESOLUTION, visualization.ANNOTATION_MAX_RESOLUTION+1])
+def test_heatmap_annotations_stop_above_the_threshold(resolution):
+    import matplotlib.pyplot as plt
+
+    _, heatmap = visualization.plot_3d_surface_and_heatmap(0.1, 0.5, 0.1, 2.0, call_price, "Call", resolution, vectorized=True)
+    annotations = len(heatmap.axes[0].texts)
+    plt.close(heatmap)
+    assert annotations == (resolution**2 if resolution <= visualization.ANNOTATION_MAX_RESOLUTION else 0)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+import volatility
+
+TICKERS = ["AAA", "BBB", "CCC"]
+
+
+@pytest.fixture
+def close():
+    rng = np.random.default_rng(4)
+    index = pd.bdate_range(end="2026-10-16", periods=300)
+    returns = rng.normal(0, [0.01, 0.02, 0.03], (300, 3))
+    prices = pd.DataFrame(100*np.exp(np.cumsum(returns, axis=0)), index=index, columns=TICKERS)
+    prices.iloc[:40, 2] = np.nan    # listed later
+    return prices
+
+
+def naive_rolling(close, window):
+    returns = np.log(close/close.shift(1)).to_numpy()
+    result = np.full(returns.shape, np.nan)
+    for row in range(window, len(returns)):
+        for column in range(returns.shape[1]):
+            sample = returns[row-window+1:row+1, column]
+            if not np.isnan(sample).any():
+                result[row, column] = np.std(sample, ddof=1)*np.sqrt(volatility.TRADING_DAYS)
+    return result
+
+
+def naive_ewma(close, decay):
+    # Missing bars count as unchanged prices, as in ewma_volatility
+    returns = np.nan_to_num(np.log(close/close.shift(1)).to_numpy())
+    result = np.full(returns.shape, np.nan)
+    variance = returns[1]**2
+    for row in range(1, len(returns)):
+        variance = decay*variance+(1-decay)*returns[row]**2
+        result[row] = np.sqrt(variance*volatility.TRADING_DAYS)
+    result[close.isna().to_numpy()] = np.nan
+    return result
+
+
+@pytest.mark.parametrize("window", [5, 21, 63])
+def test_rolling_volatility_matches_a_naive_loop(close, window):
+    np.testing.assert_allclose(volatility.rolling_volatility(close, window).to_numpy(), naive_rolling(close, window), rtol=1e-8)
+
+
+def test_ewma_volatility_matches_a_naive_loop(close):
+    np.testing.assert_allclose(volatility.ewma_volatility(close, 0.94).to_numpy(), naive_ewma(close, 0.94), rtol=1e-10)
+
+
+def test_single_ticker_series_gives_a_series(close):
+    result = volatility.rolling_volatility(close["AAA"])
+    assert isinstance(result, pd.Series)
+    np.testing.assert_allclose(result.to_numpy(), volatility.rolling_volatility(close)["AAA"].to_numpy())
+
+
+def test_incremental_updates_match_the_batch_estimators(close):
+    history, new_bars = close.iloc[:250], close.iloc[250:]
+    rolling = volatility.RollingVolatility(history, window=21)
+    ewma = volatility.EwmaVolatility(history, decay=0.94)
+    for _, bar in new_bars.iterrows():
+        rolling_result = rolling.update(bar.to_numpy())
+        ewma_result = ewma.update(bar.to_numpy())
+    np.testing.assert_allclose(rolling_result, volatility.rolling_volatility(close, 21).iloc[-1], rtol=1e-8)
+    np.testing.assert_allclose(ewma_result, volatility.ewma_volatility(close, 0.94).iloc[-1], rtol=1e-10)
+
+
+def test_close_to_close_uses_log_returns(close):
+    expected = np.log(close/close.shift(1)).std(ddof=0)*np.sqrt(volatility.TRADING_DAYS)
+    np.testing.assert_allclose(volatility.close_to_close_volatility(close), expected)
+
+
+def garch_prices(size=600, omega=1e-5, alpha=0.1, beta=0.85):
+    rng = np.random.default_rng(5)
+    variance, returns = np.full(2, omega/(1-alpha-beta)), np.empty((size, 2))
+    for row in range(size):
+        returns[row] = np.sqrt(variance)*rng.standard_normal(2)
+        variance = omega+alpha*returns[row]**2+beta*variance
+    return pd.DataFrame(100*np.exp(np.cumsum(returns, axis=0)), columns=TICKERS[:2])
+
+
+def test_incremental_garch_ignores_the_drift():
+    # A constant drift only moves the mean return, which the fit and the updates both remove
+    close = garch_prices()
+    history, new_bars = close.iloc[:500], close.iloc[500:]
+    trend = np.exp(0.01*np.arange(len(close)))[:, None]
+    plain = volatility.GarchVolatility(history)
+    drifting = volatility.GarchVolatility(history*trend[:500])
+    for (_, bar), growth in zip(new_bars.iterrows(), trend[500:]):
+        plain_result = plain.update(bar.to_numpy())
+        drifting_result = drifting.update(bar.to_numpy()*growth)
+    np.testing.assert_allclose(drifting_result, plain_result, rtol=1e-6)
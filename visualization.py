@@ -1,53 +1,83 @@
 #from mpl_toolkits.mplot3d import Axes3D
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
+import instrumentation
 
+# Heatmaps with more rows and columns than this have no per-cell annotations or borders: they stop being readable
+ANNOTATION_MAX_RESOLUTION = 15
 
-def plot_3d_surface_and_heatmap(min_volatility, max_volatility, min_time,  max_time, pricing_function, title):
+
+@instrumentation.timed("surface.build")
+def compute_price_surface(min_volatility, max_volatility, min_time, max_time, pricing_function, resolution=10, vectorized=False):
     """
-    Plot 3d surface to visualize how option prices depend on volatility and time  to expiry
+    Evaluate pricing_function(volatility, time_to_maturity) on a resolution x resolution grid.
+    A vectorized pricing function receives the whole meshgrid at once and returns the price grid in one call,
+    otherwise it is called once per cell.
+    Returns the volatility axis, the time axis and the price grid (rows are times, columns volatilities).
     """
-    # --- Prepare the data ---
-    volatility_range = np.linspace(min_volatility, max_volatility, 10)
-    time_range = np.linspace(min_time, max_time, 10)    # Time in years
+    volatility_range = np.linspace(min_volatility, max_volatility, resolution)
+    time_range = np.linspace(min_time, max_time, resolution)    # Time in years
 
-    # Create meshgrid 
+    # Create meshgrid
     V, T = np.meshgrid(volatility_range, time_range)
 
-    # Compte option prices
-    prices = np.zeros_like(V)
+    # Compute option prices
+    if vectorized:
+        prices = np.broadcast_to(np.asarray(pricing_function(V, T), dtype=float), V.shape)
+    else:
+        prices = np.zeros_like(V)
+        for i in range(prices.shape[0]):
+            for j in range(prices.shape[1]):
+                prices[i,j] = pricing_function(V[i,j],T[i,j])
+
+    return volatility_range, time_range, prices
+
 
-    for i in range(prices.shape[0]):
-        for j in range(prices.shape[1]):
-            prices[i,j] = pricing_function(V[i,j],T[i,j])
+def plot_3d_surface_and_heatmap(min_volatility, max_volatility, min_time,  max_time, pricing_function, title, resolution=10, vectorized=False):
+    """
+    Plot 3d surface to visualize how option prices depend on volatility and time  to expiry.
+    Pass a vectorized pricing function (taking volatility and time grids) with vectorized=True to price the whole surface in one call.
+    """
+    # Plotting libraries are imported here, compute_price_surface alone only needs numpy
+    import plotly.graph_objects as go
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
+    # --- Prepare the data ---
+    volatility_range, time_range, prices = compute_price_surface(min_volatility, max_volatility, min_time, max_time,
+                                                                 pricing_function, resolution, vectorized)
 
     # --- Plot 3D surface ---
-    fig1 = go.Figure(data=[go.Surface(x=V, y=T, z=prices, colorscale=[[0, "#081B41"], [0.5, "#1E3A8A"], [1, "#3B82F6"]],
-                                    colorbar=dict(title="Option Price", thickness=15, tickcolor="black"))])
-    fig1.update_layout(
-        title=dict(text=f"{title} Option Price Surface", font=dict(size=18, color="#111827")),
-        scene=dict(
-            xaxis=dict(title="Volatility", tickfont=dict(size=14, color="#111827"), backgroundcolor="#F9FAFB"),
-            yaxis=dict(title="Time to Maturity", tickfont=dict(size=14, color="#111827"), backgroundcolor="#F9FAFB"),
-            zaxis=dict(title="Option Price", tickfont=dict(size=14, color="#111827"), backgroundcolor="#F9FAFB"),
-        ),
-        margin=dict(l=20, r=20, t=50, b=20),
-        template="plotly_white"
-    )
+    with instrumentation.span("figure.surface"):
+        fig1 = go.Figure(data=[go.Surface(x=volatility_range, y=time_range, z=prices, colorscale=[[0, "#081B41"], [0.5, "#1E3A8A"], [1, "#3B82F6"]],
+                                        colorbar=dict(title="Option Price", thickness=15, tickcolor="black"))])
+        fig1.update_layout(
+            title=dict(text=f"{title} Option Price Surface", font=dict(size=18, color="#111827")),
+            scene=dict(
+                xaxis=dict(title="Volatility", tickfont=dict(size=14, color="#111827"), backgroundcolor="#F9FAFB"),
+                yaxis=dict(title="Time to Maturity", tickfont=dict(size=14, color="#111827"), backgroundcolor="#F9FAFB"),
+                zaxis=dict(title="Option Price", tickfont=dict(size=14, color="#111827"), backgroundcolor="#F9FAFB"),
+            ),
+            margin=dict(l=20, r=20, t=50, b=20),
+            template="plotly_white"
+        )
 
     # --- Plot heatmap ---
 
-    # Custom modern grey-blue colormap
-    cmap = sns.color_palette("blend:#1E3A8A,#3B82F6,#E5E7EB", as_cmap=True)
-    fig2, ax2 = plt.subplots(figsize=(10,5))
+    with instrumentation.span("figure.heatmap"):
+        # Custom modern grey-blue colormap
+        cmap = sns.color_palette("blend:#1E3A8A,#3B82F6,#E5E7EB", as_cmap=True)
+        fig2, ax2 = plt.subplots(figsize=(10,5))
 
-    sns.heatmap(prices, xticklabels=np.round(volatility_range,2), yticklabels=np.round(time_range,2), annot=True, fmt=".2f", cmap=cmap, ax=ax2, 
-                linecolor="white", linewidths=0.5, cbar_kws={"label": "Option Price"})
-    ax2.set_xlabel("Volatility", fontsize=12, weight="bold")
-    ax2.set_ylabel("Time to Expiry", fontsize=12, weight="bold")
-    ax2.set_title(f"{title} Option Price Heatmap", fontsize=14, weight="bold", pad=15)
+        # On fine grids drop the annotations and label every n-th row and column
+        annotate = resolution <= ANNOTATION_MAX_RESOLUTION
+        label_step = max(resolution//10, 1)
+        sns.heatmap(pd.DataFrame(prices, index=np.round(time_range,2), columns=np.round(volatility_range,2)),
+                    xticklabels=label_step, yticklabels=label_step, annot=annotate, fmt=".2f", cmap=cmap, ax=ax2,
+                    linecolor="white", linewidths=0.5 if annotate else 0, cbar_kws={"label": "Option Price"})
+        ax2.set_xlabel("Volatility", fontsize=12, weight="bold")
+        ax2.set_ylabel("Time to Expiry", fontsize=12, weight="bold")
+        ax2.set_title(f"{title} Option Price Heatmap", fontsize=14, weight="bold", pad=15)
 
 
     return fig1, fig2
@@ -0,0 +1,281 @@
+import numpy as np
+import pandas as pd
+# scipy.signal and scipy.optimize are imported by the estimators needing them: the app only uses close_to_close at startup
+
+TRADING_DAYS = 252
+VOLATILITY_METHODS = ["close_to_close", "ewma", "parkinson", "garman_klass", "garch"]
+
+
+def _as_frame(prices):
+    """
+    Work on (dates x tickers) DataFrames, a single ticker Series becoming a one column frame
+    """
+    return prices.to_frame() if isinstance(prices, pd.Series) else prices
+
+
+def _like(values, frame, original):
+    """
+    Wrap a result array like the input: a DataFrame for a DataFrame, a Series for a Series
+    """
+    result = pd.DataFrame(values, index=frame.index, columns=frame.columns)
+    return result.iloc[:, 0] if isinstance(original, pd.Series) else result
+
+
+def _rolling_sum(values, window):
+    """
+    Sum of the last window rows of every column from cumulative sums, NaN counting as missing.
+    Returns the window sums and the number of valid values in each window.
+    """
+    valid = ~np.isnan(values)
+    cumulative = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums = cumulative.copy()
+    sums[window:] -= cumulative[:-window]
+    window_counts = counts.copy()
+    window_counts[window:] -= counts[:-window]
+    return sums, window_counts
+
+
+def log_returns(close):
+    """
+    Daily log returns of a (dates x tickers) close price frame, the first row being NaN
+    """
+    return np.log(close/close.shift(1))
+
+
+def close_to_close_volatility(close):
+    """
+    Annual volatility of every column over the whole frame from its daily log returns,
+    the estimate of stockData.get_annual_volatility
+    """
+    daily_returns = log_returns(_as_frame(close)).iloc[1:]
+    return daily_returns.std(ddof=0)*np.sqrt(TRADING_DAYS)
+
+
+def rolling_volatility(close, window=21):
+    """
+    Annualized rolling close-to-close volatility over window days for every ticker at once.
+    Window sums of the returns and squared returns come from cumulative sums, so the cost does not depend on window.
+    """
+    frame = _as_frame(close)
+    returns = log_returns(frame).to_numpy(dtype=float)
+    sums, counts = _rolling_sum(returns, window)
+    squared_sums, _ = _rolling_sum(returns**2, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (squared_sums-sums**2/counts)/(counts-1)
+    variance = np.where(counts == window, np.maximum(variance, 0), np.nan)
+    return _like(np.sqrt(variance*TRADING_DAYS), frame, close)
+
+
+def ewma_volatility(close, decay=0.94):
+    """
+    Annualized RiskMetrics EWMA volatility, variance_t = decay*variance_t-1 + (1-decay)*return_t^2, for every ticker at once.
+    The recursion runs as a linear filter along the dates, seeded with the first squared return.
+    """
+    from scipy.signal import lfilter
+
+    frame = _as_frame(close)
+    # Missing bars count as unchanged prices; tickers starting later stay NaN until their first bar
+    filled = frame.ffill()
+    squared_returns = np.nan_to_num(log_returns(filled).to_numpy(dtype=float)[1:]**2)
+    variance = np.full((len(frame), frame.shape[1]), np.nan)
+    if len(squared_returns):
+        initial_state = decay*squared_returns[:1]
+        variance[1:], _ = lfilter([1-decay], [1, -decay], squared_returns, axis=0, zi=initial_state)
+    variance[filled.isna().to_numpy()] = np.nan
+    return _like(np.sqrt(variance*TRADING_DAYS), frame, close)
+
+
+def parkinson_volatility(high, low, window=21):
+    """
+    Annualized Parkinson range volatility from daily highs and lows, rolling over window days
+    """
+    frame = _as_frame(high)
+    squared_range = np.log(frame.to_numpy(dtype=float)/_as_frame(low).to_numpy(dtype=float))**2
+    sums, counts = _rolling_sum(squared_range, window)
+    variance = np.where(counts == window, sums/(window*4*np.log(2)), np.nan)
+    return _like(np.sqrt(variance*TRADING_DAYS), frame, high)
+
+
+def garman_klass_volatility(open_prices, high, low, close, window=21):
+    """
+    Annualized Garman-Klass volatility from daily open, high, low and close prices, rolling over window days
+    """
+    frame = _as_frame(close)
+    log_range = np.log(_as_frame(high).to_numpy(dtype=float)/_as_frame(low).to_numpy(dtype=float))
+    log_body = np.log(frame.to_numpy(dtype=float)/_as_frame(open_prices).to_numpy(dtype=float))
+    daily_variance = 0.5*log_range**2-(2*np.log(2)-1)*log_body**2
+    sums, counts = _rolling_sum(daily_variance, window)
+    variance = np.where(counts == window, np.maximum(sums/window, 0), np.nan)
+    return _like(np.sqrt(variance*TRADING_DAYS), frame, close)
+
+
+def _garch_variance(returns, omega, alpha, beta, initial_variance):
+    """
+    GARCH(1,1) conditional variances variance_t = omega + alpha*return_t-1^2 + beta*variance_t-1 as a linear filter
+    """
+    from scipy.signal import lfilter
+
+    driver = omega+alpha*np.concatenate(([0.0], returns[:-1]**2))
+    driver[0] = initial_variance
+    return lfilter([1.0], [1.0, -beta], driver)
+
+
+def fit_garch(returns):
+    """
+    Maximum likelihood GARCH(1,1) parameters (omega, alpha, beta) of a series of daily returns.
+    The variance recursion runs as a linear filter, so each likelihood evaluation costs one pass in C.
+    """
+    from scipy.optimize import minimize
+
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[~np.isnan(returns)]-np.nanmean(returns)
+    sample_variance = returns.var()
+
+    def negative_log_likelihood(parameters):
+        alpha, beta = parameters
+        omega = sample_variance*(1-alpha-beta)    # variance targeting
+        variance = _garch_variance(returns, omega, alpha, beta, sample_variance)
+        return 0.5*np.sum(np.log(variance)+returns**2/variance)
+
+    result = minimize(negative_log_likelihood, x0=[0.08, 0.9], method="SLSQP",
+                      bounds=[(1e-6, 0.5), (0.0, 0.999)],
+                      constraints=[{"type": "ineq", "fun": lambda p: 0.9999-p[0]-p[1]}])
+    alpha, beta = result.x
+    return sample_variance*(1-alpha-beta), alpha, beta
+
+
+def garch_volatility(close):
+    """
+    Annualized GARCH(1,1) conditional volatility of every ticker, each with its own fitted parameters.
+    Returns the volatilities and a (tickers x [omega, alpha, beta]) frame of the parameters.
+    """
+    frame = _as_frame(close)
+    returns = log_returns(frame)
+    volatility = np.full(frame.shape, np.nan)
+    parameters = {}
+    for column, ticker in enumerate(frame.columns):
+        ticker_returns = returns[ticker].to_numpy(dtype=float)
+        valid = np.flatnonzero(~np.isnan(ticker_returns))
+        if valid.size < 10:
+            continue
+        omega, alpha, beta = fit_garch(ticker_returns[valid])
+        demeaned = ticker_returns[valid]-ticker_returns[valid].mean()
+        variance = _garch_variance(demeaned, omega, alpha, beta, demeaned.var())
+        volatility[valid, column] = np.sqrt(variance*TRADING_DAYS)
+        parameters[ticker] = (omega, alpha, beta)
+    parameters = pd.DataFrame.from_dict(parameters, orient="index", columns=["omega", "alpha", "beta"])
+    return _like(volatility, frame, close), parameters
+
+
+def latest_volatility(history, method="close_to_close"):
+    """
+    Current annual volatility of one ticker from its OHLC history (as returned by stockData.history)
+    with one of VOLATILITY_METHODS; range based estimators use the whole history as their window.
+    """
+    if method == "close_to_close":
+        return close_to_close_volatility(history["Close"]).iloc[0]
+    if method == "ewma":
+        return ewma_volatility(history["Close"]).iloc[-1]
+    if method == "parkinson":
+        return parkinson_volatility(history["High"], history["Low"], window=len(history)).iloc[-1]
+    if method == "garman_klass":
+        return garman_klass_volatility(open_prices=history["Open"], high=history["High"], low=history["Low"], close=history["Close"],
+                                       window=len(history)).iloc[-1]
+    if method == "garch":
+        volatility, _ = garch_volatility(history["Close"])
+        return volatility.iloc[-1]
+    raise ValueError(f"method must be one of {VOLATILITY_METHODS}")
+
+
+class RollingVolatility:
+    """
+    Incremental rolling volatility of many tickers: update() adds one bar of closes in O(tickers)
+    by keeping the last window returns in a ring buffer along with their running sums.
+    """
+    def __init__(self, close, window=21):
+        """
+        Initialize the state from a (dates x tickers) close history of at least window+1 rows
+        """
+        frame = _as_frame(close)
+        self.window = window
+        self.tickers = frame.columns
+        self.last_close = frame.iloc[-1].to_numpy(dtype=float)
+        self.returns = log_returns(frame).to_numpy(dtype=float)[-window:].copy()
+        self.position = 0    # oldest return in the ring buffer
+        self.sum = self.returns.sum(axis=0)
+        self.squared_sum = (self.returns**2).sum(axis=0)
+
+    def volatility(self):
+        variance = (self.squared_sum-self.sum**2/self.window)/(self.window-1)
+        return pd.Series(np.sqrt(np.maximum(variance, 0)*TRADING_DAYS), index=self.tickers)
+
+    def update(self, close):
+        """
+        Add the closes of a new bar (one per ticker) and return the updated volatilities
+        """
+        close = np.asarray(close, dtype=float)
+        new_return = np.log(close/self.last_close)
+        oldest = self.returns[self.position]
+        self.sum += new_return-oldest
+        self.squared_sum += new_return**2-oldest**2
+        self.returns[self.position] = new_return
+        self.position = (self.position+1) % self.window
+        self.last_close = close
+        return self.volatility()
+
+
+class EwmaVolatility:
+    """
+    Incremental EWMA volatility of many tickers, one multiply-add per ticker and new bar
+    """
+    def __init__(self, close, decay=0.94):
+        frame = _as_frame(close)
+        self.decay = decay
+        self.tickers = frame.columns
+        self.last_close = frame.iloc[-1].to_numpy(dtype=float)
+        self.variance = ewma_volatility(frame, decay).iloc[-1].to_numpy()**2/TRADING_DAYS
+
+    def volatility(self):
+        return pd.Series(np.sqrt(self.variance*TRADING_DAYS), index=self.tickers)
+
+    def update(self, close):
+        """
+        Add the closes of a new bar (one per ticker) and return the updated volatilities
+        """
+        close = np.asarray(close, dtype=float)
+        self.variance = self.decay*self.variance+(1-self.decay)*np.log(close/self.last_close)**2
+        self.last_close = close
+        return self.volatility()
+
+
+class GarchVolatility:
+    """
+    Incremental GARCH(1,1) volatility of many tickers: parameters are fitted once on the history,
+    then every new bar only advances the variance recursion. Returns are demeaned with the mean of the history,
+    as in the fit.
+    """
+    def __init__(self, close):
+        frame = _as_frame(close)
+        volatility, self.parameters = garch_volatility(frame)
+        self.tickers = frame.columns
+        self.omega, self.alpha, self.beta = (self.parameters.reindex(self.tickers)[name].to_numpy() for name in ("omega", "alpha", "beta"))
+        self.last_close = frame.iloc[-1].to_numpy(dtype=float)
+        returns = log_returns(frame)
+        self.mean_return = returns.mean().to_numpy()
+        last_return = returns.iloc[-1].to_numpy(dtype=float)-self.mean_return
+        # Variance forecast for the next bar
+        self.variance = self.omega+self.alpha*last_return**2+self.beta*volatility.iloc[-1].to_numpy()**2/TRADING_DAYS
+
+    def volatility(self):
+        return pd.Series(np.sqrt(self.variance*TRADING_DAYS), index=self.tickers)
+
+    def update(self, close):
+        """
+        Add the closes of a new bar (one per ticker) and return the volatilities forecast for the next bar
+        """
+        close = np.asarray(close, dtype=float)
+        new_return = np.log(close/self.last_close)-self.mean_return
+        self.variance = self.omega+self.alpha*new_return**2+self.beta*self.variance
+        self.last_close = close
+        return self.volatility()
@@ -1,5 +1,5 @@
-import yfinance as yf
-import numpy as np
+import instrumentation
+import volatility
 
 class stockData:
     def __init__(self, ticker):
@@ -7,7 +7,28 @@ class stockData:
         Initialize with the stock Ticker symbol
         """
         self.ticker = ticker.upper()
-        self.data = yf.Ticker(self.ticker)
+        self._data = None
+
+    @property
+    def data(self):
+        """
+        yfinance Ticker of the stock, created (and yfinance imported) on first use
+        """
+        if self._data is None:
+            import yfinance as yf
+            self._data = yf.Ticker(self.ticker)
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+
+    def history(self, period="1y"):
+        """
+        Get the daily price history (Open, High, Low, Close, Volume...) for the selected period
+        """
+        with instrumentation.span("data.download"):
+            return self.data.history(period=period)
     
     def get_display_name(self):
         """
@@ -20,23 +41,22 @@ class stockData:
         """
         Get the latest spot price (last close)
         """
-        price = self.data.history(period="1d")['Close'][-1]
+        price = self.history(period="1d")['Close'].iloc[-1]
         return price
     
 
-    def get_annual_volatility(self, period="1y"):
+    def get_annual_volatility(self, period="1y", method="close_to_close"):
         """
         Estimate annual volatility from historical daily returns.
         period: lookback period , e.g., '1y', '6mo' 
+        method: one of volatility.VOLATILITY_METHODS, 'close_to_close' being the standard deviation of daily returns
         """
-        hist = self.data.history(period=period)
-        daily_returns  =  hist['Close'].pct_change().dropna()
-        volatility = np.std(daily_returns)*np.sqrt(252)
-        return volatility
+        hist = self.history(period=period)
+        return volatility.latest_volatility(hist, method)
     
     
     def get_historical_data(self, period="1y"):
         """
         Get historical data for selected period
         """
-        return self.data.history(period=period)['Close']
\ No newline at end of file
+        return self.history(period=period)['Close']
\ No newline at end of file